@@ -1,24 +1,46 @@
 """LangChain agent for detecting appliance type"""
-from langchain_openai import ChatOpenAI
+import re
+from typing import Dict, Optional
 from langchain.prompts import ChatPromptTemplate
+from config import (
+    APPLIANCE_TYPE_CACHE_PATH,
+    APPLIANCE_TYPE_CACHE_MAX_ENTRIES,
+    APPLIANCE_TYPE_CACHE_TTL_SECONDS
+)
+from app.utils.llm_client_registry import LLMClientRegistry
+from app.utils.persistent_cache import PersistentCache
 from app.prompts.appliance_prompts import APPLIANCE_TYPE_DETECTION_PROMPT
-import os
 
 
 class ApplianceTypeAgent:
     """Agent for detecting appliance type from details"""
     
-    def __init__(self, api_key: str = None):
+    # Types the detected text is normalized to
+    COMMON_TYPES = [
+        "Refrigerator", "Freezer", "Washing Machine", "Dishwasher",
+        "TV", "Microwave", "Oven", "Stove", "Air Conditioner", "Dryer"
+    ]
+    
+    # Leading letters + digits of a model number, e.g. "RF28" in "RF28R7351SG/AA"
+    MODEL_FAMILY_PATTERN = re.compile(r'^[A-Z]+\d+')
+    
+    def __init__(
+        self,
+        api_key: str = None,
+        client_registry: LLMClientRegistry = None,
+        type_cache: PersistentCache = None
+    ):
         """Initialize the agent"""
-        api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OpenAI API key is required")
-        
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.3,
-            api_key=api_key
-        )
+        self.client_registry = client_registry or LLMClientRegistry(api_key)
+        if type_cache is None:
+            # Not "or": an empty PersistentCache is falsy (it defines __len__)
+            type_cache = PersistentCache(
+                APPLIANCE_TYPE_CACHE_PATH,
+                max_entries=APPLIANCE_TYPE_CACHE_MAX_ENTRIES,
+                ttl_seconds=APPLIANCE_TYPE_CACHE_TTL_SECONDS
+            )
+        self.type_cache = type_cache
+        self.llm = self.client_registry.get_chat_model("gpt-4o-mini", temperature=0.3)
         self.prompt_template = ChatPromptTemplate.from_template(APPLIANCE_TYPE_DETECTION_PROMPT)
     
     def detect_type(self, brand: str, model: str, serial: str = None) -> str:
@@ -29,35 +51,91 @@ class ApplianceTypeAgent:
             brand: Appliance brand
             model: Model number
             serial: Serial number (optional)
-            
+        
         Returns:
             Appliance type (e.g., "Refrigerator", "TV")
         """
+        cache_key = self.get_cache_key(brand, model)
+        cached_type = self._get_cached_type(cache_key)
+        if cached_type:
+            return cached_type
+        
         try:
-            chain = self.prompt_template | self.llm
-            response = chain.invoke({
-                "brand": brand or "Unknown",
-                "model": model or "Unknown",
-                "serial": serial or "Unknown"
-            })
-            
-            appliance_type = response.content.strip()
-            
-            # Clean up response (remove quotes, extra text)
-            appliance_type = appliance_type.replace('"', '').replace("'", "").strip()
-            
-            # Validate common types
-            common_types = [
-                "Refrigerator", "Freezer", "Washing Machine", "Dishwasher",
-                "TV", "Microwave", "Oven", "Stove", "Air Conditioner", "Dryer"
-            ]
-            
-            for t in common_types:
-                if t.lower() in appliance_type.lower():
-                    return t
-            
-            return appliance_type if appliance_type else "Unknown"
+            inputs = self._build_inputs(brand, model, serial)
+            response = self.client_registry.resilience.call(
+                "identification",
+                lambda timeout: (self.prompt_template | self.llm.bind(timeout=timeout)).invoke(inputs)
+            )
+            return self._cache_type(cache_key, self._parse_type(response.content))
         except Exception as e:
             print(f"Error detecting appliance type: {e}")
             return "Unknown"
-
+    
+    async def adetect_type(self, brand: str, model: str, serial: str = None) -> str:
+        """Async version of detect_type()"""
+        cache_key = self.get_cache_key(brand, model)
+        cached_type = self._get_cached_type(cache_key)
+        if cached_type:
+            return cached_type
+        
+        try:
+            inputs = self._build_inputs(brand, model, serial)
+            response = await self.client_registry.resilience.acall(
+                "identification",
+                lambda timeout: (self.prompt_template | self.llm.bind(timeout=timeout)).ainvoke(inputs)
+            )
+            return self._cache_type(cache_key, self._parse_type(response.content))
+        except Exception as e:
+            print(f"Error detecting appliance type: {e}")
+            return "Unknown"
+    
+    @classmethod
+    def get_cache_key(cls, brand: str, model: str) -> Optional[str]:
+        """
+        Build the cache key from the brand and the model family
+        
+        Returns None when brand or model is missing, so incomplete details
+        are never cached.
+        """
+        brand_key = re.sub(r'[^a-z0-9]', '', (brand or "").lower())
+        model_key = re.sub(r'[^A-Z0-9]', '', (model or "").upper().split('/')[0])
+        if not brand_key or not model_key:
+            return None
+        
+        match = cls.MODEL_FAMILY_PATTERN.match(model_key)
+        model_family = match.group(0) if match else model_key
+        return f"{brand_key}:{model_family}"
+    
+    def _get_cached_type(self, cache_key: Optional[str]) -> Optional[str]:
+        """Look up a previously detected type"""
+        if not cache_key:
+            return None
+        return self.type_cache.get(cache_key)
+    
+    def _cache_type(self, cache_key: Optional[str], appliance_type: str) -> str:
+        """Remember a detected type (unknown results are not cached)"""
+        if cache_key and appliance_type and appliance_type != "Unknown":
+            self.type_cache.set(cache_key, appliance_type)
+        return appliance_type
+    
+    @staticmethod
+    def _build_inputs(brand: str, model: str, serial: str = None) -> Dict:
+        """Build prompt inputs"""
+        return {
+            "brand": brand or "Unknown",
+            "model": model or "Unknown",
+            "serial": serial or "Unknown"
+        }
+    
+    @classmethod
+    def _parse_type(cls, content: str) -> str:
+        """Normalize the model's answer to a known appliance type"""
+        # Clean up response (remove quotes, extra text)
+        appliance_type = content.strip().replace('"', '').replace("'", "").strip()
+        
+        # Validate common types
+        for t in cls.COMMON_TYPES:
+            if t.lower() in appliance_type.lower():
+                return t
+        
+        return appliance_type if appliance_type else "Unknown"
@@ -1,25 +1,16 @@
 """LangChain agent for summarizing issues"""
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
+from app.utils.llm_client_registry import LLMClientRegistry
 from app.prompts.troubleshooting_prompts import ISSUE_SUMMARIZATION_PROMPT
-import os
-from typing import List, Dict
 
 
 class SummarizationAgent:
     """Agent for summarizing issues for technician booking"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, client_registry: LLMClientRegistry = None):
         """Initialize the agent"""
-        api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OpenAI API key is required")
-        
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.3,
-            api_key=api_key
-        )
+        self.client_registry = client_registry or LLMClientRegistry(api_key)
+        self.llm = self.client_registry.get_chat_model("gpt-4o-mini", temperature=0.3)
         self.prompt_template = ChatPromptTemplate.from_template(ISSUE_SUMMARIZATION_PROMPT)
     
     def summarize_issue(
@@ -27,7 +18,7 @@ class SummarizationAgent:
         appliance_type: str,
         brand: str,
         model: str,
-        conversation_history: List[Dict]
+        conversation_summary: str
     ) -> str:
         """
         Summarize the issue for technician booking
@@ -36,27 +27,22 @@ class SummarizationAgent:
             appliance_type: Type of appliance
             brand: Brand name
             model: Model number
-            conversation_history: Conversation messages
+            conversation_summary: Running summary of the conversation
             
         Returns:
             Issue summary text
         """
         try:
-            # Format conversation history
-            history_text = ""
-            if conversation_history:
-                for msg in conversation_history:
-                    role = msg.get("role", "user")
-                    content = msg.get("content", "")
-                    history_text += f"{role.capitalize()}: {content}\n"
-            
-            chain = self.prompt_template | self.llm
-            response = chain.invoke({
+            inputs = {
                 "appliance_type": appliance_type,
                 "brand": brand,
                 "model": model,
-                "conversation_history": history_text or "No conversation history."
-            })
+                "conversation_history": conversation_summary or "No conversation history."
+            }
+            response = self.client_registry.resilience.call(
+                "summarization",
+                lambda timeout: (self.prompt_template | self.llm.bind(timeout=timeout)).invoke(inputs)
+            )
             
             return response.content.strip()
         except Exception as e:
@@ -1,61 +1,15 @@
 """Troubleshooting agent using direct OpenAI API"""
-from openai import OpenAI
-import os
 import re
-from typing import List, Dict
-from app.prompts.troubleshooting_prompts import TROUBLESHOOTING_GUIDE_PROMPT
+from typing import List, Dict, Iterable, Iterator, Tuple
+from config import OPENAI_MODEL_TEXT, KB_ROUTING_MIN_SCORE
+from app.prompts.troubleshooting_prompts import TROUBLESHOOTING_GUIDE_PROMPT, CURATED_STEPS_PROMPT
+from app.repositories.knowledge_base_repository import KnowledgeBaseRepository
+from app.utils.llm_client_registry import LLMClientRegistry
 from app.utils.parts_loader import PartsLoader
 
 
-class TroubleshootingAgent:
-    """Agent for providing step-by-step troubleshooting guidance"""
-    
-    def __init__(self, api_key: str = None):
-        """Initialize the agent"""
-        api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OpenAI API key is required")
-        
-        self.client = OpenAI(api_key=api_key)
-        self.model = "gpt-4o"
-    
-    def get_guidance(
-        self,
-        appliance_type: str,
-        brand: str,
-        model: str,
-        issue: str,
-        conversation_history: List[Dict] = None
-    ) -> str:
-        """
-        Get troubleshooting guidance using direct OpenAI API
-        
-        Args:
-            appliance_type: Type of appliance
-            brand: Brand name
-            model: Model number
-            issue: Issue description
-            conversation_history: Previous conversation messages
-            
-        Returns:
-            Troubleshooting guidance text
-        """
-        try:
-            # Format conversation history
-            history_text = ""
-            if conversation_history:
-                for msg in conversation_history[-5:]:  # Last 5 messages
-                    role = msg.get("role", "user")
-                    content = msg.get("content", "")
-                    history_text += f"{role.capitalize()}: {content}\n"
-            
-            # Check if this is a special issue with parts (don't show part info from API)
-            is_special_issue = PartsLoader.is_special_issue(issue)
-            
-            # Build the prompt - modify for special issues to exclude part information
-            if is_special_issue:
-                # Use a modified prompt that doesn't ask for part information
-                prompt_template = """You are an expert appliance repair technician providing step-by-step troubleshooting guidance to a customer.
+# Prompt for special issues (parts come from the image folders, not the model)
+SPECIAL_ISSUE_GUIDE_PROMPT = """You are an expert appliance repair technician providing step-by-step troubleshooting guidance to a customer.
 
 Appliance Details:
 - Type: {appliance_type}
@@ -83,84 +37,330 @@ Format your response as:
 ...
 
 Continue the conversation naturally, asking if the user needs help with the next step."""
-                
-                prompt = prompt_template.format(
-                    appliance_type=appliance_type or "Unknown",
-                    brand=brand or "Unknown",
-                    model=model or "Unknown",
-                    issue_description=issue,
-                    conversation_history=history_text or "No previous conversation."
-                )
-            else:
-                prompt = TROUBLESHOOTING_GUIDE_PROMPT.format(
-                    appliance_type=appliance_type or "Unknown",
-                    brand=brand or "Unknown",
-                    model=model or "Unknown",
-                    issue_description=issue,
-                    conversation_history=history_text or "No previous conversation."
-                )
+
+SYSTEM_MESSAGE = "You are an expert appliance repair technician providing step-by-step troubleshooting guidance to customers."
+
+# Part information the model may still include for special issues.
+# Each pattern ends at the first paragraph break, so it can be applied per paragraph.
+PART_INFO_PATTERNS = [
+    re.compile(r'\*\*Part Required\*\*:.*?(?=\n\n|\n\*\*|$)', re.IGNORECASE | re.DOTALL),
+    re.compile(r'\*\*Part Number\*\*:.*?(?=\n\n|\n\*\*|$)', re.IGNORECASE | re.DOTALL),
+    re.compile(r'\*\*Cost\*\*:.*?(?=\n\n|\n\*\*|$)', re.IGNORECASE | re.DOTALL),
+    re.compile(r'If you want to order the part.*?(?=\n\n|$)', re.IGNORECASE | re.DOTALL)
+]
+# Applied after PART_INFO_PATTERNS; this one can run across paragraphs
+ORDER_PART_PATTERN = re.compile(r'order.*?part.*?technician.*?bring.*?install.*?(?=\n\n|$)', re.IGNORECASE | re.DOTALL)
+ORDER_START_PATTERN = re.compile(r'order', re.IGNORECASE)
+EXTRA_NEWLINES_PATTERN = re.compile(r'\n\n\n+')
+PARAGRAPH_BREAK = "\n\n"
+
+
+class TroubleshootingAgent:
+    """Agent for providing step-by-step troubleshooting guidance"""
+    
+    def __init__(
+        self,
+        api_key: str = None,
+        client_registry: LLMClientRegistry = None,
+        knowledge_base_repo: KnowledgeBaseRepository = None
+    ):
+        """Initialize the agent"""
+        self.client_registry = client_registry or LLMClientRegistry(api_key)
+        self.client = self.client_registry.client
+        self.resilience = self.client_registry.resilience
+        self.knowledge_base_repo = knowledge_base_repo or KnowledgeBaseRepository()
+        self.model = "gpt-4o"
+        self.model_defaults = self.client_registry.get_model_defaults(self.model)
+        self.smoothing_model = OPENAI_MODEL_TEXT
+        self.smoothing_defaults = self.client_registry.get_model_defaults(self.smoothing_model)
+    
+    def get_guidance(
+        self,
+        appliance_type: str,
+        brand: str,
+        model: str,
+        issue: str,
+        conversation_summary: str = None
+    ) -> str:
+        """
+        Get troubleshooting guidance using direct OpenAI API
+        
+        Args:
+            appliance_type: Type of appliance
+            brand: Brand name
+            model: Model number
+            issue: Issue description
+            conversation_summary: Running summary of the conversation
+        
+        Returns:
+            Troubleshooting guidance text
+        """
+        try:
+            prompt, is_special_issue = self._build_prompt(
+                appliance_type, brand, model, issue, conversation_summary
+            )
             
             # Call OpenAI API directly
-            response = self.client.chat.completions.create(
+            messages = self._build_messages(prompt)
+            response = self.resilience.call("troubleshooting", lambda timeout: self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert appliance repair technician providing step-by-step troubleshooting guidance to customers."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=2000
-            )
+                messages=messages,
+                **self.model_defaults,
+                timeout=timeout
+            ))
             
             guidance = response.choices[0].message.content.strip()
             
             # For special issues, filter out any part information that might have been included
             if is_special_issue:
-                # Remove part information patterns
-                guidance = re.sub(r'\*\*Part Required\*\*:.*?(?=\n\n|\n\*\*|$)', '', guidance, flags=re.IGNORECASE | re.DOTALL)
-                guidance = re.sub(r'\*\*Part Number\*\*:.*?(?=\n\n|\n\*\*|$)', '', guidance, flags=re.IGNORECASE | re.DOTALL)
-                guidance = re.sub(r'\*\*Cost\*\*:.*?(?=\n\n|\n\*\*|$)', '', guidance, flags=re.IGNORECASE | re.DOTALL)
-                guidance = re.sub(r'If you want to order the part.*?(?=\n\n|$)', '', guidance, flags=re.IGNORECASE | re.DOTALL)
-                guidance = re.sub(r'order.*?part.*?technician.*?bring.*?install.*?(?=\n\n|$)', '', guidance, flags=re.IGNORECASE | re.DOTALL)
-                # Clean up any double newlines
-                guidance = re.sub(r'\n\n\n+', '\n\n', guidance)
-                guidance = guidance.strip()
+                guidance = self._scrub_part_info(guidance)
             
             return guidance
-            
+        
         except Exception as e:
             print(f"Error getting troubleshooting guidance: {e}")
             import traceback
             traceback.print_exc()
-            # Fallback: try with a simpler direct call
-            try:
-                fallback_prompt = f"""You are an expert appliance repair technician. Provide step-by-step troubleshooting guidance.
+            return self._get_fallback_guidance(issue, appliance_type)
+    
+    def stream_guidance(
+        self,
+        appliance_type: str,
+        brand: str,
+        model: str,
+        issue: str,
+        conversation_summary: str = None
+    ) -> Iterator[str]:
+        """
+        Stream troubleshooting guidance chunk by chunk
+        
+        Takes the same arguments as get_guidance(). For special issues the
+        part-information scrubbing runs as a streaming filter, so text is
+        released one paragraph at a time instead of token by token.
+        
+        Yields:
+            Pieces of the guidance text, in order
+        """
+        try:
+            prompt, is_special_issue = self._build_prompt(
+                appliance_type, brand, model, issue, conversation_summary
+            )
+            # Only opening the stream is bounded; hedging would duplicate the output
+            messages = self._build_messages(prompt)
+            stream = self.resilience.call("troubleshooting", lambda timeout: self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                stream=True,
+                **self.model_defaults,
+                timeout=timeout
+            ), hedge=False)
+        except Exception as e:
+            print(f"Error starting troubleshooting guidance stream: {e}")
+            yield self._get_fallback_guidance(issue, appliance_type)
+            return
+        
+        chunks = self._iter_stream_content(stream)
+        if is_special_issue:
+            chunks = self._filter_part_info_stream(chunks)
+        
+        yield from chunks
+    
+    def stream_curated_guidance(
+        self,
+        appliance_type: str,
+        brand: str,
+        model: str,
+        issue: str,
+        steps: List[str]
+    ) -> Iterator[str]:
+        """
+        Stream curated knowledge-base steps, rephrased by the cheaper text model
+        
+        Falls back to the steps as written if the model is unavailable.
+        
+        Yields:
+            Pieces of the guidance text, in order
+        """
+        prompt = CURATED_STEPS_PROMPT.format(
+            appliance_type=appliance_type or "Unknown",
+            brand=brand or "Unknown",
+            model=model or "Unknown",
+            issue_description=issue,
+            steps=self._format_steps(steps)
+        )
+        try:
+            messages = self._build_messages(prompt)
+            stream = self.resilience.call("troubleshooting", lambda timeout: self.client.chat.completions.create(
+                model=self.smoothing_model,
+                messages=messages,
+                stream=True,
+                **self.smoothing_defaults,
+                timeout=timeout
+            ), hedge=False)
+        except Exception as e:
+            print(f"Error rephrasing curated guidance: {e}")
+            yield f"{self._format_steps(steps)}\n\nDid this resolve the issue?"
+            return
+        
+        yield from self._iter_stream_content(stream)
+    
+    def _build_prompt(
+        self,
+        appliance_type: str,
+        brand: str,
+        model: str,
+        issue: str,
+        conversation_summary: str = None
+    ) -> Tuple[str, bool]:
+        """Build the guidance prompt; returns (prompt, is_special_issue)"""
+        # Check if this is a special issue with parts (don't show part info from API)
+        is_special_issue = PartsLoader.is_special_issue(issue)
+        
+        # Special issues use a prompt that doesn't ask for part information
+        prompt_template = SPECIAL_ISSUE_GUIDE_PROMPT if is_special_issue else TROUBLESHOOTING_GUIDE_PROMPT
+        prompt = prompt_template.format(
+            appliance_type=appliance_type or "Unknown",
+            brand=brand or "Unknown",
+            model=model or "Unknown",
+            issue_description=issue,
+            conversation_history=conversation_summary or "No previous conversation."
+        )
+        return prompt, is_special_issue
+    
+    @staticmethod
+    def _build_messages(prompt: str) -> List[Dict]:
+        """Build the chat messages for a guidance request"""
+        return [
+            {
+                "role": "system",
+                "content": SYSTEM_MESSAGE
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    
+    @staticmethod
+    def _iter_stream_content(stream) -> Iterator[str]:
+        """Yield the text deltas from a chat completion stream"""
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                yield content
+    
+    @staticmethod
+    def _scrub_part_info(text: str) -> str:
+        """Remove part names, numbers and costs from guidance text"""
+        for pattern in PART_INFO_PATTERNS:
+            text = pattern.sub('', text)
+        text = ORDER_PART_PATTERN.sub('', text)
+        # Clean up any double newlines
+        text = EXTRA_NEWLINES_PATTERN.sub('\n\n', text)
+        return text.strip()
+    
+    @staticmethod
+    def _filter_part_info_stream(chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Streaming version of _scrub_part_info, with the same output
+        
+        PART_INFO_PATTERNS are applied to each paragraph once it is complete.
+        ORDER_PART_PATTERN can match across paragraphs, so text from an
+        "order" that could still start a match is held back until the match
+        completes or the stream ends. Trailing whitespace is held back too,
+        since it may still be collapsed or stripped.
+        """
+        raw = ""
+        text = ""
+        breaks: List[int] = []
+        committed = 0
+        scrubbed = ""
+        emitted = ""
+        for chunk in chunks:
+            raw += chunk
+            if PARAGRAPH_BREAK not in raw:
+                continue
+            while PARAGRAPH_BREAK in raw:
+                paragraph, raw = raw.split(PARAGRAPH_BREAK, 1)
+                text += TroubleshootingAgent._scrub_paragraph(paragraph)
+                breaks.append(len(text))
+                text += PARAGRAPH_BREAK
+            
+            cut = TroubleshootingAgent._find_safe_cut(text, committed, breaks)
+            if cut > committed:
+                scrubbed += ORDER_PART_PATTERN.sub('', text[committed:cut])
+                committed = cut
+                breaks = [position for position in breaks if position > cut]
+                released = EXTRA_NEWLINES_PATTERN.sub('\n\n', scrubbed).strip()
+                if len(released) > len(emitted):
+                    yield released[len(emitted):]
+                    emitted = released
+        
+        text += TroubleshootingAgent._scrub_paragraph(raw)
+        scrubbed += ORDER_PART_PATTERN.sub('', text[committed:])
+        released = EXTRA_NEWLINES_PATTERN.sub('\n\n', scrubbed).strip()
+        if len(released) > len(emitted):
+            yield released[len(emitted):]
+    
+    @staticmethod
+    def _scrub_paragraph(paragraph: str) -> str:
+        """Apply the per-paragraph PART_INFO_PATTERNS"""
+        for pattern in PART_INFO_PATTERNS:
+            paragraph = pattern.sub('', paragraph)
+        return paragraph
+    
+    @staticmethod
+    def _find_safe_cut(text: str, start: int, breaks: List[int]) -> int:
+        """
+        Find the latest paragraph break in text[start:] that no ORDER_PART_PATTERN
+        match can cross, whatever text follows (start if there is none)
+        
+        Matches found so far are final, since each ends at a paragraph break
+        already received. Past the last of them, the first "order" is the only
+        place a match could still start, because if it cannot complete one,
+        no later "order" can.
+        """
+        end = breaks[-1]
+        matched_to = start
+        for match in ORDER_PART_PATTERN.finditer(text, start, end):
+            matched_to = match.end()
+        pending = ORDER_START_PATTERN.search(text, matched_to, end)
+        if pending is None:
+            return end
+        candidates = [position for position in breaks if matched_to <= position <= pending.start()]
+        return candidates[-1] if candidates else start
+    
+    def _get_fallback_guidance(self, issue: str, appliance_type: str) -> str:
+        """
+        Fallback: standard steps from the knowledge base
+        
+        Used when the LLM call fails or the provider is unavailable, instead
+        of a second model call that would add to the latency of a slow provider.
+        Only a confident match for the same appliance type is used; otherwise
+        the customer gets an apology rather than steps for another appliance.
+        """
+        try:
+            problem, score = self.knowledge_base_repo.find_best_match(issue, appliance_type)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"Knowledge base fallback failed: {e}")
+            problem, score = None, 0.0
+        
+        if not problem or not problem.troubleshooting_steps or score < KB_ROUTING_MIN_SCORE:
+            return "I apologize, but I encountered an error while providing troubleshooting guidance. Please try again or consider booking a technician."
+        
+        steps = self._format_steps(problem.troubleshooting_steps)
+        return f"""I'm having trouble reaching the troubleshooting assistant right now, so here are the standard steps for **{problem.title.lower()}**:
 
-Appliance Details:
-- Type: {appliance_type or 'Unknown'}
-- Brand: {brand or 'Unknown'}
-- Model: {model or 'Unknown'}
-- Issue: {issue}
+{steps}
+
+If these steps don't resolve the issue, please try again in a moment or consider booking a technician."""
 
-Provide clear, numbered, step-by-step troubleshooting instructions. Start with the simplest solutions first. Include safety warnings when necessary."""
-                
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "user", "content": fallback_prompt}
-                    ],
-                    temperature=0.7,
-                    max_tokens=2000
-                )
-                return response.choices[0].message.content.strip()
-            except Exception as e2:
-                print(f"Fallback also failed: {e2}")
-                return f"I apologize, but I encountered an error while providing troubleshooting guidance. Please try again or consider booking a technician."
+    @staticmethod
+    def _format_steps(steps: List[str]) -> str:
+        """Format steps as a numbered list"""
+        return "\n".join(f"{i}. {step}" for i, step in enumerate(steps, 1))
     
     def reset_memory(self):
         """Reset conversation memory (no-op for direct API approach)"""
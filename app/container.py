@@ -0,0 +1,90 @@
+"""Process-scoped dependency container for the Streamlit app"""
+from typing import Optional
+import streamlit as st
+from config import (
+    BLOB_STORE_DIR,
+    BLOB_STORE_MAX_MEMORY_MB,
+    BLOB_STORE_MAX_DISK_MB,
+    IMAGE_THUMBNAIL_SIZE,
+    THUMBNAIL_CACHE_DIR,
+    STATIC_THUMBNAIL_SIZE,
+    BOOKING_STORE
+)
+from app.repositories.knowledge_base_repository import KnowledgeBaseRepository
+from app.repositories.booking_repository import BookingRepository
+from app.repositories.sqlite_booking_repository import SqliteBookingRepository
+from app.repositories.technician_repository import TechnicianRepository
+from app.repositories.common_issues_repository import CommonIssuesRepository
+from app.services.openai_service import OpenAIService
+from app.services.appliance_service import ApplianceService
+from app.services.flow_orchestrator import FlowOrchestrator
+from app.services.booking_service import BookingService
+from app.utils.llm_client_registry import LLMClientRegistry
+from app.utils.blob_store import BlobStore
+from app.utils.thumbnail_service import ThumbnailService
+
+
+class AppContainer:
+    """
+    Holds the long-lived object graph of the application.
+    
+    Lifetimes:
+    - Process: everything on this container (repositories, API clients,
+      services, agents). Built once and shared by all sessions and reruns.
+    - Session: conversation data in st.session_state (see StateManager).
+    - Rerun: widgets and locals inside ApplianceTroubleshootApp.run().
+    
+    Objects stored here must not hold per-session state.
+    """
+    
+    def __init__(self):
+        """Build repositories, services and agents"""
+        # Repositories
+        self.knowledge_base_repo = KnowledgeBaseRepository()
+        if BOOKING_STORE == "sqlite":
+            self.booking_repo = SqliteBookingRepository()
+        else:
+            self.booking_repo = BookingRepository()
+        self.technician_repo = TechnicianRepository()
+        self.common_issues_repo = CommonIssuesRepository()
+        
+        # Uploaded images, shared by all sessions
+        self.blob_store = BlobStore(
+            BLOB_STORE_DIR,
+            max_memory_bytes=BLOB_STORE_MAX_MEMORY_MB * 1024 * 1024,
+            max_disk_bytes=BLOB_STORE_MAX_DISK_MB * 1024 * 1024,
+            thumbnail_size=IMAGE_THUMBNAIL_SIZE
+        )
+        
+        # Thumbnails of the bundled part and example nameplate images
+        self.thumbnail_service = ThumbnailService(THUMBNAIL_CACHE_DIR, max_size=STATIC_THUMBNAIL_SIZE)
+        
+        # Services that need an OpenAI API key, all sharing one connection pool
+        self.client_registry: Optional[LLMClientRegistry] = None
+        self.openai_service: Optional[OpenAIService] = None
+        self.appliance_service: Optional[ApplianceService] = None
+        self.flow_orchestrator: Optional[FlowOrchestrator] = None
+        try:
+            self.client_registry = LLMClientRegistry()
+            self.openai_service = OpenAIService(client_registry=self.client_registry)
+            self.appliance_service = ApplianceService(self.openai_service)
+            self.flow_orchestrator = FlowOrchestrator(
+                client_registry=self.client_registry,
+                common_issues_repo=self.common_issues_repo,
+                knowledge_base_repo=self.knowledge_base_repo
+            )
+        except ValueError as e:
+            print(f"Warning: {e}")
+        
+        self.booking_service = BookingService(self.knowledge_base_repo)
+
+
+@st.cache_resource(show_spinner=False)
+def get_container() -> AppContainer:
+    """Get the process-wide container, building it on first use"""
+    return AppContainer()
+
+
+def reset_container():
+    """Drop the cached container so the next call to get_container() rebuilds it"""
+    get_container.clear()
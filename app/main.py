@@ -1,6 +1,6 @@
 """Main Streamlit application with new flow structure using LangChain"""
 import streamlit as st
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterator, Union
 from datetime import datetime
 from dotenv import load_dotenv
 from pathlib import Path
@@ -11,21 +11,16 @@ BASE_DIR = Path(__file__).parent.parent
 env_path = BASE_DIR / ".env"
 load_dotenv(dotenv_path=env_path)
 
-from config import PAGE_TITLE, PAGE_ICON, OPENAI_API_KEY
+from config import PAGE_TITLE, PAGE_ICON, OPENAI_API_KEY, MAX_IMAGE_SIZE_MB
 from app.models.appliance import Appliance
 from app.models.booking import Booking, TimeSlot, CostBreakdown
 from app.models.technician import Technician
 from app.models.problem import Part
-from app.repositories.knowledge_base_repository import KnowledgeBaseRepository
 from app.repositories.booking_repository import BookingRepository
-from app.repositories.technician_repository import TechnicianRepository
-from app.repositories.common_issues_repository import CommonIssuesRepository
-from app.services.openai_service import OpenAIService
-from app.services.appliance_service import ApplianceService
-from app.services.flow_orchestrator import FlowOrchestrator
-from app.services.booking_service import BookingService
+from app.container import AppContainer, get_container, reset_container
 from app.utils.state_manager import StateManager
 from app.utils.image_utils import ImageUtils
+from app.utils.id_generator import IdGenerator
 from app.utils.parts_loader import PartsLoader
 from components.technician_booking import (
     display_technician_list,
@@ -44,25 +39,23 @@ from components.category_selection import render_category_selection
 class ApplianceTroubleshootApp:
     """Main application class with new flow structure"""
     
-    def __init__(self):
-        """Initialize application with dependencies"""
-        # Initialize repositories
-        self.knowledge_base_repo = KnowledgeBaseRepository()
-        self.booking_repo = BookingRepository()
-        self.technician_repo = TechnicianRepository()
-        self.common_issues_repo = CommonIssuesRepository()
-        
-        # Initialize services
-        try:
-            self.openai_service = OpenAIService()
-            self.appliance_service = ApplianceService(self.openai_service)
-            self.flow_orchestrator = FlowOrchestrator()
-        except ValueError:
-            self.openai_service = None
-            self.appliance_service = None
-            self.flow_orchestrator = None
-        
-        self.booking_service = BookingService(self.knowledge_base_repo)
+    def __init__(self, container: Optional[AppContainer] = None):
+        """Initialize application with the shared process-wide dependencies"""
+        container = container or get_container()
+        
+        # Repositories
+        self.knowledge_base_repo = container.knowledge_base_repo
+        self.booking_repo = container.booking_repo
+        self.technician_repo = container.technician_repo
+        self.common_issues_repo = container.common_issues_repo
+        
+        # Services
+        self.openai_service = container.openai_service
+        self.appliance_service = container.appliance_service
+        self.flow_orchestrator = container.flow_orchestrator
+        self.booking_service = container.booking_service
+        self.blob_store = container.blob_store
+        self.thumbnail_service = container.thumbnail_service
         
         # Initialize state
         StateManager.initialize()
@@ -166,6 +159,8 @@ class ApplianceTroubleshootApp:
         
         # Check API key
         if not self.openai_service or not self.flow_orchestrator:
+            # Don't keep a container without API clients cached; retry on the next rerun
+            reset_container()
             st.warning(
                 "⚠️ **OpenAI API Key not found!**\n\n"
                 "Please set the `OPENAI_API_KEY` environment variable to use this app."
@@ -234,7 +229,7 @@ class ApplianceTroubleshootApp:
                     # Detect type if not provided
                     if not appliance.appliance_type and appliance.brand and appliance.model:
                         with st.spinner("Identifying appliance type..."):
-                            appliance_type = self.flow_orchestrator.detect_appliance_type(appliance)
+                            appliance_type = self._detect_type_and_prefetch_issues(appliance)
                             if appliance_type:
                                 appliance.appliance_type = appliance_type
                     
@@ -260,6 +255,10 @@ class ApplianceTroubleshootApp:
                 
                 if uploaded_file is not None:
                     image_bytes = uploaded_file.read()
+                    if not ImageUtils.validate_image_size(image_bytes):
+                        st.error(f"Image is too large. Please upload a photo under {MAX_IMAGE_SIZE_MB} MB.")
+                        return
+                    
                     image_hash = ImageUtils.get_image_hash(image_bytes)
                     
                     if StateManager.is_image_processed(image_hash):
@@ -270,8 +269,10 @@ class ApplianceTroubleshootApp:
                     # Process image
                     with st.spinner("Reading nameplate information..."):
                         try:
-                            text_content, info = self.appliance_service.identify_from_image(image_bytes)
-                            StateManager.cache_vision_result(image_hash, text_content, info)
+                            text_content, info = self.appliance_service.identify_from_image(
+                                image_bytes,
+                                StateManager.get_processed_images()
+                            )
                         except Exception as e:
                             st.error(f"Error processing image: {e}")
                             return
@@ -283,12 +284,13 @@ class ApplianceTroubleshootApp:
                     # Detect appliance type
                     if appliance.brand and appliance.model:
                         with st.spinner("Identifying appliance type..."):
-                            appliance_type = self.flow_orchestrator.detect_appliance_type(appliance)
+                            appliance_type = self._detect_type_and_prefetch_issues(appliance)
                             if appliance_type:
                                 appliance.appliance_type = appliance_type
                     
                     StateManager.set_appliance(appliance)
-                    StateManager.add_message("user", "I uploaded a nameplate image", image_bytes)
+                    image_ref = self.blob_store.put(image_bytes)
+                    StateManager.add_message("user", "I uploaded a nameplate image", image_ref)
                     
                     # Show detected information with confirm button
                     response = f"""I found the following information from your nameplate:
@@ -299,7 +301,7 @@ class ApplianceTroubleshootApp:
 **Serial:** {appliance.serial or 'Unknown'}
 {f"**Age:** ~{appliance.age} years" if appliance.age else ""}"""
                     
-                    StateManager.add_message("assistant", response, image_bytes)
+                    StateManager.add_message("assistant", response, image_ref)
                     st.session_state.landing_action = None
                     st.session_state.show_photo_confirm = True
                     st.rerun()
@@ -328,7 +330,7 @@ class ApplianceTroubleshootApp:
                         # Detect type if not provided
                         if not appliance.appliance_type and appliance.brand and appliance.model:
                             with st.spinner("Identifying appliance type..."):
-                                appliance_type = self.flow_orchestrator.detect_appliance_type(appliance)
+                                appliance_type = self._detect_type_and_prefetch_issues(appliance)
                                 if appliance_type:
                                     appliance.appliance_type = appliance_type
                         
@@ -349,31 +351,42 @@ class ApplianceTroubleshootApp:
         if not messages:
             st.markdown("I'm here to help you fix your appliance or book a technician visit!")
         
-        # Display chat messages
-        for idx, message in enumerate(messages):
+        # Display the most recent chat messages; earlier ones are paged in on request
+        window_start = StateManager.get_chat_window_start()
+        if window_start > 0:
+            if st.button(f"⬆ Load earlier messages ({window_start} hidden)", key="load_earlier_messages"):
+                StateManager.load_earlier_messages()
+                st.rerun()
+        
+        # Only show API part buttons for non-special issues
+        # For special issues, we show parts selection separately after all messages
+        issue = StateManager.get_problem_description()
+        show_part_buttons = (
+            StateManager.get_current_flow() == StateManager.FLOW_TROUBLESHOOTING and
+            not (issue and PartsLoader.is_special_issue(issue))
+        )
+        
+        for idx in range(window_start, len(messages)):
+            message = messages[idx]
             with st.chat_message(message["role"]):
                 content = message["content"]
                 st.markdown(content)
                 
                 # If this is an assistant troubleshooting message
-                if message["role"] == "assistant" and StateManager.get_current_flow() == StateManager.FLOW_TROUBLESHOOTING:
-                    issue = StateManager.get_problem_description()
-                    is_special = issue and PartsLoader.is_special_issue(issue)
-                    
-                    # Only show API part buttons for non-special issues
-                    # For special issues, we show parts selection separately after all messages
-                    if not is_special:
-                        self._add_order_part_buttons(content, idx)
+                if message["role"] == "assistant" and show_part_buttons:
+                    self._add_order_part_buttons(message, idx)
                 
                 # Show troubleshoot/book buttons if this is the last message and flag is set
                 if (message["role"] == "assistant" and 
                     idx == len(messages) - 1 and 
                     st.session_state.get("show_troubleshoot_book_buttons", False) and
-                    "How would you like to proceed" in content):
+                    StateManager.PROCEED_PROMPT_TEXT in content):
                     self._show_troubleshoot_book_buttons()
                 
-                if "image" in message and message["image"]:
-                    st.image(message["image"], caption="Uploaded nameplate", width=300)
+                if message.get("image_ref"):
+                    thumbnail = self.blob_store.get_thumbnail(message["image_ref"])
+                    if thumbnail:
+                        st.image(thumbnail, caption="Uploaded nameplate", width=300)
         
         # After all messages, show parts selection for special issues if in troubleshooting flow
         # CRITICAL: Only show AFTER troubleshooting guidance has been displayed (troubleshooting steps must come first)
@@ -450,7 +463,7 @@ class ApplianceTroubleshootApp:
                             # Detect type if not already detected or if model changed
                             if not current_appliance_type or edited_model != current_model:
                                 with st.spinner("Identifying appliance type..."):
-                                    appliance_type = self.flow_orchestrator.detect_appliance_type(appliance)
+                                    appliance_type = self._detect_type_and_prefetch_issues(appliance)
                                     if appliance_type:
                                         appliance.appliance_type = appliance_type
                             
@@ -484,7 +497,7 @@ class ApplianceTroubleshootApp:
                         # Detect type if not already detected
                         if not appliance.appliance_type:
                             with st.spinner("Identifying appliance type..."):
-                                appliance_type = self.flow_orchestrator.detect_appliance_type(appliance)
+                                appliance_type = self._detect_type_and_prefetch_issues(appliance)
                                 if appliance_type:
                                     appliance.appliance_type = appliance_type
                                     StateManager.set_appliance(appliance)
@@ -514,7 +527,7 @@ class ApplianceTroubleshootApp:
         
         # Show troubleshoot/book buttons if needed (fallback if not shown in chat message)
         if (st.session_state.get("show_troubleshoot_book_buttons", False) and 
-            not any("How would you like to proceed" in msg.get("content", "") for msg in messages if msg.get("role") == "assistant")):
+            not StateManager.has_proceed_prompt()):
             self._show_troubleshoot_book_buttons()
         
         # Handle text input (if not in booking flow with forms)
@@ -538,6 +551,10 @@ class ApplianceTroubleshootApp:
         
         if uploaded_file is not None:
             image_bytes = uploaded_file.read()
+            if not ImageUtils.validate_image_size(image_bytes):
+                st.error(f"Image is too large. Please upload a photo under {MAX_IMAGE_SIZE_MB} MB.")
+                return
+            
             image_hash = ImageUtils.get_image_hash(image_bytes)
             
             if StateManager.is_image_processed(image_hash):
@@ -548,8 +565,10 @@ class ApplianceTroubleshootApp:
             # Process image
             with st.spinner("Reading nameplate information..."):
                 try:
-                    text_content, info = self.appliance_service.identify_from_image(image_bytes)
-                    StateManager.cache_vision_result(image_hash, text_content, info)
+                    text_content, info = self.appliance_service.identify_from_image(
+                        image_bytes,
+                        StateManager.get_processed_images()
+                    )
                 except Exception as e:
                     st.error(f"Error processing image: {e}")
                     return
@@ -563,12 +582,13 @@ class ApplianceTroubleshootApp:
             # Detect appliance type
             if appliance.brand and appliance.model:
                 with st.spinner("Identifying appliance type..."):
-                    appliance_type = self.flow_orchestrator.detect_appliance_type(appliance)
+                    appliance_type = self._detect_type_and_prefetch_issues(appliance)
                     if appliance_type:
                         appliance.appliance_type = appliance_type
             
             StateManager.set_appliance(appliance)
-            StateManager.add_message("user", "I uploaded a nameplate image", image_bytes)
+            image_ref = self.blob_store.put(image_bytes)
+            StateManager.add_message("user", "I uploaded a nameplate image", image_ref)
             
             # Show detected information with confirm button
             response = f"""I found the following information from your nameplate:
@@ -579,7 +599,7 @@ class ApplianceTroubleshootApp:
 **Serial:** {appliance.serial or 'Unknown'}
 {f"**Age:** ~{appliance.age} years" if appliance.age else ""}"""
             
-            StateManager.add_message("assistant", response, image_bytes)
+            StateManager.add_message("assistant", response, image_ref)
             st.session_state.show_photo_confirm = True
             st.rerun()
         
@@ -587,7 +607,7 @@ class ApplianceTroubleshootApp:
         if appliance and appliance.is_complete() and not appliance.appliance_type:
             # Detect type if not already detected
             with st.spinner("Identifying appliance type..."):
-                appliance_type = self.flow_orchestrator.detect_appliance_type(appliance)
+                appliance_type = self._detect_type_and_prefetch_issues(appliance)
                 if appliance_type:
                     appliance.appliance_type = appliance_type
                     StateManager.set_appliance(appliance)
@@ -608,7 +628,11 @@ class ApplianceTroubleshootApp:
             else:
                 response = "I'm not sure how to help with that. Could you rephrase?"
             
-            st.markdown(response)
+            if isinstance(response, str):
+                st.markdown(response)
+            else:
+                # Troubleshooting guidance is streamed into the chat as it arrives
+                response = st.write_stream(response).strip()
         
         StateManager.add_message("assistant", response)
         st.rerun()
@@ -624,7 +648,7 @@ class ApplianceTroubleshootApp:
             if any(kw in user_input.lower() for kw in ["yes", "correct", "right", "confirm"]):
                 # Detect type if not already detected
                 if not appliance.appliance_type:
-                    appliance_type = self.flow_orchestrator.detect_appliance_type(appliance)
+                    appliance_type = self._detect_type_and_prefetch_issues(appliance)
                     if appliance_type:
                         appliance.appliance_type = appliance_type
                         StateManager.set_appliance(appliance)
@@ -641,7 +665,7 @@ class ApplianceTroubleshootApp:
             
             # Detect type if we have brand and model
             if appliance.is_complete() and not appliance.appliance_type:
-                appliance_type = self.flow_orchestrator.detect_appliance_type(appliance)
+                appliance_type = self._detect_type_and_prefetch_issues(appliance)
                 if appliance_type:
                     appliance.appliance_type = appliance_type
                     StateManager.set_appliance(appliance)
@@ -659,6 +683,25 @@ Does this look correct? Please confirm."""
         else:
             return "I need a bit more information. Please provide:\n- Brand (e.g., Samsung, LG)\n- Model number\n- Serial number (if available)\n\nOr upload a photo of the nameplate!"
     
+    def _detect_type_and_prefetch_issues(self, appliance: Appliance) -> Optional[str]:
+        """
+        Detect the appliance type, listing its common issues at the same time
+        
+        The issues are kept in session state so that the issue listing step
+        that usually follows does not need another LLM round trip.
+        """
+        category = st.session_state.get("selected_category")
+        appliance_type, issues = self.flow_orchestrator.detect_type_and_list_issues(appliance, category)
+        if appliance_type and issues:
+            typed_appliance = Appliance(
+                brand=appliance.brand,
+                model=appliance.model,
+                serial=appliance.serial,
+                appliance_type=appliance_type
+            )
+            StateManager.set_prefetched_issues(typed_appliance, issues)
+        return appliance_type
+    
     def _get_issue_listing_response(self) -> str:
         """Get response for issue listing flow"""
         appliance = StateManager.get_appliance()
@@ -670,7 +713,9 @@ Does this look correct? Please confirm."""
         
         # Enhance with LangChain agent if available
         if self.flow_orchestrator:
-            agent_issues = self.flow_orchestrator.list_common_issues(appliance)
+            agent_issues = StateManager.get_prefetched_issues(appliance)
+            if agent_issues is None:
+                agent_issues = self.flow_orchestrator.list_common_issues(appliance)
             if agent_issues:
                 # Merge and deduplicate
                 all_issues = list(set(common_issues + agent_issues))
@@ -810,7 +855,7 @@ What problem are you experiencing with your {appliance.appliance_type}?"""
                     st.session_state.show_issue_input = False
                     st.rerun()
     
-    def _process_issue_listing_input(self, user_input: str) -> str:
+    def _process_issue_listing_input(self, user_input: str) -> Union[str, Iterator[str]]:
         """Process input during issue listing flow"""
         # Check if we already have a problem description (user has selected an issue)
         existing_problem = StateManager.get_problem_description()
@@ -825,12 +870,10 @@ What problem are you experiencing with your {appliance.appliance_type}?"""
                 # Get initial troubleshooting guidance
                 appliance = StateManager.get_appliance()
                 issue = existing_problem
-                guidance = self.flow_orchestrator.get_troubleshooting_guidance(
+                return self.flow_orchestrator.stream_troubleshooting_guidance(
                     appliance=appliance,
-                    issue=issue,
-                    conversation_history=[]
+                    issue=issue
                 )
-                return guidance
             
             # Check if user wants to book technician
             elif any(kw in user_input.lower() for kw in ["2", "book", "technician", "repair", "schedule", "professional"]):
@@ -859,8 +902,14 @@ What problem are you experiencing with your {appliance.appliance_type}?"""
         StateManager.set_problem_description(user_input)
         return self._ask_troubleshoot_or_book(user_input)
     
+    @st.fragment
     def _show_parts_selection_ui(self, issue: str):
-        """Show parts selection UI for special issues with part images"""
+        """
+        Show parts selection UI for special issues with part images
+        
+        Runs as a fragment: ticking a checkbox reruns only this grid. The
+        action buttons change the flow and trigger a full rerun.
+        """
         parts = st.session_state.get("selected_issue_parts", [])
         
         if not parts:
@@ -876,7 +925,8 @@ What problem are you experiencing with your {appliance.appliance_type}?"""
         if "selected_parts_indices" not in st.session_state:
             st.session_state.selected_parts_indices = []
         
-        # Display parts in a grid with images
+        # Display parts in a grid with images (thumbnails decoded in parallel on a cold cache)
+        thumbnails = self.thumbnail_service.get_many([part['image_path'] for part in parts])
         cols_per_row = 2
         checkbox_states = {}  # Track checkbox states
         
@@ -891,12 +941,10 @@ What problem are you experiencing with your {appliance.appliance_type}?"""
                         # Create a container for each part
                         with st.container():
                             # Display part image first (so it's visible)
-                            try:
-                                from PIL import Image
-                                img = Image.open(part['image_path'])
-                                st.image(img, caption=part['name'], use_container_width=True)
-                            except Exception as e:
-                                st.error(f"Could not load image: {e}")
+                            if thumbnails[part_idx]:
+                                st.image(thumbnails[part_idx], caption=part['name'], use_container_width=True)
+                            else:
+                                st.error(f"Could not load image for {part['name']}")
                             
                             # Display part details
                             st.markdown(f"**{part['name']}**")
@@ -988,8 +1036,14 @@ What problem are you experiencing with your {appliance.appliance_type}?"""
                 else:
                     st.warning("Please select at least one part to order.")
     
+    @st.fragment
     def _show_parts_selection_ui_inline(self, issue: str):
-        """Show parts selection UI inline after troubleshooting guidance"""
+        """
+        Show parts selection UI inline after troubleshooting guidance
+        
+        Runs as a fragment: ticking a checkbox reruns only this grid. The
+        action buttons change the flow and trigger a full rerun.
+        """
         parts = st.session_state.get("selected_issue_parts", [])
         
         if not parts:
@@ -1003,7 +1057,8 @@ What problem are you experiencing with your {appliance.appliance_type}?"""
         if "selected_parts_indices_inline" not in st.session_state:
             st.session_state.selected_parts_indices_inline = []
         
-        # Display parts in a grid with images
+        # Display parts in a grid with images (thumbnails decoded in parallel on a cold cache)
+        thumbnails = self.thumbnail_service.get_many([part['image_path'] for part in parts])
         cols_per_row = 2
         checkbox_states = {}  # Track checkbox states
         
@@ -1018,12 +1073,10 @@ What problem are you experiencing with your {appliance.appliance_type}?"""
                         # Create a container for each part
                         with st.container():
                             # Display part image first (so it's visible)
-                            try:
-                                from PIL import Image
-                                img = Image.open(part['image_path'])
-                                st.image(img, caption=part['name'], use_container_width=True)
-                            except Exception as e:
-                                st.error(f"Could not load image: {e}")
+                            if thumbnails[part_idx]:
+                                st.image(thumbnails[part_idx], caption=part['name'], use_container_width=True)
+                            else:
+                                st.error(f"Could not load image for {part['name']}")
                             
                             # Display part details
                             st.markdown(f"**{part['name']}**")
@@ -1163,168 +1216,12 @@ What problem are you experiencing with your {appliance.appliance_type}?"""
 
 How would you like to proceed?"""
     
-    def _add_order_part_buttons(self, content: str, message_idx: int):
+    def _add_order_part_buttons(self, message: Dict, message_idx: int):
         """Add order part buttons when a specific part is identified in the troubleshooting response"""
-        import re
-        
-        # Extract ALL parts from the content (handle multiple parts)
-        parts = []
-        
-        # Split content by "Part Required:" to find all part blocks
-        part_sections = re.split(r'(?:\*\*)?Part Required(?:\*\*)?:', content, flags=re.IGNORECASE)
-        
-        # Process each section (skip the first one as it's before any "Part Required:")
-        for i in range(1, len(part_sections)):
-            section = part_sections[i]
-            
-            # Extract part name (first line after "Part Required:")
-            lines = [line.strip() for line in section.split('\n') if line.strip()]
-            part_name = lines[0] if lines else None
-            # Clean up part name - remove any markdown formatting
-            if part_name:
-                part_name = re.sub(r'\*\*', '', part_name).strip()
-            
-            # Look for Part Number and Cost in this section (more flexible patterns)
-            part_num_match = re.search(r'(?:\*\*)?Part Number(?:\*\*)?[:\s]+([^\n]+)', section, re.IGNORECASE)
-            
-            part_number = part_num_match.group(1).strip() if part_num_match else None
-            if part_number:
-                # Clean up markdown formatting
-                part_number = re.sub(r'\*\*', '', part_number).strip()
-            
-            # Try multiple cost patterns - comprehensive search
-            part_cost = None
-            cost_patterns = [
-                r'\*\*Cost\*\*[:\s]+\$?\s*([\d.]+)',  # **Cost:** $150
-                r'(?:\*\*)?Cost(?:\*\*)?[:\s]+\$?\s*([\d.]+)',  # Cost: $150 or Cost: 150
-                r'Cost[:\s]+\$([\d.]+)',  # Cost: $150
-                r'Cost[:\s]+([\d.]+)',  # Cost: 150
-                r'\$\s*([\d.]+)',  # Just $150 (anywhere in section)
-            ]
-            
-            # First try in the section
-            for pattern in cost_patterns:
-                part_cost_match = re.search(pattern, section, re.IGNORECASE)
-                if part_cost_match:
-                    try:
-                        cost_str = part_cost_match.group(1).strip()
-                        part_cost = float(cost_str)
-                        if part_cost > 0:  # Valid cost found
-                            break
-                    except (ValueError, AttributeError):
-                        continue
-            
-            # If not found in section, try in the full content near the part number
-            if not part_cost and part_number:
-                # Look for cost near the part number (within 300 chars)
-                part_num_pos = content.find(part_number)
-                if part_num_pos != -1:
-                    nearby_text = content[max(0, part_num_pos-150):part_num_pos+300]
-                    for pattern in cost_patterns:
-                        part_cost_match = re.search(pattern, nearby_text, re.IGNORECASE)
-                        if part_cost_match:
-                            try:
-                                cost_str = part_cost_match.group(1).strip()
-                                part_cost = float(cost_str)
-                                if part_cost > 0:
-                                    break
-                            except (ValueError, AttributeError):
-                                continue
-                    
-                    # Last resort: find any dollar amount in nearby text
-                    if not part_cost:
-                        dollar_matches = re.findall(r'\$(\d+(?:\.\d{2})?)', nearby_text)
-                        for amt_str in dollar_matches:
-                            try:
-                                amt = float(amt_str)
-                                if 1 <= amt <= 10000:  # Reasonable range
-                                    part_cost = amt
-                                    break
-                            except ValueError:
-                                continue
-            
-            # Allow part to be added even if cost is missing (we'll try to extract it later)
-            if part_name and part_number:
-                parts.append({
-                    "name": part_name,
-                    "part_number": part_number,
-                    "price": part_cost if part_cost and part_cost > 0 else 0.0  # Default to 0.0 if not found
-                })
-        
-        # If no parts found with the block pattern, try the old single-part method
-        if not parts:
-            part_name = None
-            part_number = None
-            part_cost = None
-            
-            # Look for Part Required (more flexible pattern)
-            part_name_pattern = r'(?:\*\*)?Part Required(?:\*\*)?[:\s]+([^\n]+)'
-            part_name_match = re.search(part_name_pattern, content, re.IGNORECASE)
-            if part_name_match:
-                part_name = part_name_match.group(1).strip()
-                # Clean up markdown formatting
-                part_name = re.sub(r'\*\*', '', part_name).strip()
-            
-            # Look for Part Number (more flexible pattern)
-            part_num_pattern = r'(?:\*\*)?Part Number(?:\*\*)?[:\s]+([^\n]+)'
-            part_num_match = re.search(part_num_pattern, content, re.IGNORECASE)
-            if part_num_match:
-                part_number = part_num_match.group(1).strip()
-                # Clean up markdown formatting
-                part_number = re.sub(r'\*\*', '', part_number).strip()
-            
-            # Try multiple cost patterns - search in full content
-            part_cost = None
-            cost_patterns = [
-                r'(?:\*\*)?Cost(?:\*\*)?[:\s]+\$?\s*([\d.]+)',  # Cost: $150 or Cost: 150
-                r'Cost[:\s]+\$([\d.]+)',  # Cost: $150
-                r'Cost[:\s]+([\d.]+)',  # Cost: 150
-            ]
-            
-            # Try in full content
-            for pattern in cost_patterns:
-                part_cost_match = re.search(pattern, content, re.IGNORECASE)
-                if part_cost_match:
-                    try:
-                        cost_str = part_cost_match.group(1).strip()
-                        part_cost = float(cost_str)
-                        if part_cost > 0:  # Valid cost found
-                            break
-                    except (ValueError, AttributeError):
-                        continue
-            
-            # If still not found and we have part number, look near it
-            if not part_cost and part_number:
-                part_num_pos = content.find(part_number)
-                if part_num_pos != -1:
-                    nearby_text = content[max(0, part_num_pos-100):part_num_pos+200]
-                    for pattern in cost_patterns:
-                        part_cost_match = re.search(pattern, nearby_text, re.IGNORECASE)
-                        if part_cost_match:
-                            try:
-                                cost_str = part_cost_match.group(1).strip()
-                                part_cost = float(cost_str)
-                                if part_cost > 0:
-                                    break
-                            except (ValueError, AttributeError):
-                                continue
-            
-            # Allow part to be added even if cost is missing (we'll try to extract it later)
-            if part_name and part_number:
-                parts.append({
-                    "name": part_name,
-                    "part_number": part_number,
-                    "price": part_cost if part_cost and part_cost > 0 else 0.0  # Default to 0.0 if not found
-                })
-        
-        # Check for the text pattern about ordering the part
-        order_text_patterns = [
-            r'If you want to order the part',
-            r'Would you like assistance.*?ordering.*?part',
-            r'order the part.*?book.*?technician',
-            r'order.*?technician.*?bring.*?install'
-        ]
-        has_order_text = any(re.search(pattern, content, re.IGNORECASE | re.DOTALL) for pattern in order_text_patterns)
+        # Parts are parsed once when the message is created (see StateManager.add_message)
+        order_parts = StateManager.get_message_order_parts(message)
+        parts = order_parts["parts"]
+        has_order_text = order_parts["has_order_text"]
         
         # Show buttons if we have parts OR the order text pattern
         should_show_buttons = len(parts) > 0 or has_order_text
@@ -1348,121 +1245,33 @@ How would you like to proceed?"""
             
             # Show buttons if we have a selected part OR if we have order text (fallback)
             if selected_part or has_order_text:
+                appliance = StateManager.get_appliance()
+                appliance_fields = {
+                    "appliance_type": appliance.appliance_type if appliance else None,
+                    "brand": appliance.brand if appliance else None,
+                    "model": appliance.model if appliance else None
+                }
                 col1, col2 = st.columns(2)
                 
                 with col1:
                     button_key = f"order_part_confirm_{message_idx}"
                     if st.button("📦 Order Part Confirm", key=button_key, use_container_width=True, type="primary"):
                         if selected_part:
-                            # Store the part info
-                            appliance = StateManager.get_appliance()
-                            part_price = selected_part["price"]
-                            
-                            # If price is 0.0, try one more time to extract from content
-                            if part_price == 0.0 or part_price is None:
-                                # First try standard cost patterns
-                                cost_patterns = [
-                                    r'(?:\*\*)?Cost(?:\*\*)?[:\s]+\$?\s*([\d.]+)',
-                                    r'Cost[:\s]+\$([\d.]+)',
-                                    r'Cost[:\s]+([\d.]+)',
-                                ]
-                                for pattern in cost_patterns:
-                                    cost_match = re.search(pattern, content, re.IGNORECASE)
-                                    if cost_match:
-                                        try:
-                                            cost_str = cost_match.group(1).strip()
-                                            extracted_cost = float(cost_str)
-                                            if extracted_cost > 0:
-                                                part_price = extracted_cost
-                                                break
-                                        except (ValueError, AttributeError):
-                                            continue
-                                
-                                # If still not found, look for any dollar amount near the part number
-                                if (part_price == 0.0 or part_price is None) and selected_part.get("part_number"):
-                                    part_num = selected_part["part_number"]
-                                    part_num_pos = content.find(part_num)
-                                    if part_num_pos != -1:
-                                        # Look in a 300 character window around the part number
-                                        search_window = content[max(0, part_num_pos-150):part_num_pos+300]
-                                        # Find all dollar amounts in this window
-                                        dollar_amounts = re.findall(r'\$(\d+(?:\.\d{2})?)', search_window)
-                                        if dollar_amounts:
-                                            # Take the first reasonable dollar amount (between $1 and $10000)
-                                            for amt_str in dollar_amounts:
-                                                try:
-                                                    amt = float(amt_str)
-                                                    if 1 <= amt <= 10000:
-                                                        part_price = amt
-                                                        break
-                                                except ValueError:
-                                                    continue
-                            
-                            part_data = {
+                            # Store the part to be ordered
+                            st.session_state.current_order_part = {
                                 "name": selected_part["name"],
                                 "part_number": selected_part["part_number"],
-                                "price": part_price if part_price and part_price > 0 else 0.0,
-                                "appliance_type": appliance.appliance_type if appliance else None,
-                                "brand": appliance.brand if appliance else None,
-                                "model": appliance.model if appliance else None
+                                "price": selected_part["order_price"],
+                                **appliance_fields
                             }
-                            # Store the part to be ordered
-                            st.session_state.current_order_part = part_data
                             # Initialize part ordering flow
                             StateManager.set_current_flow(StateManager.FLOW_PART_ORDERING)
                             st.session_state.order_step = "address_confirmation"
                             StateManager.add_message("user", f"I want to order the {selected_part['name']}")
                             StateManager.add_message("assistant", f"Excellent! I'll help you order **{selected_part['name']}** (Part #: {selected_part['part_number']}). Let's proceed with your order details.")
                         else:
-                            # Fallback: order text detected but part not parsed - try to extract from content
-                            appliance = StateManager.get_appliance()
-                            # Try one more time with more lenient extraction
-                            fallback_part_name = None
-                            fallback_part_number = None
-                            fallback_part_cost = None
-                            
-                            # Try to find part info anywhere in content (more lenient patterns)
-                            part_name_match = re.search(r'Part Required[:\s]+([^\n]+)', content, re.IGNORECASE)
-                            part_num_match = re.search(r'Part Number[:\s]+([^\n]+)', content, re.IGNORECASE)
-                            
-                            if part_name_match:
-                                fallback_part_name = part_name_match.group(1).strip()
-                                # Clean markdown
-                                fallback_part_name = re.sub(r'\*\*', '', fallback_part_name).strip()
-                            if part_num_match:
-                                fallback_part_number = part_num_match.group(1).strip()
-                                # Clean markdown
-                                fallback_part_number = re.sub(r'\*\*', '', fallback_part_number).strip()
-                            
-                            # Try multiple cost patterns
-                            fallback_part_cost = None
-                            cost_patterns = [
-                                r'Cost[:\s]+\$?\s*([\d.]+)',  # Cost: $150 or Cost: 150
-                                r'Cost[:\s]+\$([\d.]+)',  # Cost: $150
-                                r'\$\s*([\d.]+)',  # Just $150
-                                r'Cost[:\s]+([\d.]+)',  # Cost: 150
-                            ]
-                            
-                            for pattern in cost_patterns:
-                                part_cost_match = re.search(pattern, content, re.IGNORECASE)
-                                if part_cost_match:
-                                    try:
-                                        cost_str = part_cost_match.group(1).strip()
-                                        fallback_part_cost = float(cost_str)
-                                        if fallback_part_cost > 0:  # Valid cost found
-                                            break
-                                    except (ValueError, AttributeError):
-                                        continue
-                            
-                            # Create part data even if incomplete
-                            part_data = {
-                                "name": fallback_part_name or "Replacement Part",
-                                "part_number": fallback_part_number or "TBD",
-                                "price": fallback_part_cost or 0.0,
-                                "appliance_type": appliance.appliance_type if appliance else None,
-                                "brand": appliance.brand if appliance else None,
-                                "model": appliance.model if appliance else None
-                            }
+                            # Fallback: order text detected but no complete part block
+                            part_data = {**order_parts["fallback_part"], **appliance_fields}
                             st.session_state.current_order_part = part_data
                             StateManager.add_message("user", "I want to order the part")
                             StateManager.add_message("assistant", f"I'll help you order **{part_data['name']}**. Let's proceed with your order details.")
@@ -1474,18 +1283,13 @@ How would you like to proceed?"""
                     button_key2 = f"book_technician_order_part_{message_idx}"
                     if st.button("📦 Book Technician + Order Part", key=button_key2, use_container_width=True):
                         if selected_part:
-                            # Store the part info
-                            appliance = StateManager.get_appliance()
-                            part_data = {
+                            # Store part and mark as combined flow (order + booking)
+                            st.session_state.current_order_part = {
                                 "name": selected_part["name"],
                                 "part_number": selected_part["part_number"],
                                 "price": selected_part["price"],
-                                "appliance_type": appliance.appliance_type if appliance else None,
-                                "brand": appliance.brand if appliance else None,
-                                "model": appliance.model if appliance else None
+                                **appliance_fields
                             }
-                            # Store part and mark as combined flow (order + booking)
-                            st.session_state.current_order_part = part_data
                             st.session_state.combined_order_booking = True  # Flag for combined flow
                             # Start with part ordering flow
                             StateManager.set_current_flow(StateManager.FLOW_PART_ORDERING)
@@ -1493,36 +1297,8 @@ How would you like to proceed?"""
                             StateManager.add_message("user", f"I want to order the {selected_part['name']} and book a technician")
                             StateManager.add_message("assistant", f"Perfect! I'll help you order **{selected_part['name']}** (Part #: {selected_part['part_number']}, Cost: ${selected_part['price']:.2f}) and book a technician. Let's start with your order details.")
                         else:
-                            # Fallback: order text detected but part not parsed
-                            appliance = StateManager.get_appliance()
-                            # Try to extract part info from content
-                            fallback_part_name = None
-                            fallback_part_number = None
-                            fallback_part_cost = None
-                            
-                            part_name_match = re.search(r'Part Required[:\s]+([^\n]+)', content, re.IGNORECASE)
-                            part_num_match = re.search(r'Part Number[:\s]+([^\n]+)', content, re.IGNORECASE)
-                            part_cost_match = re.search(r'Cost[:\s]+\$?([\d.]+)', content, re.IGNORECASE)
-                            
-                            if part_name_match:
-                                fallback_part_name = re.sub(r'\*\*', '', part_name_match.group(1)).strip()
-                            if part_num_match:
-                                fallback_part_number = re.sub(r'\*\*', '', part_num_match.group(1)).strip()
-                            if part_cost_match:
-                                try:
-                                    fallback_part_cost = float(part_cost_match.group(1).strip())
-                                except ValueError:
-                                    pass
-                            
-                            part_data = {
-                                "name": fallback_part_name or "Replacement Part",
-                                "part_number": fallback_part_number or "TBD",
-                                "price": fallback_part_cost or 0.0,
-                                "appliance_type": appliance.appliance_type if appliance else None,
-                                "brand": appliance.brand if appliance else None,
-                                "model": appliance.model if appliance else None
-                            }
-                            st.session_state.current_order_part = part_data
+                            # Fallback: order text detected but no complete part block
+                            st.session_state.current_order_part = {**order_parts["fallback_part"], **appliance_fields}
                             st.session_state.combined_order_booking = True
                             StateManager.set_current_flow(StateManager.FLOW_PART_ORDERING)
                             st.session_state.order_step = "address_confirmation"
@@ -1553,7 +1329,7 @@ How would you like to proceed?"""
                 StateManager.add_message("assistant", response)
                 st.rerun()
     
-    def _process_troubleshooting_input(self, user_input: str) -> str:
+    def _process_troubleshooting_input(self, user_input: str) -> Union[str, Iterator[str]]:
         """Process input during troubleshooting flow"""
         # Check if user wants to book technician
         if any(kw in user_input.lower() for kw in ["book", "technician", "repair", "schedule", "stop"]):
@@ -1563,15 +1339,12 @@ How would you like to proceed?"""
         # Continue troubleshooting conversation
         appliance = StateManager.get_appliance()
         issue = StateManager.get_problem_description()
-        conversation_history = StateManager.get_messages()
         
-        guidance = self.flow_orchestrator.get_troubleshooting_guidance(
+        return self.flow_orchestrator.stream_troubleshooting_guidance(
             appliance=appliance,
             issue=issue,
-            conversation_history=conversation_history
+            conversation_summary=StateManager.get_conversation_summary()
         )
-        
-        return guidance
     
     def _handle_troubleshooting_flow(self):
         """Handle troubleshooting flow"""
@@ -1585,12 +1358,14 @@ How would you like to proceed?"""
             # This ensures parts selection will appear AFTER troubleshooting guidance
             st.session_state.parts_selection_shown_after_troubleshooting = False
             
-            # Get initial troubleshooting guidance
-            guidance = self.flow_orchestrator.get_troubleshooting_guidance(
-                appliance=appliance,
-                issue=issue,
-                conversation_history=[]
-            )
+            # Stream initial troubleshooting guidance into the chat as it is generated
+            with st.chat_message("assistant"):
+                guidance = st.write_stream(
+                    self.flow_orchestrator.stream_troubleshooting_guidance(
+                        appliance=appliance,
+                        issue=issue
+                    )
+                ).strip()
             
             StateManager.add_message("assistant", guidance)
             st.rerun()
@@ -1599,11 +1374,10 @@ How would you like to proceed?"""
         """Start the booking flow"""
         # Summarize issue
         appliance = StateManager.get_appliance()
-        conversation_history = StateManager.get_messages()
         
         issue_summary = self.flow_orchestrator.summarize_issue(
             appliance=appliance,
-            conversation_history=conversation_history
+            conversation_summary=StateManager.get_conversation_summary()
         )
         
         StateManager.set_issue_summary(issue_summary)
@@ -1980,14 +1754,9 @@ Email: {default_address['email']}
 You will be shown 3 available time slots: 1 slot before part arrival (with a warning) and 2 slots after part arrival. We recommend selecting a slot after the part arrives to ensure the technician has the part available for installation.
             """)
             
-            # Display time slot selector with date validation
-            time_slot = self._display_time_slot_selector_with_validation(technician, delivery_date)
-            
-            if time_slot:
-                # Allow any selected slot (user has been warned if it's before part arrival)
-                st.session_state.time_slot = time_slot
-                st.session_state.order_step = "combined_confirmation"
-                st.rerun()
+            # Display time slot selector with date validation; selecting a slot
+            # moves on to the combined confirmation step
+            self._display_time_slot_selector_with_validation(technician, delivery_date)
         
         elif order_step == "combined_confirmation":
             # Combined flow: Final confirmation with order + booking
@@ -2220,8 +1989,14 @@ Thank you for your order! If you have any questions, please don't hesitate to co
             StateManager.set_current_flow(StateManager.FLOW_TROUBLESHOOTING)
             st.rerun()
     
-    def _display_time_slot_selector_with_validation(self, technician: Technician, part_arrival_date: datetime) -> Optional[dict]:
-        """Display time slot selector showing exactly 3 slots: 1 before and 2 after part arrival date"""
+    def _display_time_slot_selector_with_validation(self, technician: Technician, part_arrival_date: datetime):
+        """
+        Display time slot selector showing exactly 3 slots: 1 before and 2 after part arrival date
+        
+        Selecting a slot stores it and moves straight to the combined
+        confirmation step with a single rerun (any slot is allowed; the user
+        has been warned if it is before part arrival).
+        """
         from datetime import timedelta
         
         # Generate exactly 3 time slots
@@ -2320,7 +2095,7 @@ Thank you for your order! If you have any questions, please don't hesitate to co
         
         if len(slots_to_show) < 3:
             st.warning(f"Insufficient time slots available. Please contact support.")
-            return None
+            return
         
         # Display slots with warnings
         st.markdown("### Select Time Slot")
@@ -2359,30 +2134,19 @@ Thank you for your order! If you have any questions, please don't hesitate to co
                 button_disabled = is_selected
                 if st.button(button_label, key=f"slot_select_{idx}", use_container_width=True, disabled=button_disabled):
                     st.session_state.combined_selected_slot_idx = idx
-                    selected_slot = slot
+                    st.session_state.time_slot = slot
+                    st.session_state.order_step = "combined_confirmation"
                     st.rerun()
-        
-        # Return selected slot if one is chosen
-        if selected_slot:
-            return selected_slot
-        
-        return None
     
     def _generate_tracking_id(self) -> str:
         """Generate a unique tracking ID for the order"""
-        import random
-        import string
-        # Format: TRK-XXXXXX (6 alphanumeric characters)
-        random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        return f"TRK-{random_part}"
+        # Format: TRK-XXXXXXXXXXXXX (13 time-ordered base32 characters)
+        return IdGenerator.default().next_id("TRK-")
     
     def _generate_dispatch_tracking_id(self) -> str:
         """Generate a unique dispatch tracking ID for technician booking"""
-        import random
-        import string
-        # Format: DSP-XXXXXX (6 alphanumeric characters)
-        random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        return f"DSP-{random_part}"
+        # Format: DSP-XXXXXXXXXXXXX (13 time-ordered base32 characters)
+        return IdGenerator.default().next_id("DSP-")
 
 
 def main():
@@ -36,6 +36,7 @@ class Problem:
     category: str  # "SIMPLE" or "COMPLEX"
     troubleshooting_steps: List[str]
     parts: List[Part]
+    appliance_type: Optional[str] = None  # e.g., "Refrigerator"; None applies to any type
     
     def to_dict(self) -> dict:
         """Convert to dictionary"""
@@ -45,7 +46,8 @@ class Problem:
             "keywords": self.keywords,
             "category": self.category,
             "troubleshooting_steps": self.troubleshooting_steps,
-            "parts": [part.to_dict() for part in self.parts]
+            "parts": [part.to_dict() for part in self.parts],
+            "appliance_type": self.appliance_type
         }
     
     @classmethod
@@ -57,13 +59,20 @@ class Problem:
             keywords=data.get("keywords", []),
             category=data.get("category", "COMPLEX"),
             troubleshooting_steps=data.get("troubleshooting_steps", []),
-            parts=[Part.from_dict(p) for p in data.get("parts", [])]
+            parts=[Part.from_dict(p) for p in data.get("parts", [])],
+            appliance_type=data.get("appliance_type")
         )
     
     def is_simple(self) -> bool:
         """Check if problem is simple (self-fixable)"""
         return self.category == "SIMPLE"
     
+    def applies_to(self, appliance_type: Optional[str]) -> bool:
+        """Check if problem applies to an appliance type (any type when either is unknown)"""
+        if not self.appliance_type or not appliance_type:
+            return True
+        return self.appliance_type.lower() == appliance_type.strip().lower()
+    
     def has_parts(self) -> bool:
         """Check if problem requires parts"""
         return len(self.parts) > 0
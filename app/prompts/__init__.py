@@ -5,7 +5,8 @@ from .appliance_prompts import (
 )
 from .troubleshooting_prompts import (
     TROUBLESHOOTING_GUIDE_PROMPT,
-    ISSUE_SUMMARIZATION_PROMPT
+    ISSUE_SUMMARIZATION_PROMPT,
+    CURATED_STEPS_PROMPT
 )
 from .booking_prompts import (
     ISSUE_LISTING_PROMPT
@@ -16,6 +17,7 @@ __all__ = [
     "APPLIANCE_CONFIRMATION_PROMPT",
     "TROUBLESHOOTING_GUIDE_PROMPT",
     "ISSUE_SUMMARIZATION_PROMPT",
+    "CURATED_STEPS_PROMPT",
     "ISSUE_LISTING_PROMPT"
 ]
 
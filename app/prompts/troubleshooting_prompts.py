@@ -53,3 +53,27 @@ Create a clear, concise summary of the issue that will help a technician underst
 4. Current status
 
 Keep it professional and informative (2-3 sentences)."""
+
+CURATED_STEPS_PROMPT = """You are an expert appliance repair technician helping a customer with a common, simple problem.
+
+Appliance Details:
+- Type: {appliance_type}
+- Brand: {brand}
+- Model: {model}
+- Issue: {issue_description}
+
+Verified troubleshooting steps for this problem:
+{steps}
+
+Rewrite these steps as friendly, clear guidance for the customer.
+
+Guidelines:
+1. Keep every step, in the same order, and do not add new steps
+2. Keep all safety instructions
+3. Do not mention parts, part numbers or costs
+4. Ask if the issue is resolved at the end
+
+Format your response as:
+1. Step 1: [Description]
+2. Step 2: [Description]
+..."""
@@ -1,11 +1,15 @@
 from .knowledge_base_repository import KnowledgeBaseRepository
+from .booking_index import BookingIndex
 from .booking_repository import BookingRepository
+from .sqlite_booking_repository import SqliteBookingRepository
 from .technician_repository import TechnicianRepository
 from .common_issues_repository import CommonIssuesRepository
 
 __all__ = [
     "KnowledgeBaseRepository",
+    "BookingIndex",
     "BookingRepository",
+    "SqliteBookingRepository",
     "TechnicianRepository",
     "CommonIssuesRepository"
 ]
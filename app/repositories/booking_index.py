@@ -0,0 +1,109 @@
+"""In-memory secondary indexes over booking records"""
+import re
+import threading
+from bisect import bisect_left, insort
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+
+NON_DIGIT_PATTERN = re.compile(r'\D')
+
+
+class BookingIndex:
+    """
+    Secondary indexes for booking lookups by technician, customer phone and day.
+    
+    Each index maps a key to a list of (slot datetime, booking_id) kept
+    sorted, so a key lookup is a dict access and a date range within it is
+    two binary searches. Records are added one at a time as they are
+    appended; re-adding a booking_id replaces its previous entries. Lookups
+    return only the requested page of IDs.
+    """
+    
+    def __init__(self):
+        self._by_technician: Dict[str, List[Tuple[str, str]]] = {}
+        self._by_phone: Dict[str, List[Tuple[str, str]]] = {}
+        self._by_day: Dict[str, List[Tuple[str, str]]] = {}
+        self._keys: Dict[str, Tuple[Optional[str], Optional[str], Optional[str], str]] = {}
+        self._lock = threading.Lock()
+    
+    def add(self, record: dict):
+        """Index a booking record, replacing an older version of it"""
+        booking_id = record["booking_id"]
+        slot = self.slot_key(record)
+        keys = (
+            record.get("technician_id"),
+            self.normalize_phone(record.get("customer", {}).get("phone")),
+            slot[:10] or None,
+            slot
+        )
+        
+        with self._lock:
+            if booking_id in self._keys:
+                self._remove(booking_id)
+            for index, key in zip(self._indexes(), keys):
+                if key:
+                    insort(index.setdefault(key, []), (slot, booking_id))
+            self._keys[booking_id] = keys
+    
+    def technician_ids(
+        self,
+        technician_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> List[str]:
+        """Get a page of a technician's booking IDs by slot time, within [start, end)"""
+        with self._lock:
+            entries = self._by_technician.get(technician_id, [])
+            low = bisect_left(entries, (start.isoformat(), "")) if start else 0
+            high = bisect_left(entries, (end.isoformat(), "")) if end else len(entries)
+            return self._page(entries, low, high, offset, limit)
+    
+    def phone_ids(self, phone: str, offset: int = 0, limit: Optional[int] = None) -> List[str]:
+        """Get a page of booking IDs for a customer phone number by slot time"""
+        with self._lock:
+            entries = self._by_phone.get(self.normalize_phone(phone), [])
+            return self._page(entries, 0, len(entries), offset, limit)
+    
+    def day_ids(self, day: date, offset: int = 0, limit: Optional[int] = None) -> List[str]:
+        """Get a page of booking IDs with a slot on a day, by slot time"""
+        with self._lock:
+            entries = self._by_day.get(day.isoformat(), [])
+            return self._page(entries, 0, len(entries), offset, limit)
+    
+    @staticmethod
+    def slot_key(record: dict) -> str:
+        """Get the ISO slot datetime of a record ("" if it has none)"""
+        return record.get("time_slot", {}).get("datetime") or ""
+    
+    @staticmethod
+    def normalize_phone(phone: Optional[str]) -> Optional[str]:
+        """Reduce a phone number to its digits, so formatting does not matter"""
+        return NON_DIGIT_PATTERN.sub('', phone) or None if phone else None
+    
+    @staticmethod
+    def _page(entries: List[Tuple[str, str]], low: int, high: int, offset: int, limit: Optional[int]) -> List[str]:
+        """Get the booking IDs of entries[low:high] after offset, at most limit"""
+        start = min(low + offset, high)
+        stop = high if limit is None else min(start + limit, high)
+        return [booking_id for _, booking_id in entries[start:stop]]
+    
+    def _indexes(self) -> Tuple[Dict[str, List[Tuple[str, str]]], ...]:
+        """The indexes, in the order of the keys stored per booking"""
+        return self._by_technician, self._by_phone, self._by_day
+    
+    def _remove(self, booking_id: str):
+        """Drop the entries of a booking (caller holds the lock)"""
+        keys = self._keys.pop(booking_id)
+        entry = (keys[3], booking_id)
+        for index, key in zip(self._indexes(), keys):
+            entries = index.get(key)
+            if not entries:
+                continue
+            position = bisect_left(entries, entry)
+            if position < len(entries) and entries[position] == entry:
+                del entries[position]
+                if not entries:
+                    del index[key]
@@ -1,53 +1,493 @@
+"""Repository for booking data: an append-only log compacted into a snapshot"""
+import atexit
 import json
-import uuid
-from typing import List
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime
+from config import BOOKING_LOG_MAX_BATCH, BOOKING_LOG_COMPACT_THRESHOLD, BOOKING_LOG_FSYNC_INTERVAL_SECONDS
 from app.models.booking import Booking
+from app.repositories.booking_index import BookingIndex
+from app.utils.file_lock import FileLock
+from app.utils.id_generator import IdGenerator
+
+
+class _PendingWrite:
+    """A save waiting for its group commit"""
+    
+    def __init__(self, record: dict, line: str):
+        self.record = record
+        self.line = line
+        self.done = threading.Event()
+        self.error: Optional[Exception] = None
 
 
 class BookingRepository:
-    """Repository for managing booking data"""
+    """
+    Repository for managing booking data.
     
-    def __init__(self, file_path: str = "data/bookings.json"):
-        self.file_path = Path(file_path)
-        self._ensure_file_exists()
+    Saving a booking appends one JSON line to a log file (bookings.log.jsonl
+    next to the snapshot), so a save costs the same regardless of how many
+    bookings exist. Saves from all session threads go through one writer
+    thread, which commits whatever has queued up as a group: one write and
+    one fsync for the whole batch. save() returns once its record is on
+    disk. With an fsync_interval the log is fsynced at most that often
+    instead (and when the writer goes idle or the log is closed): save()
+    then returns once the OS has the record, which survives a crash of the
+    app but not a power loss within the interval.
     
-    def _ensure_file_exists(self):
-        """Ensure bookings file exists, create if it doesn't"""
-        if not self.file_path.exists():
-            with open(self.file_path, "w", encoding="utf-8") as f:
-                json.dump([], f)
+    Writers and compaction hold an advisory file lock (bookings.lock), so
+    several processes can share the files. Once the log holds
+    compact_threshold records it is rotated and merged into the
+    bookings.json snapshot in the background; the snapshot is replaced
+    atomically (temp file + rename).
+    
+    The first read loads the snapshot and replays the log into memory.
+    Later reads stat both files; if they changed, they take the lock and
+    replay only what other processes appended to the log since (tracked by
+    byte offset), or reload everything if the log was rotated or the
+    snapshot replaced by another process. The load
+    builds a BookingIndex by technician, customer phone and slot day, which
+    each commit then extends; the by_* queries return one page and the
+    iter_by_* variants stream bookings without building a list.
+    """
+    
+    def __init__(
+        self,
+        file_path: str = "data/bookings.json",
+        max_batch: int = BOOKING_LOG_MAX_BATCH,
+        compact_threshold: int = BOOKING_LOG_COMPACT_THRESHOLD,
+        fsync_interval: float = BOOKING_LOG_FSYNC_INTERVAL_SECONDS
+    ):
+        """
+        Initialize repository
+        
+        Args:
+            file_path: Snapshot file (JSON array of bookings)
+            max_batch: Most saves committed by one write + fsync
+            compact_threshold: Log records that trigger a background compaction
+            fsync_interval: Seconds between log fsyncs (0 fsyncs every group commit)
+        """
+        self.file_path = Path(file_path)
+        self.log_path = self.file_path.with_suffix(".log.jsonl")
+        self.compacting_path = self.file_path.with_suffix(".log.compacting.jsonl")
+        self.max_batch = max_batch
+        self.compact_threshold = compact_threshold
+        self.fsync_interval = fsync_interval
+        
+        self._records: Optional[Dict[str, dict]] = None
+        self._index: Optional[BookingIndex] = None
+        self._snapshot_inode: Optional[int] = None
+        self._log_inode: Optional[int] = None
+        self._log_offset = 0
+        self._log_file = None
+        self._log_records = 0
+        self._unsynced_since: Optional[float] = None
+        self._compaction_pending = False
+        self._lock = FileLock(self.file_path.with_suffix(".lock"))
+        self._compaction_lock = FileLock(self.file_path.with_suffix(".compact.lock"))
+        
+        self._queue: Deque[_PendingWrite] = deque()
+        self._queue_cv = threading.Condition()
+        self._writer: Optional[threading.Thread] = None
+        self._compactor: Optional[threading.Thread] = None
+        self._closed = False
+        atexit.register(self.close)
     
     def save(self, booking: Booking) -> None:
-        """Save a booking to file"""
-        bookings = self.load_all()
-        bookings.append(booking)
+        """Append a booking to the log, returning once it is on disk"""
+        record = booking.to_dict()
+        pending = _PendingWrite(record, json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n")
         
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            json.dump([b.to_dict() for b in bookings], f, indent=2)
+        with self._queue_cv:
+            if self._closed:
+                raise RuntimeError("BookingRepository is closed")
+            self._queue.append(pending)
+            self._start_writer()
+            self._queue_cv.notify()
+        
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
     
     def load_all(self) -> List[Booking]:
-        """Load all bookings from file"""
+        """Load all bookings"""
+        return [Booking.from_dict(record) for record in self._get_records().values()]
+    
+    def iter_all(self) -> Iterator[Booking]:
+        """Iterate over all bookings without building the whole list"""
+        for record in list(self._get_records().values()):
+            yield Booking.from_dict(record)
+    
+    def get_by_id(self, booking_id: str) -> Booking | None:
+        """Get a booking by ID"""
+        record = self._get_records().get(booking_id)
+        return Booking.from_dict(record) if record else None
+    
+    def count(self) -> int:
+        """Get the number of bookings"""
+        return len(self._get_records())
+    
+    def by_technician(
+        self,
+        technician_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> List[Booking]:
+        """Get a page of a technician's bookings by slot time, within [start, end)"""
+        return list(self.iter_by_technician(technician_id, start, end, offset, limit))
+    
+    def iter_by_technician(
+        self,
+        technician_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> Iterator[Booking]:
+        """Iterate over a technician's bookings by slot time, within [start, end)"""
+        records = self._get_records()
+        return self._iter_ids(records, self._index.technician_ids(technician_id, start, end, offset, limit))
+    
+    def by_phone(self, phone: str, offset: int = 0, limit: Optional[int] = None) -> List[Booking]:
+        """Get a page of a customer's bookings by slot time (phone formatting is ignored)"""
+        return list(self.iter_by_phone(phone, offset, limit))
+    
+    def iter_by_phone(self, phone: str, offset: int = 0, limit: Optional[int] = None) -> Iterator[Booking]:
+        """Iterate over a customer's bookings by slot time"""
+        records = self._get_records()
+        return self._iter_ids(records, self._index.phone_ids(phone, offset, limit))
+    
+    def by_day(self, day: date, offset: int = 0, limit: Optional[int] = None) -> List[Booking]:
+        """Get a page of the bookings with a slot on a day, by slot time"""
+        return list(self.iter_by_day(day, offset, limit))
+    
+    def iter_by_day(self, day: date, offset: int = 0, limit: Optional[int] = None) -> Iterator[Booking]:
+        """Iterate over the bookings with a slot on a day, by slot time"""
+        records = self._get_records()
+        return self._iter_ids(records, self._index.day_ids(day, offset, limit))
+    
+    def flush(self):
+        """fsync saves not yet on disk (only needed with an fsync interval)"""
+        with self._lock:
+            self._sync_log()
+    
+    def compact(self):
+        """
+        Merge the log into the snapshot
+        
+        The log is rotated under the write lock (a rename), so saves are only
+        blocked for that instant; the merge itself reads both files from
+        disk and replaces the snapshot atomically. A crash mid-way leaves the
+        rotated log in place and it is replayed (and merged) next time. If
+        another process is already compacting, this returns immediately.
+        """
+        if not self._compaction_lock.acquire(blocking=False):
+            return
+        try:
+            with self._lock:
+                self._compaction_pending = False
+                if not self.compacting_path.exists():
+                    if not self.log_path.exists():
+                        return
+                    if self._records is not None:
+                        self._catch_up()
+                    self._close_log_file()
+                    os.replace(self.log_path, self.compacting_path)
+                    self._log_records = 0
+                    self._log_inode = None
+                    self._log_offset = 0
+            
+            records = self._read_snapshot()
+            self._replay(self.compacting_path, records)
+            tmp_path = self._write_snapshot_file(records)
+            
+            # Swap in the snapshot and drop the merged log together, so a
+            # first read (which holds the lock) never sees one without the other
+            with self._lock:
+                os.replace(tmp_path, self.file_path)
+                self.compacting_path.unlink()
+                # Memory already holds these records, so this is not a change to reload for
+                self._snapshot_inode = os.stat(self.file_path).st_ino
+        except (OSError, ValueError) as e:
+            print(f"Warning: booking log compaction failed: {e}")
+        finally:
+            self._compaction_lock.release()
+    
+    def close(self):
+        """Commit queued saves, wait for a running compaction and close the log"""
+        with self._queue_cv:
+            self._closed = True
+            self._queue_cv.notify()
+        for thread in (self._writer, self._compactor):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join()
+        with self._lock:
+            self._close_log_file()
+        # Registered in __init__; unregistering lets a closed repository be freed
+        atexit.unregister(self.close)
+    
+    def _get_records(self) -> Dict[str, dict]:
+        """Get the records, loading them on first read and catching up with other processes after that"""
+        if self._records is not None and not self._files_changed():
+            # Nothing new on disk: skip the (inter-process) lock
+            return self._records
+        
+        with self._lock:
+            if self._records is None:
+                self._load_records()
+            else:
+                self._catch_up()
+            return self._records
+    
+    def _load_records(self):
+        """Load snapshot + logs into memory and index them (caller holds the lock)"""
+        snapshot = self._stat(self.file_path)
+        records = self._read_snapshot()
+        self._replay(self.compacting_path, records)
+        self._log_records, self._log_offset = self._replay(self.log_path, records)
+        log = self._stat(self.log_path)
+        
+        index = BookingIndex()
+        for record in records.values():
+            index.add(record)
+        self._snapshot_inode = snapshot.st_ino if snapshot else None
+        self._log_inode = log.st_ino if log else None
+        self._index = index
+        self._records = records
+    
+    def _files_changed(self) -> bool:
+        """Check whether the snapshot or log differ from what memory was last synced with"""
+        snapshot = self._stat(self.file_path)
+        log = self._stat(self.log_path)
+        return (
+            (snapshot.st_ino if snapshot else None) != self._snapshot_inode
+            or (log.st_ino if log else None) != self._log_inode
+            or (log.st_size if log else 0) != self._log_offset
+        )
+    
+    def _catch_up(self):
+        """Apply the records other processes appended since the last read (caller holds the lock)"""
+        snapshot = self._stat(self.file_path)
+        log = self._stat(self.log_path)
+        if (
+            (snapshot.st_ino if snapshot else None) != self._snapshot_inode
+            or (self._log_inode is not None and (log is None or log.st_ino != self._log_inode))
+            or (log is not None and log.st_size < self._log_offset)
+        ):
+            # Another process compacted or rotated the log: the offset means nothing now
+            self._load_records()
+            return
+        if log is None or log.st_size == self._log_offset:
+            return
+        
+        appended: Dict[str, dict] = {}
+        count, self._log_offset = self._replay(self.log_path, appended, self._log_offset)
+        self._log_inode = log.st_ino
+        self._log_records += count
+        for booking_id, record in appended.items():
+            self._records[booking_id] = record
+            self._index.add(record)
+    
+    @staticmethod
+    def _iter_ids(records: Dict[str, dict], booking_ids: List[str]) -> Iterator[Booking]:
+        """Yield the bookings of a page of IDs from the index"""
+        for booking_id in booking_ids:
+            record = records.get(booking_id)
+            if record is not None:
+                yield Booking.from_dict(record)
+    
+    def _start_writer(self):
+        """Start the writer thread (caller holds the queue lock)"""
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="booking-writer", daemon=True)
+            self._writer.start()
+    
+    def _write_loop(self):
+        """Writer thread: commit queued saves in groups"""
+        while True:
+            with self._queue_cv:
+                while not self._queue and not self._closed:
+                    if self._unsynced_since is None:
+                        self._queue_cv.wait()
+                        continue
+                    # fsync what the last commits left unsynced once the interval is up
+                    sync_in = self._unsynced_since + self.fsync_interval - time.monotonic()
+                    if sync_in <= 0:
+                        break
+                    self._queue_cv.wait(sync_in)
+                if not self._queue and self._closed:
+                    return
+                batch = [self._queue.popleft() for _ in range(min(len(self._queue), self.max_batch))]
+            
+            if not batch:
+                with self._lock:
+                    self._sync_log()
+                continue
+            
+            try:
+                self._commit(batch)
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+            for pending in batch:
+                pending.done.set()
+            
+            if self._compaction_pending and not (self._compactor and self._compactor.is_alive()):
+                self._compactor = threading.Thread(target=self.compact, name="booking-compaction", daemon=True)
+                self._compactor.start()
+    
+    def _commit(self, batch: List[_PendingWrite]):
+        """Append a batch to the log with a single write and (per fsync_interval) fsync"""
+        with self._lock:
+            if self._records is not None:
+                # Other processes' records first, so the offset stays at a record boundary
+                self._catch_up()
+            log_file = self._get_log_file()
+            log_file.write("".join(pending.line for pending in batch))
+            log_file.flush()
+            if self._unsynced_since is None:
+                self._unsynced_since = time.monotonic()
+            if time.monotonic() - self._unsynced_since >= self.fsync_interval:
+                self._sync_log()
+            
+            self._log_records += len(batch)
+            if self._records is not None:
+                stat = os.fstat(log_file.fileno())
+                self._log_offset, self._log_inode = stat.st_size, stat.st_ino
+                for pending in batch:
+                    self._records[pending.record["booking_id"]] = pending.record
+                    self._index.add(pending.record)
+            if self._log_records >= self.compact_threshold and not self._compaction_pending:
+                self._compaction_pending = True
+    
+    def _get_log_file(self):
+        """
+        Open the log for appending (caller holds the lock)
+        
+        Reopens it if another process rotated it since it was opened, and
+        terminates a torn last line left by a crash so the next record starts
+        on a line of its own. The records already in the log are counted, so
+        a process that only writes still triggers compaction.
+        """
+        if self._log_file is not None and not self._is_current_log(self._log_file):
+            self._close_log_file()
+        
+        if self._log_file is None:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            lines = 0
+            torn = False
+            try:
+                with open(self.log_path, "rb") as f:
+                    chunk = b""
+                    for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                        lines += chunk.count(b"\n")
+                    torn = chunk[-1:] not in (b"", b"\n")
+            except FileNotFoundError:
+                pass
+            self._log_file = open(self.log_path, "a", encoding="utf-8")
+            if torn:
+                self._log_file.write("\n")
+            self._log_records = lines
+        return self._log_file
+    
+    def _is_current_log(self, log_file) -> bool:
+        """Check whether an open log is still the file at log_path"""
+        try:
+            return os.fstat(log_file.fileno()).st_ino == os.stat(self.log_path).st_ino
+        except OSError:
+            return False
+    
+    def _sync_log(self):
+        """fsync the log if commits since the last fsync left it unsynced (caller holds the lock)"""
+        if self._log_file is not None and self._unsynced_since is not None:
+            os.fsync(self._log_file.fileno())
+        self._unsynced_since = None
+    
+    def _close_log_file(self):
+        """fsync and close the log (caller holds the lock)"""
+        if self._log_file is not None:
+            self._sync_log()
+            self._log_file.close()
+            self._log_file = None
+    
+    @staticmethod
+    def _stat(path: Path) -> Optional[os.stat_result]:
+        """Stat a file, or None if it does not exist"""
+        try:
+            return os.stat(path)
+        except FileNotFoundError:
+            return None
+    
+    def _read_snapshot(self) -> Dict[str, dict]:
+        """
+        Read the snapshot into an ordered id -> record dict
+        
+        Raises:
+            ValueError: If the snapshot is not valid JSON (never treated as
+                empty, which would let a compaction overwrite it)
+        """
         try:
             with open(self.file_path, "r", encoding="utf-8") as f:
                 data = json.load(f)
-                return [Booking.from_dict(b) for b in data]
         except FileNotFoundError:
-            return []
-        except json.JSONDecodeError:
-            return []
+            return {}
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in bookings snapshot {self.file_path}: {e}")
+        return {record["booking_id"]: record for record in data}
     
-    def get_by_id(self, booking_id: str) -> Booking | None:
-        """Get a booking by ID"""
-        bookings = self.load_all()
-        for booking in bookings:
-            if booking.booking_id == booking_id:
-                return booking
-        return None
+    @staticmethod
+    def _replay(log_path: Path, records: Dict[str, dict], offset: int = 0) -> Tuple[int, int]:
+        """
+        Apply the complete log lines after offset on top of records
+        
+        Returns:
+            Tuple of (records read, offset after the last complete line)
+        """
+        count = 0
+        try:
+            with open(log_path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Torn last line from a crash mid-write; the next
+                        # writer terminates it and it is skipped below then
+                        break
+                    offset += len(line)
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn line from a crash mid-write
+                        continue
+                    if not isinstance(record, dict) or "booking_id" not in record:
+                        continue
+                    records[record["booking_id"]] = record
+                    count += 1
+        except FileNotFoundError:
+            pass
+        return count, offset
+    
+    def _write_snapshot_file(self, records: Dict[str, dict]) -> str:
+        """Write records to a fsynced temp file next to the snapshot and get its path"""
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.file_path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(list(records.values()), f, separators=(",", ":"), ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+        return tmp_path
     
     @staticmethod
     def generate_booking_id() -> str:
-        """Generate a unique booking ID"""
-        return str(uuid.uuid4())[:8].upper()
-
+        """Generate a unique, time-ordered booking ID"""
+        return IdGenerator.default().next_id()
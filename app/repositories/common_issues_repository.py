@@ -1,15 +1,29 @@
 """Repository for common issues data"""
 import json
-from typing import List, Optional
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
 from pathlib import Path
+from config import PRECOMPUTED_ISSUES_MAX_ENTRIES
 
 
 class CommonIssuesRepository:
     """Repository for accessing common issues data"""
     
-    def __init__(self, file_path: str = "data/common_issues.json"):
+    def __init__(
+        self,
+        file_path: str = "data/common_issues.json",
+        precomputed_path: str = "data/precomputed_issues.json",
+        max_precomputed_entries: int = PRECOMPUTED_ISSUES_MAX_ENTRIES
+    ):
         self.file_path = Path(file_path)
+        self.precomputed_path = Path(precomputed_path)
+        self.max_precomputed_entries = max_precomputed_entries
         self._cache: Optional[dict] = None
+        self._precomputed: Optional[dict] = None
+        self._precomputed_lock = threading.Lock()
     
     def load(self) -> dict:
         """Load common issues from file"""
@@ -30,7 +44,103 @@ class CommonIssuesRepository:
         data = self.load()
         return data.get(appliance_type, [])
     
+    def get_precomputed_entry(self, appliance_type: str, brand: str = None, fallback: bool = True) -> Optional[Dict]:
+        """
+        Get the precomputed agent issues for an appliance type and brand
+        
+        Args:
+            appliance_type: Appliance type
+            brand: Brand (None for the brand-independent entry)
+            fallback: Use the brand-independent entry for the type when the
+                brand has not been precomputed (for serving, not for
+                deciding what to regenerate)
+        
+        Returns:
+            Dict with "issues", "brand" and "generated_at" (epoch seconds), or None
+        """
+        if not appliance_type:
+            return None
+        
+        with self._precomputed_lock:
+            entries = self._load_precomputed()
+            entry = entries.get(self._precomputed_key(appliance_type, brand))
+            if entry is None and brand and fallback:
+                entry = entries.get(self._precomputed_key(appliance_type, None))
+            return dict(entry) if entry else None
+    
+    def get_precomputed_issues(self, appliance_type: str, brand: str = None) -> Optional[List[str]]:
+        """Get precomputed agent issues, or None if there are none"""
+        entry = self.get_precomputed_entry(appliance_type, brand)
+        return entry["issues"] if entry else None
+    
+    def is_precomputed_stale(self, appliance_type: str, brand: str = None, max_age_seconds: float = 0) -> bool:
+        """
+        Check whether the entry for exactly this type and brand is missing or
+        older than max_age_seconds (the brand-independent entry does not count)
+        """
+        entry = self.get_precomputed_entry(appliance_type, brand, fallback=False)
+        if not entry:
+            return True
+        return time.time() - entry.get("generated_at", 0) > max_age_seconds
+    
+    def save_precomputed_issues(self, appliance_type: str, brand: Optional[str], issues: List[str]):
+        """Store agent issues for an appliance type and brand (the oldest entries are dropped past the limit)"""
+        with self._precomputed_lock:
+            entries = self._load_precomputed()
+            entries[self._precomputed_key(appliance_type, brand)] = {
+                "appliance_type": appliance_type,
+                "brand": brand or "",
+                "issues": issues,
+                "generated_at": time.time()
+            }
+            if len(entries) > self.max_precomputed_entries:
+                oldest = sorted(entries, key=lambda key: entries[key].get("generated_at", 0))
+                for key in oldest[:len(entries) - self.max_precomputed_entries]:
+                    del entries[key]
+            self._save_precomputed(entries)
+    
+    @staticmethod
+    def _precomputed_key(appliance_type: str, brand: Optional[str]) -> str:
+        """Build the lookup key, ignoring case and surrounding whitespace"""
+        return f"{appliance_type.strip().lower()}|{(brand or '').strip().lower()}"
+    
+    def _load_precomputed(self) -> dict:
+        """Load precomputed issues from file (caller holds the lock)"""
+        if self._precomputed is not None:
+            return self._precomputed
+        
+        self._precomputed = {}
+        if not self.precomputed_path.exists():
+            return self._precomputed
+        
+        try:
+            with open(self.precomputed_path, "r", encoding="utf-8") as f:
+                self._precomputed = json.load(f)
+        except json.JSONDecodeError as e:
+            print(f"Warning: ignoring invalid precomputed issues file: {e}")
+        return self._precomputed
+    
+    def _save_precomputed(self, entries: dict):
+        """Write precomputed issues atomically (caller holds the lock)"""
+        tmp_path = None
+        try:
+            self.precomputed_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.precomputed_path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entries, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.precomputed_path)
+            tmp_path = None
+        except OSError as e:
+            print(f"Warning: could not save precomputed issues: {e}")
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+    
     def clear_cache(self):
         """Clear the cache"""
         self._cache = None
-
+        with self._precomputed_lock:
+            self._precomputed = None
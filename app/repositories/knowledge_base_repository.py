@@ -1,5 +1,6 @@
 import json
-from typing import Dict, List, Optional
+import re
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from app.models.problem import Problem
 
@@ -30,6 +31,33 @@ class KnowledgeBaseRepository:
         data = self.load()
         return [Problem.from_dict(p) for p in data.get("problems", [])]
     
+    def find_best_match(self, text: str, appliance_type: Optional[str] = None) -> Tuple[Optional[Problem], float]:
+        """
+        Find the problem whose keywords best match a free-text issue
+        
+        Only problems for the given appliance type are considered, and
+        keywords must match whole words ("light" does not match "lightly").
+        The score is the number of matched keywords divided by three (capped
+        at 1.0), so three or more matching keywords count as a confident match.
+        
+        Returns:
+            Tuple of (best matching problem or None, score between 0 and 1)
+        """
+        text_lower = (text or "").lower()
+        best_problem, best_hits = None, 0
+        for problem in self.get_problems():
+            if not problem.applies_to(appliance_type):
+                continue
+            hits = sum(1 for keyword in problem.keywords if self._contains_keyword(text_lower, keyword))
+            if hits > best_hits:
+                best_problem, best_hits = problem, hits
+        return best_problem, min(best_hits / 3, 1.0)
+    
+    @staticmethod
+    def _contains_keyword(text_lower: str, keyword: str) -> bool:
+        """Check if a keyword occurs in lowercased text as whole words"""
+        return re.search(rf"\b{re.escape(keyword.lower())}\b", text_lower) is not None
+    
     def get_dangerous_keywords(self) -> List[str]:
         """Get list of dangerous keywords"""
         data = self.load()
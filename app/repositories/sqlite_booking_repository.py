@@ -0,0 +1,226 @@
+"""SQLite repository for booking data"""
+import json
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Optional
+from pathlib import Path
+from app.models.booking import Booking
+from app.repositories.booking_index import BookingIndex
+from app.repositories.booking_repository import BookingRepository
+
+
+class SqliteBookingRepository:
+    """
+    Repository for managing booking data in SQLite.
+    
+    Drop-in alternative to BookingRepository (select it with BOOKING_STORE =
+    "sqlite"). The database runs in WAL mode, so readers on Streamlit session
+    threads do not block each other or the writer; each thread gets its own
+    connection. Each booking is stored as its JSON document plus indexed
+    columns for lookups. On first use, bookings from the JSON store
+    (bookings.json and its log) are migrated once. The by_* queries page
+    with LIMIT/OFFSET and the iter_by_* variants stream rows from the cursor.
+    """
+    
+    SCHEMA_VERSION = 1
+    
+    def __init__(self, db_path: str = "data/bookings.db", legacy_path: Optional[str] = "data/bookings.json"):
+        """
+        Initialize repository
+        
+        Args:
+            db_path: SQLite database file
+            legacy_path: bookings.json snapshot to migrate from (None skips migration)
+        """
+        self.db_path = Path(db_path)
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+    
+    def save(self, booking: Booking) -> None:
+        """Insert or replace a booking"""
+        conn = self._get_connection()
+        with self._write_lock, conn:
+            self._insert(conn, booking.to_dict())
+    
+    def load_all(self) -> List[Booking]:
+        """Load all bookings, oldest first"""
+        return list(self.iter_all())
+    
+    def iter_all(self) -> Iterator[Booking]:
+        """Iterate over all bookings without building the whole list"""
+        cursor = self._get_connection().execute("SELECT data FROM bookings ORDER BY rowid")
+        for (data,) in cursor:
+            yield Booking.from_dict(json.loads(data))
+    
+    def get_by_id(self, booking_id: str) -> Booking | None:
+        """Get a booking by ID"""
+        row = self._get_connection().execute(
+            "SELECT data FROM bookings WHERE booking_id = ?", (booking_id,)
+        ).fetchone()
+        return Booking.from_dict(json.loads(row[0])) if row else None
+    
+    def count(self) -> int:
+        """Get the number of bookings"""
+        return self._get_connection().execute("SELECT COUNT(*) FROM bookings").fetchone()[0]
+    
+    def by_technician(
+        self,
+        technician_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> List[Booking]:
+        """Get a page of a technician's bookings by slot time, within [start, end)"""
+        return list(self.iter_by_technician(technician_id, start, end, offset, limit))
+    
+    def iter_by_technician(
+        self,
+        technician_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> Iterator[Booking]:
+        """Iterate over a technician's bookings by slot time, within [start, end)"""
+        where = "technician_id = ?"
+        params = [technician_id]
+        if start:
+            where += " AND slot_datetime >= ?"
+            params.append(start.isoformat())
+        if end:
+            where += " AND slot_datetime < ?"
+            params.append(end.isoformat())
+        return self._iter_where(where, params, offset, limit)
+    
+    def by_phone(self, phone: str, offset: int = 0, limit: Optional[int] = None) -> List[Booking]:
+        """Get a page of a customer's bookings by slot time (phone formatting is ignored)"""
+        return list(self.iter_by_phone(phone, offset, limit))
+    
+    def iter_by_phone(self, phone: str, offset: int = 0, limit: Optional[int] = None) -> Iterator[Booking]:
+        """Iterate over a customer's bookings by slot time"""
+        return self._iter_where("customer_phone_key = ?", [BookingIndex.normalize_phone(phone)], offset, limit)
+    
+    def by_day(self, day: date, offset: int = 0, limit: Optional[int] = None) -> List[Booking]:
+        """Get a page of the bookings with a slot on a day, by slot time"""
+        return list(self.iter_by_day(day, offset, limit))
+    
+    def iter_by_day(self, day: date, offset: int = 0, limit: Optional[int] = None) -> Iterator[Booking]:
+        """Iterate over the bookings with a slot on a day, by slot time"""
+        params = [day.isoformat(), (day + timedelta(days=1)).isoformat()]
+        return self._iter_where("slot_datetime >= ? AND slot_datetime < ?", params, offset, limit)
+    
+    def flush(self):
+        """Nothing to do: every save is committed"""
+        pass
+    
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+    
+    @staticmethod
+    def generate_booking_id() -> str:
+        """Generate a unique booking ID"""
+        return BookingRepository.generate_booking_id()
+    
+    def _iter_where(self, where: str, params: list, offset: int, limit: Optional[int]) -> Iterator[Booking]:
+        """Stream one page of the bookings matching a WHERE clause, by slot time"""
+        cursor = self._get_connection().execute(
+            f"SELECT data FROM bookings WHERE {where} ORDER BY slot_datetime, booking_id LIMIT ? OFFSET ?",
+            (*params, -1 if limit is None else limit, offset)
+        )
+        for (data,) in cursor:
+            yield Booking.from_dict(json.loads(data))
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, creating the schema on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._ensure_initialized(conn)
+        return conn
+    
+    def _ensure_initialized(self, conn: sqlite3.Connection):
+        """Create the schema and run the one-shot migration"""
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            with self._write_lock, conn:
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version < 1:
+                    self._create_schema(conn)
+                    self._migrate_json(conn)
+                # Later schema changes upgrade older databases here, one step per version
+                if version < self.SCHEMA_VERSION:
+                    conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            self._initialized = True
+    
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection):
+        """Create the bookings table and its indexes"""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS bookings (
+                booking_id TEXT PRIMARY KEY,
+                timestamp TEXT,
+                technician_id TEXT,
+                slot_datetime TEXT,
+                payment_status TEXT,
+                customer_phone TEXT,
+                customer_phone_key TEXT,
+                data TEXT NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_bookings_technician ON bookings (technician_id, slot_datetime)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_bookings_slot ON bookings (slot_datetime)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_bookings_payment_status ON bookings (payment_status)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_bookings_phone ON bookings (customer_phone_key, slot_datetime)")
+    
+    def _migrate_json(self, conn: sqlite3.Connection):
+        """Copy bookings from the JSON store (snapshot + log), if there is one"""
+        if not self.legacy_path:
+            return
+        legacy_repo = BookingRepository(str(self.legacy_path))
+        if not self.legacy_path.exists() and not legacy_repo.log_path.exists():
+            return
+        
+        migrated = 0
+        for booking in legacy_repo.iter_all():
+            self._insert(conn, booking.to_dict())
+            migrated += 1
+        legacy_repo.close()
+        print(f"Migrated {migrated} bookings from {self.legacy_path} to {self.db_path}")
+    
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, record: dict):
+        """Insert or replace one booking record"""
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO bookings
+                (booking_id, timestamp, technician_id, slot_datetime, payment_status,
+                 customer_phone, customer_phone_key, data)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                record["booking_id"],
+                record.get("timestamp"),
+                record.get("technician_id"),
+                record.get("time_slot", {}).get("datetime"),
+                record.get("payment_status"),
+                record.get("customer", {}).get("phone"),
+                BookingIndex.normalize_phone(record.get("customer", {}).get("phone")),
+                json.dumps(record, separators=(",", ":"), ensure_ascii=False)
+            )
+        )
@@ -1,13 +1,29 @@
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, Iterable, Optional, Tuple
+from config import (
+    VISION_CACHE_PATH,
+    VISION_CACHE_MAX_ENTRIES,
+    VISION_CACHE_TTL_SECONDS,
+    VISION_CACHE_MAX_HASH_DISTANCE
+)
 from app.models.appliance import Appliance
 from app.services.openai_service import OpenAIService
+from app.utils.image_utils import ImageUtils
+from app.utils.persistent_cache import PersistentCache
 
 
 class ApplianceService:
     """Service for appliance identification and management"""
     
-    def __init__(self, openai_service: OpenAIService):
+    def __init__(self, openai_service: OpenAIService, vision_cache: Optional[PersistentCache] = None):
         self.openai_service = openai_service
+        if vision_cache is None:
+            vision_cache = PersistentCache(
+                VISION_CACHE_PATH,
+                max_entries=VISION_CACHE_MAX_ENTRIES,
+                ttl_seconds=VISION_CACHE_TTL_SECONDS
+            )
+        self.vision_cache = vision_cache
+        self.near_duplicate_hits = 0
     
     def identify_from_text(self, text: str) -> Dict:
         """Identify appliance from text input"""
@@ -17,13 +33,65 @@ class ApplianceService:
         except Exception as e:
             return {}
     
-    def identify_from_image(self, image_bytes: bytes) -> Tuple[str, Dict]:
-        """Identify appliance from nameplate image"""
+    def identify_from_image(self, image_bytes: bytes, session_image_hashes: Iterable[str] = ()) -> Tuple[str, Dict]:
+        """
+        Identify appliance from nameplate image
+        
+        Results are cached by image content hash, so the same photo uploaded
+        again (by any session, or after a restart) does not trigger another
+        vision call. A re-shot photo of the same label is matched by
+        perceptual hash, but only against photos from the same session
+        (session_image_hashes): labels of one product line look alike, so a
+        match across customers could hand one customer another's appliance.
+        Only the brand and model of a complete earlier reading are reused,
+        never its serial. Failed or empty readings are not cached.
+        """
+        image_hash = ImageUtils.get_image_hash(image_bytes)
+        cached = self.vision_cache.get(image_hash)
+        if cached is not None:
+            return cached["text"], cached["info"]
+        
+        perceptual_hash = ImageUtils.get_perceptual_hash(image_bytes)
+        if perceptual_hash:
+            cached = self._find_near_duplicate(perceptual_hash, session_image_hashes)
+            if cached is not None:
+                return "", {field: cached["info"][field] for field in ("brand", "model")}
+        
         try:
             text_content, info = self.openai_service.read_nameplate_image(image_bytes)
-            return text_content, info
         except Exception as e:
             return "", {}
+        
+        if info:
+            self.vision_cache.set(image_hash, {"text": text_content, "info": info, "perceptual_hash": perceptual_hash})
+        return text_content, info
+    
+    def get_vision_cache_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and size of the vision cache"""
+        stats = self.vision_cache.stats()
+        stats["near_duplicate_hits"] = self.near_duplicate_hits
+        return stats
+    
+    def _find_near_duplicate(self, perceptual_hash: str, image_hashes: Iterable[str]) -> Optional[Dict]:
+        """Get the cached result of a visually near-identical photo (among image_hashes) with a complete reading"""
+        target = int(perceptual_hash, 16)
+        nearest = None
+        nearest_distance = VISION_CACHE_MAX_HASH_DISTANCE + 1
+        for image_hash in set(image_hashes):
+            cached = self.vision_cache.peek(image_hash)
+            other_hash = cached.get("perceptual_hash") if cached else None
+            # Hashes of another size (from an older PERCEPTUAL_HASH_SIZE) are not comparable
+            if not other_hash or len(other_hash) != len(perceptual_hash):
+                continue
+            distance = bin(target ^ int(other_hash, 16)).count("1")
+            if distance < nearest_distance:
+                nearest, nearest_distance = cached, distance
+        
+        if nearest is None or OpenAIService.validate_nameplate_info(nearest["info"]):
+            return None
+        
+        self.near_duplicate_hits += 1
+        return nearest
     
     def update_appliance_info(self, appliance: Appliance, updates: Dict) -> Appliance:
         """Update appliance information with new data"""
@@ -35,6 +103,8 @@ class ApplianceService:
             appliance.serial = updates["serial"]
         if updates.get("age"):
             appliance.age = updates["age"]
+        if updates.get("appliance_type") and not appliance.appliance_type:
+            appliance.appliance_type = updates["appliance_type"]
         return appliance
     
     def format_appliance_summary(self, appliance: Appliance) -> str:
@@ -1,10 +1,61 @@
 """Flow orchestrator using LangChain for managing conversation flows"""
-from typing import Dict, List, Optional
+import asyncio
+import contextlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from config import PRECOMPUTED_ISSUES_MAX_AGE_SECONDS, KB_ROUTING_MIN_SCORE
 from app.agents.appliance_type_agent import ApplianceTypeAgent
 from app.agents.issue_listing_agent import IssueListingAgent
 from app.agents.troubleshooting_agent import TroubleshootingAgent
 from app.agents.summarization_agent import SummarizationAgent
 from app.models.appliance import Appliance
+from app.models.problem import Problem
+from app.repositories.common_issues_repository import CommonIssuesRepository
+from app.repositories.knowledge_base_repository import KnowledgeBaseRepository
+from app.utils.llm_client_registry import LLMClientRegistry
+
+
+class RoutingStats:
+    """Counts how troubleshooting requests were answered and how long they took"""
+    
+    ROUTE_KNOWLEDGE_BASE = "knowledge_base"
+    ROUTE_LLM = "llm"
+    
+    def __init__(self):
+        self._counts = {self.ROUTE_KNOWLEDGE_BASE: 0, self.ROUTE_LLM: 0}
+        self._seconds = {self.ROUTE_KNOWLEDGE_BASE: 0.0, self.ROUTE_LLM: 0.0}
+        self._lock = threading.Lock()
+    
+    def record(self, route: str, seconds: float):
+        """Record one answered request"""
+        with self._lock:
+            self._counts[route] += 1
+            self._seconds[route] += seconds
+    
+    def snapshot(self) -> Dict:
+        """
+        Get the current statistics
+        
+        Latency saved is estimated as the knowledge-base hits times the
+        difference between the average LLM and knowledge-base answer times.
+        """
+        with self._lock:
+            kb_hits = self._counts[self.ROUTE_KNOWLEDGE_BASE]
+            llm_calls = self._counts[self.ROUTE_LLM]
+            avg_kb = self._seconds[self.ROUTE_KNOWLEDGE_BASE] / kb_hits if kb_hits else 0.0
+            avg_llm = self._seconds[self.ROUTE_LLM] / llm_calls if llm_calls else 0.0
+        
+        total = kb_hits + llm_calls
+        return {
+            "kb_hits": kb_hits,
+            "llm_calls": llm_calls,
+            "hit_rate": kb_hits / total if total else 0.0,
+            "avg_kb_seconds": avg_kb,
+            "avg_llm_seconds": avg_llm,
+            "seconds_saved": max(avg_llm - avg_kb, 0.0) * kb_hits if llm_calls else 0.0
+        }
 
 
 class FlowOrchestrator:
@@ -16,13 +67,36 @@ class FlowOrchestrator:
     FLOW_TROUBLESHOOTING = "troubleshooting"
     FLOW_BOOKING = "booking"
     
-    def __init__(self):
-        """Initialize flow orchestrator with agents"""
+    # Category names from the category picker that differ from appliance types
+    CATEGORY_TO_APPLIANCE_TYPE = {
+        "Washer": "Washing Machine",
+        "Range": "Oven"
+    }
+    
+    def __init__(
+        self,
+        client_registry: Optional[LLMClientRegistry] = None,
+        common_issues_repo: Optional[CommonIssuesRepository] = None,
+        knowledge_base_repo: Optional[KnowledgeBaseRepository] = None
+    ):
+        """Initialize flow orchestrator with agents sharing one client registry"""
+        self.common_issues_repo = common_issues_repo or CommonIssuesRepository()
+        self.knowledge_base_repo = knowledge_base_repo or KnowledgeBaseRepository()
+        self.client_registry = None
+        self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="issue-refresh")
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self.routing_stats = RoutingStats()
         try:
-            self.appliance_type_agent = ApplianceTypeAgent()
-            self.issue_listing_agent = IssueListingAgent()
-            self.troubleshooting_agent = TroubleshootingAgent()
-            self.summarization_agent = SummarizationAgent()
+            client_registry = client_registry or LLMClientRegistry()
+            self.client_registry = client_registry
+            self.appliance_type_agent = ApplianceTypeAgent(client_registry=client_registry)
+            self.issue_listing_agent = IssueListingAgent(client_registry=client_registry)
+            self.troubleshooting_agent = TroubleshootingAgent(
+                client_registry=client_registry,
+                knowledge_base_repo=self.knowledge_base_repo
+            )
+            self.summarization_agent = SummarizationAgent(client_registry=client_registry)
         except ValueError as e:
             print(f"Warning: {e}")
             self.appliance_type_agent = None
@@ -47,8 +121,20 @@ class FlowOrchestrator:
             return None
     
     def list_common_issues(self, appliance: Appliance) -> List[str]:
-        """List common issues for appliance type"""
-        if not self.issue_listing_agent or not appliance.appliance_type:
+        """
+        List common issues for appliance type
+        
+        Precomputed lists are served without calling the agent; freshly
+        generated lists are stored so the next session gets them instantly.
+        """
+        if not appliance.appliance_type:
+            return []
+        
+        stored_issues = self._get_stored_issues(appliance.appliance_type, appliance.brand)
+        if stored_issues is not None:
+            return stored_issues
+        
+        if not self.issue_listing_agent:
             return []
         
         try:
@@ -57,38 +143,252 @@ class FlowOrchestrator:
                 brand=appliance.brand,
                 model=appliance.model
             )
+            self._store_issues(appliance.appliance_type, appliance.brand, issues)
+            return issues
+        except Exception as e:
+            print(f"Error listing issues: {e}")
+            return []
+    
+    def _get_stored_issues(self, appliance_type: str, brand: str = None) -> Optional[List[str]]:
+        """Get precomputed issues, scheduling a background refresh if stale"""
+        entry = self.common_issues_repo.get_precomputed_entry(appliance_type, brand)
+        if not entry:
+            return None
+        
+        # Check (and refresh) the entry actually served, which may be the brand-independent one
+        served_brand = entry.get("brand") or None
+        if self.common_issues_repo.is_precomputed_stale(
+            appliance_type, served_brand, PRECOMPUTED_ISSUES_MAX_AGE_SECONDS
+        ):
+            self._schedule_issue_refresh(appliance_type, served_brand)
+        return entry["issues"]
+    
+    def _store_issues(self, appliance_type: str, brand: Optional[str], issues: List[str]):
+        """Save agent issues to the precomputed store in the background, off the request path"""
+        if issues:
+            self._refresh_executor.submit(
+                self.common_issues_repo.save_precomputed_issues, appliance_type, brand, issues
+            )
+    
+    def _schedule_issue_refresh(self, appliance_type: str, brand: Optional[str]):
+        """Regenerate a stale precomputed entry in the background (once at a time per key)"""
+        if not self.issue_listing_agent:
+            return
+        
+        key = (appliance_type.lower(), (brand or "").lower())
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        def refresh():
+            try:
+                issues = self.issue_listing_agent.list_common_issues(
+                    appliance_type=appliance_type,
+                    brand=brand
+                )
+                if issues:
+                    self.common_issues_repo.save_precomputed_issues(appliance_type, brand, issues)
+            except Exception as e:
+                print(f"Error refreshing issues for {appliance_type}: {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+        
+        self._refresh_executor.submit(refresh)
+    
+    def guess_appliance_type(self, appliance: Appliance, category: Optional[str] = None) -> Optional[str]:
+        """
+        Guess the appliance type locally, without calling the LLM
+        
+        Uses the type already on the appliance, or the category the user picked
+        if it is one of the types known to the common issues repository.
+        """
+        if appliance.appliance_type:
+            return appliance.appliance_type
+        if not category:
+            return None
+        
+        candidate = self.CATEGORY_TO_APPLIANCE_TYPE.get(category, category)
+        try:
+            known_types = self.common_issues_repo.load().keys()
+        except (FileNotFoundError, ValueError):
+            return None
+        return candidate if candidate in known_types else None
+    
+    def detect_type_and_list_issues(
+        self,
+        appliance: Appliance,
+        category: Optional[str] = None
+    ) -> Tuple[Optional[str], List[str]]:
+        """
+        Detect the appliance type and list its common issues concurrently
+        
+        Blocking wrapper around adetect_type_and_list_issues().
+        
+        Returns:
+            Tuple of (appliance type or None, common issues from the agent)
+        """
+        if not self.client_registry:
+            return None, []
+        return self.client_registry.run_async(
+            self.adetect_type_and_list_issues(appliance, category)
+        )
+    
+    async def adetect_type_and_list_issues(
+        self,
+        appliance: Appliance,
+        category: Optional[str] = None
+    ) -> Tuple[Optional[str], List[str]]:
+        """
+        Detect the appliance type while speculatively listing issues
+        
+        Issue listing starts straight away for the locally guessed type. If type
+        detection agrees with the guess the speculative result is used;
+        otherwise the speculative request is cancelled and issues are listed
+        for the detected type.
+        """
+        if not self.appliance_type_agent or not self.issue_listing_agent:
+            return None, []
+        
+        guessed_type = self.guess_appliance_type(appliance, category)
+        detect_task = asyncio.create_task(self.appliance_type_agent.adetect_type(
+            brand=appliance.brand,
+            model=appliance.model,
+            serial=appliance.serial
+        ))
+        listing_task = None
+        if guessed_type:
+            listing_task = asyncio.create_task(self._alist_issues_for_type(appliance, guessed_type))
+        
+        try:
+            detected_type = await detect_task
+        except Exception as e:
+            print(f"Error detecting appliance type: {e}")
+            detected_type = None
+        
+        # Detection reports failure as "Unknown"; keep the category guess then
+        appliance_type = detected_type if detected_type and detected_type != "Unknown" else guessed_type
+        if not appliance_type:
+            await self._cancel(listing_task)
+            # Report "Unknown" as detect_appliance_type() does, but list no issues for it
+            return detected_type, []
+        
+        if listing_task and appliance_type.lower() == guessed_type.lower():
+            return appliance_type, await listing_task
+        
+        # Guess was wrong (or missing): drop the speculative request
+        await self._cancel(listing_task)
+        return appliance_type, await self._alist_issues_for_type(appliance, appliance_type)
+    
+    @staticmethod
+    async def _cancel(task: Optional[asyncio.Task]):
+        """Cancel a speculative task and wait for it to finish"""
+        if task is None:
+            return
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    
+    async def _alist_issues_for_type(self, appliance: Appliance, appliance_type: str) -> List[str]:
+        """List common issues for the given type"""
+        stored_issues = self._get_stored_issues(appliance_type, appliance.brand)
+        if stored_issues is not None:
+            return stored_issues
+        
+        try:
+            issues = await self.issue_listing_agent.alist_common_issues(
+                appliance_type=appliance_type,
+                brand=appliance.brand,
+                model=appliance.model
+            )
+            self._store_issues(appliance_type, appliance.brand, issues)
             return issues
         except Exception as e:
             print(f"Error listing issues: {e}")
             return []
     
+    def match_knowledge_base(self, issue: str, appliance_type: str) -> Optional[Problem]:
+        """
+        Find a knowledge-base problem that can be answered without gpt-4o
+        
+        Only SIMPLE problems for the same appliance type matched with a score
+        of at least KB_ROUTING_MIN_SCORE qualify.
+        """
+        try:
+            problem, score = self.knowledge_base_repo.find_best_match(issue, appliance_type)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"Error matching knowledge base: {e}")
+            return None
+        
+        if problem and problem.is_simple() and problem.troubleshooting_steps and score >= KB_ROUTING_MIN_SCORE:
+            return problem
+        return None
+    
     def get_troubleshooting_guidance(
         self,
         appliance: Appliance,
         issue: str,
-        conversation_history: List[Dict] = None
+        conversation_summary: str = None
     ) -> str:
         """Get troubleshooting guidance"""
+        return "".join(self.stream_troubleshooting_guidance(appliance, issue, conversation_summary)).strip()
+    
+    def stream_troubleshooting_guidance(
+        self,
+        appliance: Appliance,
+        issue: str,
+        conversation_summary: str = None
+    ) -> Iterator[str]:
+        """
+        Stream troubleshooting guidance as it is generated
+        
+        The first answer for a known SIMPLE problem comes from the knowledge
+        base (rephrased by the cheaper model); follow-up turns and other
+        issues go to the troubleshooting agent.
+        """
         if not self.troubleshooting_agent or not appliance.appliance_type:
-            return "I'm unable to provide troubleshooting guidance at the moment."
+            yield "I'm unable to provide troubleshooting guidance at the moment."
+            return
         
+        problem = None if conversation_summary else self.match_knowledge_base(issue, appliance.appliance_type)
         try:
-            guidance = self.troubleshooting_agent.get_guidance(
-                appliance_type=appliance.appliance_type,
-                brand=appliance.brand,
-                model=appliance.model,
-                issue=issue,
-                conversation_history=conversation_history
-            )
-            return guidance
+            if problem:
+                chunks = self.troubleshooting_agent.stream_curated_guidance(
+                    appliance_type=appliance.appliance_type,
+                    brand=appliance.brand,
+                    model=appliance.model,
+                    issue=issue,
+                    steps=problem.troubleshooting_steps
+                )
+                yield from self._timed(RoutingStats.ROUTE_KNOWLEDGE_BASE, chunks)
+            else:
+                chunks = self.troubleshooting_agent.stream_guidance(
+                    appliance_type=appliance.appliance_type,
+                    brand=appliance.brand,
+                    model=appliance.model,
+                    issue=issue,
+                    conversation_summary=conversation_summary
+                )
+                yield from self._timed(RoutingStats.ROUTE_LLM, chunks)
         except Exception as e:
-            print(f"Error getting troubleshooting guidance: {e}")
-            return "I apologize, but I encountered an error. Please try again or book a technician."
+            print(f"Error streaming troubleshooting guidance: {e}")
+            yield "\n\nI apologize, but I encountered an error. Please try again or book a technician."
+    
+    def _timed(self, route: str, chunks: Iterable[str]) -> Iterator[str]:
+        """Pass chunks through, recording the time to the complete answer (see get_routing_stats())"""
+        started = time.perf_counter()
+        yield from chunks
+        self.routing_stats.record(route, time.perf_counter() - started)
+    
+    def get_routing_stats(self) -> Dict:
+        """Get knowledge-base routing hit rate and latency saved"""
+        return self.routing_stats.snapshot()
     
     def summarize_issue(
         self,
         appliance: Appliance,
-        conversation_history: List[Dict]
+        conversation_summary: str
     ) -> str:
         """Summarize issue for booking"""
         if not self.summarization_agent or not appliance.appliance_type:
@@ -99,7 +399,7 @@ class FlowOrchestrator:
                 appliance_type=appliance.appliance_type,
                 brand=appliance.brand,
                 model=appliance.model,
-                conversation_history=conversation_history
+                conversation_summary=conversation_summary
             )
             return summary
         except Exception as e:
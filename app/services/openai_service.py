@@ -1,123 +1,287 @@
 import json
 import base64
 import os
-from typing import Tuple, Dict, Optional
-from openai import OpenAI
+import re
+import threading
+import time
+from typing import Tuple, Dict, List, Optional
+from config import VISION_TIERED_ENABLED, VISION_LOW_DETAIL_SIZE, VISION_LOW_DETAIL_MAX_TOKENS, VISION_REQUIRED_FIELDS
+from app.agents.appliance_type_agent import ApplianceTypeAgent
+from app.utils.llm_client_registry import LLMClientRegistry
+from app.utils.image_utils import ImageUtils
+
+
+# Structured output schema for extract_appliance_info
+APPLIANCE_INFO_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "appliance_info",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "brand": {"type": ["string", "null"]},
+                "model": {"type": ["string", "null"]},
+                "serial": {"type": ["string", "null"]},
+                "age": {"type": ["integer", "null"]},
+                "appliance_type": {
+                    "type": "string",
+                    "enum": ApplianceTypeAgent.COMMON_TYPES + ["Unknown"]
+                }
+            },
+            "required": ["brand", "model", "serial", "age", "appliance_type"],
+            "additionalProperties": False
+        }
+    }
+}
+
+
+NAMEPLATE_READING_PROMPT = """Read all text from this appliance nameplate image. Extract:
+1. Brand name
+2. Model number
+3. Serial number
+4. Any date or age information
+
+Return the raw text you see, and then provide a JSON object with:
+{
+  "brand": "brand name or null",
+  "model": "model number or null",
+  "serial": "serial number or null",
+  "age": estimated age in years or null
+}
+
+Format your response as:
+RAW_TEXT: [all text you see]
+JSON: [the JSON object]"""
+
+# Local plausibility checks for nameplate fields read by the vision model
+BRAND_PATTERN = re.compile(r"^[A-Za-z][A-Za-z0-9&.' -]{1,29}$")
+IDENTIFIER_PATTERN = re.compile(r'^(?=.*\d)[A-Za-z0-9][A-Za-z0-9./-]{3,29}$')
+
+
+class VisionTierStats:
+    """Counts nameplate reads per vision tier, with escalations and latency"""
+    
+    TIER_LOW = "low"
+    TIER_HIGH = "high"
+    
+    def __init__(self):
+        self._counts = {self.TIER_LOW: 0, self.TIER_HIGH: 0}
+        self._seconds = {self.TIER_LOW: 0.0, self.TIER_HIGH: 0.0}
+        self._escalations = 0
+        self._lock = threading.Lock()
+    
+    def record(self, tier: str, seconds: float, escalated: bool = False):
+        """Record one vision pass"""
+        with self._lock:
+            self._counts[tier] += 1
+            self._seconds[tier] += seconds
+            if escalated:
+                self._escalations += 1
+    
+    def snapshot(self) -> Dict:
+        """Get the current statistics"""
+        with self._lock:
+            low_calls = self._counts[self.TIER_LOW]
+            high_calls = self._counts[self.TIER_HIGH]
+            return {
+                "low_calls": low_calls,
+                "high_calls": high_calls,
+                "escalations": self._escalations,
+                "escalation_rate": self._escalations / low_calls if low_calls else 0.0,
+                "avg_low_seconds": self._seconds[self.TIER_LOW] / low_calls if low_calls else 0.0,
+                "avg_high_seconds": self._seconds[self.TIER_HIGH] / high_calls if high_calls else 0.0
+            }
 
 
 class OpenAIService:
     """Service for interacting with OpenAI API"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, client_registry: Optional[LLMClientRegistry] = None):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key not found. Set OPENAI_API_KEY environment variable.")
-        self.client = OpenAI(api_key=self.api_key)
+        self.client_registry = client_registry or LLMClientRegistry(self.api_key)
+        self.client = self.client_registry.client
+        self.resilience = self.client_registry.resilience
+        self.vision_tier_stats = VisionTierStats()
+    
+    def _create_completion(self, flow: str, **kwargs):
+        """Create a chat completion through the shared resilience layer"""
+        return self.resilience.call(flow, lambda timeout: self.client.chat.completions.create(**kwargs, timeout=timeout))
     
     def extract_appliance_info(self, text: str) -> Dict:
-        """Extract appliance information from text using GPT"""
-        prompt = """Extract appliance information from the following text. Return a JSON object with:
+        """
+        Extract appliance information, including its type, from text using GPT
+        
+        Uses JSON-schema structured output so brand, model, serial, age and
+        appliance_type come back from a single call and always parse; a
+        separate type detection call is only needed when the type is "Unknown".
+        """
+        prompt = """Extract appliance information from the following text:
 - brand: the appliance brand (e.g., Samsung, LG, Whirlpool)
 - model: the model number
 - serial: the serial number
 - age: estimated age in years (if mentioned, otherwise null)
+- appliance_type: the type of appliance, inferred from the text, brand and model number ("Unknown" if unsure)
 
-Text: {text}
+Use null for anything that is not in the text.
 
-Return ONLY valid JSON, no other text."""
+Text: {text}"""
 
         try:
-            response = self.client.chat.completions.create(
+            response = self._create_completion(
+                "identification",
                 model="gpt-4o-mini",
                 messages=[
                     {
                         "role": "system",
-                        "content": "You are a helpful assistant that extracts structured information from text. Always return valid JSON only."
+                        "content": "You are a helpful assistant that extracts structured information from text."
                     },
                     {
                         "role": "user",
                         "content": prompt.format(text=text)
                     }
                 ],
+                response_format=APPLIANCE_INFO_RESPONSE_FORMAT,
                 temperature=0.3
             )
-            result = json.loads(response.choices[0].message.content)
-            return result
+            message = response.choices[0].message
+            if getattr(message, "refusal", None):
+                raise ValueError(message.refusal)
+            result = json.loads(message.content)
+            
+            # Drop empty fields so callers can keep treating missing keys as unknown
+            return {
+                key: value for key, value in result.items()
+                if value is not None and value != "" and value != "Unknown"
+            }
         except Exception as e:
             raise Exception(f"Error extracting appliance info: {e}")
     
-    def read_nameplate_image(self, image_bytes: bytes) -> Tuple[str, Dict]:
-        """Read text from nameplate image using OpenAI Vision API"""
+    def read_nameplate_image(self, image_bytes: bytes, tiered: bool = VISION_TIERED_ENABLED) -> Tuple[str, Dict]:
+        """
+        Read text from nameplate image using OpenAI Vision API
+        
+        In tiered mode a cheap low-detail pass is tried first; its brand,
+        model and serial are checked locally and the full-detail pass is only
+        made when a required field is missing or implausible.
+        """
         try:
-            base64_image = base64.b64encode(image_bytes).decode('utf-8')
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": """Read all text from this appliance nameplate image. Extract:
-1. Brand name
-2. Model number
-3. Serial number
-4. Any date or age information
-
-Return the raw text you see, and then provide a JSON object with:
-{
-  "brand": "brand name or null",
-  "model": "model number or null",
-  "serial": "serial number or null",
-  "age": estimated age in years or null
-}
-
-Format your response as:
-RAW_TEXT: [all text you see]
-JSON: [the JSON object]"""
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=500
-            )
-            
-            result_text = response.choices[0].message.content
-            
-            # Parse the response
-            text_content = ""
-            info = {}
-            
-            if "RAW_TEXT:" in result_text and "JSON:" in result_text:
-                parts = result_text.split("JSON:")
-                text_content = parts[0].replace("RAW_TEXT:", "").strip()
-                json_part = parts[1].strip()
-                try:
-                    info = json.loads(json_part)
-                except json.JSONDecodeError:
-                    pass
-            else:
-                text_content = result_text
-                # Try to extract JSON if present
-                try:
-                    if "{" in result_text and "}" in result_text:
-                        json_start = result_text.find("{")
-                        json_end = result_text.rfind("}") + 1
-                        info = json.loads(result_text[json_start:json_end])
-                except json.JSONDecodeError:
-                    pass
+            if tiered:
+                low_detail_image = ImageUtils.prepare_for_vision(
+                    image_bytes,
+                    max_long_side=VISION_LOW_DETAIL_SIZE,
+                    max_short_side=VISION_LOW_DETAIL_SIZE
+                )
+                started = time.perf_counter()
+                text_content, info = self._read_nameplate_pass(low_detail_image, "low", VISION_LOW_DETAIL_MAX_TOKENS)
+                problems = self.validate_nameplate_info(info)
+                self.vision_tier_stats.record(VisionTierStats.TIER_LOW, time.perf_counter() - started, escalated=bool(problems))
+                if not problems:
+                    return text_content, info
             
+            started = time.perf_counter()
+            text_content, info = self._read_nameplate_pass(ImageUtils.prepare_for_vision(image_bytes), "high", 500)
+            self.vision_tier_stats.record(VisionTierStats.TIER_HIGH, time.perf_counter() - started)
             return text_content, info
         except Exception as e:
             raise Exception(f"Error reading image: {e}")
     
+    @staticmethod
+    def validate_nameplate_info(info: Dict) -> List[str]:
+        """
+        Check vision output with local rules
+        
+        Returns:
+            Problems found (empty when brand and model are present and brand,
+            model and serial look like real nameplate values)
+        """
+        problems = []
+        for field in VISION_REQUIRED_FIELDS:
+            if not OpenAIService._clean_field(info.get(field)):
+                problems.append(f"missing {field}")
+        
+        brand = OpenAIService._clean_field(info.get("brand"))
+        if brand and not BRAND_PATTERN.match(brand):
+            problems.append("implausible brand")
+        for field in ("model", "serial"):
+            value = OpenAIService._clean_field(info.get(field))
+            if value and not IDENTIFIER_PATTERN.match(value):
+                problems.append(f"implausible {field}")
+        return problems
+    
+    def get_vision_tier_stats(self) -> Dict:
+        """Get call counts, escalation rate and average latency per vision tier"""
+        return self.vision_tier_stats.snapshot()
+    
+    @staticmethod
+    def _clean_field(value) -> Optional[str]:
+        """Normalize a vision field, treating "null"/"unknown" text as missing"""
+        if value is None:
+            return None
+        value = str(value).strip()
+        if value.lower() in ("", "null", "none", "unknown", "n/a"):
+            return None
+        return value
+    
+    def _read_nameplate_pass(self, image_bytes: bytes, detail: str, max_tokens: int) -> Tuple[str, Dict]:
+        """Make one vision call at the given detail level and parse its answer"""
+        base64_image = base64.b64encode(image_bytes).decode('utf-8')
+        
+        response = self._create_completion(
+            "vision",
+            model="gpt-4o",
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": NAMEPLATE_READING_PROMPT
+                        },
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:image/jpeg;base64,{base64_image}",
+                                "detail": detail
+                            }
+                        }
+                    ]
+                }
+            ],
+            max_tokens=max_tokens
+        )
+        
+        return self._parse_nameplate_response(response.choices[0].message.content)
+    
+    @staticmethod
+    def _parse_nameplate_response(result_text: str) -> Tuple[str, Dict]:
+        """Split a vision answer into raw text and the JSON info"""
+        text_content = ""
+        info = {}
+        
+        if "RAW_TEXT:" in result_text and "JSON:" in result_text:
+            parts = result_text.split("JSON:")
+            text_content = parts[0].replace("RAW_TEXT:", "").strip()
+            json_part = parts[1].strip()
+            try:
+                info = json.loads(json_part)
+            except json.JSONDecodeError:
+                pass
+        else:
+            text_content = result_text
+            # Try to extract JSON if present
+            try:
+                if "{" in result_text and "}" in result_text:
+                    json_start = result_text.find("{")
+                    json_end = result_text.rfind("}") + 1
+                    info = json.loads(result_text[json_start:json_end])
+            except json.JSONDecodeError:
+                pass
+        
+        return text_content, info
+    
     def get_nameplate_guidance(self, category: str, subcategory: str, brand: str) -> str:
         """Get nameplate location guidance using GPT-4 with YouTube video links"""
         prompt = f"""You are a friendly and practical appliance expert who explains things clearly, naturally, and without sounding like an AI or using robotic/LLM-like language.
@@ -154,9 +318,10 @@ IMPORTANT: At the end of your response, provide 2-3 helpful YouTube video links
 - [Video Title 3](https://www.youtube.com/watch?v=...)
 
 Make sure the video links are real, working YouTube URLs that are relevant to finding nameplates for this specific brand and subcategory."""
-        
+
         try:
-            response = self.client.chat.completions.create(
+            response = self._create_completion(
+                "nameplate_guidance",
                 model="gpt-4o",
                 messages=[
                     {
@@ -1,5 +1,20 @@
 from .state_manager import StateManager
 from .image_utils import ImageUtils
+from .llm_client_registry import LLMClientRegistry
+from .persistent_cache import PersistentCache
+from .blob_store import BlobStore
+from .id_generator import IdGenerator
+from .resilience import ResilientCaller, CircuitBreaker, LLMUnavailableError
 
-__all__ = ["StateManager", "ImageUtils"]
+__all__ = [
+    "StateManager",
+    "ImageUtils",
+    "LLMClientRegistry",
+    "PersistentCache",
+    "BlobStore",
+    "IdGenerator",
+    "ResilientCaller",
+    "CircuitBreaker",
+    "LLMUnavailableError"
+]
 
@@ -0,0 +1,176 @@
+"""Process-wide, content-addressed store for uploaded images"""
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from PIL import Image, ImageOps
+from app.utils.image_utils import ImageUtils
+
+
+class BlobStore:
+    """
+    Keeps image bytes out of st.session_state.
+    
+    Blobs are keyed by their content hash, so the same photo uploaded by
+    several sessions (or attached to several messages) is stored once;
+    messages hold the key only. Recently used blobs stay in a memory LRU
+    capped at max_memory_bytes; older ones are spilled to spill_dir, which is
+    itself capped at max_disk_bytes (least recently written files go first).
+    Small JPEG thumbnails are kept in a separate LRU for chat display.
+    """
+    
+    def __init__(
+        self,
+        spill_dir: Optional[Path],
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        max_disk_bytes: int = 1024 * 1024 * 1024,
+        thumbnail_size: Tuple[int, int] = (300, 300),
+        max_thumbnails: int = 500
+    ):
+        """
+        Initialize store
+        
+        Args:
+            spill_dir: Directory for blobs evicted from memory (None drops them)
+            max_memory_bytes: Memory budget for full-size blobs
+            max_disk_bytes: Disk budget for spilled blobs
+            thumbnail_size: Bounding box of generated thumbnails
+            max_thumbnails: Maximum number of thumbnails kept in memory
+        """
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.thumbnail_size = thumbnail_size
+        self.max_thumbnails = max_thumbnails
+        self._blobs: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._thumbnails: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def put(self, data: bytes) -> str:
+        """Store bytes and get their key (the content hash)"""
+        key = ImageUtils.get_image_hash(data)
+        with self._lock:
+            if key in self._blobs:
+                self._blobs.move_to_end(key)
+                return key
+            self._blobs[key] = data
+            self._memory_bytes += len(data)
+            self._evict_memory()
+        return key
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """Get a blob from memory or disk, or None if it is gone"""
+        with self._lock:
+            data = self._blobs.get(key)
+            if data is not None:
+                self._blobs.move_to_end(key)
+                return data
+        return self._read_spilled(key)
+    
+    def get_thumbnail(self, key: str) -> Optional[bytes]:
+        """Get a JPEG thumbnail of a blob, generating it on first use"""
+        with self._lock:
+            thumbnail = self._thumbnails.get(key)
+            if thumbnail is not None:
+                self._thumbnails.move_to_end(key)
+                return thumbnail
+        
+        data = self.get(key)
+        if data is None:
+            return None
+        thumbnail = self._make_thumbnail(data)
+        if thumbnail is None:
+            return None
+        
+        with self._lock:
+            self._thumbnails[key] = thumbnail
+            while len(self._thumbnails) > self.max_thumbnails:
+                self._thumbnails.popitem(last=False)
+        return thumbnail
+    
+    def stats(self) -> Dict[str, int]:
+        """Get memory usage and entry counts"""
+        with self._lock:
+            return {
+                "memory_blobs": len(self._blobs),
+                "memory_bytes": self._memory_bytes,
+                "thumbnails": len(self._thumbnails)
+            }
+    
+    def _evict_memory(self):
+        """Spill least recently used blobs until memory fits (caller holds the lock)"""
+        while self._memory_bytes > self.max_memory_bytes and len(self._blobs) > 1:
+            key, data = self._blobs.popitem(last=False)
+            self._memory_bytes -= len(data)
+            self._spill(key, data)
+    
+    def _blob_path(self, key: str) -> Path:
+        """Get the spill file of a blob"""
+        return self.spill_dir / f"{key}.bin"
+    
+    def _spill(self, key: str, data: bytes):
+        """Write a blob to the spill directory atomically and enforce the disk cap"""
+        if not self.spill_dir:
+            return
+        
+        path = self._blob_path(key)
+        try:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            if not path.exists():
+                fd, tmp_path = tempfile.mkstemp(dir=self.spill_dir, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            else:
+                path.touch()
+            self._prune_disk()
+        except OSError as e:
+            print(f"Warning: could not spill blob {key}: {e}")
+    
+    def _prune_disk(self):
+        """Delete the oldest spilled blobs while the directory is over its cap"""
+        files = []
+        total = 0
+        for path in self.spill_dir.glob("*.bin"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+    
+    def _read_spilled(self, key: str) -> Optional[bytes]:
+        """Read a blob from the spill directory"""
+        if not self.spill_dir:
+            return None
+        try:
+            return self._blob_path(key).read_bytes()
+        except OSError:
+            return None
+    
+    def _make_thumbnail(self, data: bytes) -> Optional[bytes]:
+        """Downscale an image to a JPEG thumbnail"""
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail(self.thumbnail_size)
+                output = io.BytesIO()
+                image.convert("RGB").save(output, format="JPEG", quality=80)
+                return output.getvalue()
+        except Exception as e:
+            print(f"Warning: could not create thumbnail: {e}")
+            return None
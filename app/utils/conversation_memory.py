@@ -0,0 +1,109 @@
+"""Compact running summary of a chat session for LLM prompts"""
+import re
+from collections import deque
+from typing import Deque, List, Tuple
+
+
+MARKDOWN_PATTERN = re.compile(r'(\*\*|__|`|^#+\s*|^>\s*)', re.MULTILINE)
+LINK_PATTERN = re.compile(r'\[([^\]]+)\]\([^)]+\)')
+STEP_PATTERN = re.compile(r'^\s*(?:\d+[\.\)]|[-*•])\s+(.*)$')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+SENTENCE_END_PATTERN = re.compile(r'(?<=[.!?])\s')
+
+
+class ConversationMemory:
+    """
+    Incremental, extractive memory of a conversation.
+    
+    The last few turns are kept in compressed form; older turns are folded
+    into one-line summary points. Updating is plain string processing (no
+    LLM call) and the rendered text has a fixed upper size, so the prompt
+    cost per turn stays flat as the conversation grows.
+    """
+    
+    def __init__(self, max_recent_turns: int = 4, max_summary_points: int = 12, max_turn_chars: int = 400):
+        """
+        Initialize memory
+        
+        Args:
+            max_recent_turns: Turns kept in compressed (not folded) form
+            max_summary_points: Maximum number of folded summary points
+            max_turn_chars: Maximum length of one compressed turn
+        """
+        self.max_recent_turns = max_recent_turns
+        self.max_summary_points = max_summary_points
+        self.max_turn_chars = max_turn_chars
+        self.summary_points: List[str] = []
+        self.recent: Deque[Tuple[str, str]] = deque()
+    
+    def add_message(self, role: str, content: str):
+        """Add a chat message, folding the oldest recent turn if needed"""
+        text = self.compress(content, self.max_turn_chars)
+        if not text:
+            return
+        
+        self.recent.append((role, text))
+        while len(self.recent) > self.max_recent_turns:
+            old_role, old_text = self.recent.popleft()
+            self._fold(old_role, old_text)
+    
+    def to_text(self) -> str:
+        """Render the memory for a prompt ("" when empty)"""
+        lines = []
+        if self.summary_points:
+            lines.append("Earlier in the conversation:")
+            lines.extend(f"- {point}" for point in self.summary_points)
+        if self.recent:
+            if lines:
+                lines.append("")
+                lines.append("Most recent messages:")
+            lines.extend(f"{role.capitalize()}: {text}" for role, text in self.recent)
+        return "\n".join(lines)
+    
+    def clear(self):
+        """Forget everything"""
+        self.summary_points = []
+        self.recent.clear()
+    
+    def _fold(self, role: str, text: str):
+        """Turn an old message into a one-line summary point"""
+        first_sentence = SENTENCE_END_PATTERN.split(text, 1)[0]
+        self.summary_points.append(f"{role.capitalize()}: {self._truncate(first_sentence, 140)}")
+        
+        # Keep the opening points (they usually state the appliance and problem)
+        if len(self.summary_points) > self.max_summary_points:
+            del self.summary_points[2]
+    
+    @staticmethod
+    def compress(content: str, max_chars: int) -> str:
+        """
+        Compress a chat message to plain text
+        
+        Markdown and links are stripped. For step-by-step guidance only the
+        introduction and the first words of each step are kept.
+        """
+        if not content:
+            return ""
+        
+        intro_lines, steps = [], []
+        for line in LINK_PATTERN.sub(r'\1', content).splitlines():
+            line = MARKDOWN_PATTERN.sub('', line).strip()
+            if not line:
+                continue
+            match = STEP_PATTERN.match(line)
+            if match:
+                steps.append(ConversationMemory._truncate(match.group(1), 60))
+            elif not steps:
+                intro_lines.append(line)
+        
+        text = " ".join(intro_lines)
+        if steps:
+            text = f"{text} Steps: " + "; ".join(steps)
+        return ConversationMemory._truncate(WHITESPACE_PATTERN.sub(' ', text).strip(), max_chars)
+    
+    @staticmethod
+    def _truncate(text: str, max_chars: int) -> str:
+        """Cut text to max_chars, marking the cut with an ellipsis"""
+        if len(text) <= max_chars:
+            return text
+        return text[:max_chars - 1].rstrip() + "…"
@@ -0,0 +1,108 @@
+"""Advisory inter-process file lock"""
+import os
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+class FileLock:
+    """
+    Exclusive lock shared by threads and processes.
+    
+    Uses flock() on POSIX and msvcrt.locking() on Windows; on platforms
+    with neither it only excludes threads of this process. The lock is
+    advisory: it only coordinates code that takes it. Reentrant within a
+    thread, so a holder can call helpers that take it again.
+    """
+    
+    def __init__(self, path: Path, poll_interval: float = 0.01):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+    
+    def acquire(self, blocking: bool = True) -> bool:
+        """Take the lock; with blocking=False, return False instead of waiting"""
+        if not self._thread_lock.acquire(blocking):
+            return False
+        if self._depth == 0:
+            try:
+                if not self._acquire_file(blocking):
+                    self._thread_lock.release()
+                    return False
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return True
+    
+    def release(self):
+        """Release the lock"""
+        self._depth -= 1
+        if self._depth == 0:
+            self._release_file()
+        self._thread_lock.release()
+    
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+    
+    def _acquire_file(self, blocking: bool) -> bool:
+        """Take the OS-level lock (caller holds the thread lock)"""
+        if fcntl is None and msvcrt is None:
+            return True
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+                try:
+                    fcntl.flock(fd, flags)
+                except BlockingIOError:
+                    os.close(fd)
+                    return False
+            else:
+                # msvcrt.locking() gives up after ~10 s, so poll without blocking
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if not blocking:
+                            os.close(fd)
+                            return False
+                        time.sleep(self.poll_interval)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        return True
+    
+    def _release_file(self):
+        """Release the OS-level lock (caller holds the thread lock)"""
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,124 @@
+"""Time-ordered unique IDs for bookings, orders and dispatches"""
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from config import ID_NODE_ID
+
+
+# Crockford base32: no I, L, O or U, and ascending in ASCII so IDs sort as strings
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ID_LENGTH = 13
+
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+NODE_BITS = 12
+SEQUENCE_BITS = 10
+MAX_NODE_ID = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+
+class IdGenerator:
+    """
+    Snowflake-style ID generator.
+    
+    An ID packs milliseconds since 2024-01-01 (41 bits), a node ID (12 bits)
+    and a per-millisecond sequence (10 bits) into one integer, written as 13
+    Crockford base32 characters. IDs from one generator are strictly
+    increasing: if the clock steps back, or more than 1024 IDs are taken in
+    a millisecond, the generator keeps counting from its last timestamp
+    instead. Distinct node IDs never collide, so processes sharing a store
+    should set ID_NODE_ID; without it each process picks a random node.
+    """
+    
+    _default: Optional["IdGenerator"] = None
+    _default_lock = threading.Lock()
+    
+    def __init__(self, node_id: Optional[int] = None):
+        """
+        Initialize generator
+        
+        Args:
+            node_id: 0-4095, unique per process sharing a store (None picks a random one)
+        """
+        if node_id is None:
+            node_id = secrets.randbelow(MAX_NODE_ID + 1)
+        if not 0 <= node_id <= MAX_NODE_ID:
+            raise ValueError(f"node_id must be between 0 and {MAX_NODE_ID}, got {node_id}")
+        self.node_id = node_id
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def default(cls) -> "IdGenerator":
+        """Get the process-wide generator (node from ID_NODE_ID)"""
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls(ID_NODE_ID)
+        return cls._default
+    
+    def next_int(self) -> int:
+        """Get the next ID as an integer"""
+        with self._lock:
+            now_ms = int(time.time() * 1000) - EPOCH_MS
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            elif self._sequence < MAX_SEQUENCE:
+                self._sequence += 1
+            else:
+                # Sequence exhausted (or clock behind): borrow the next millisecond
+                self._last_ms += 1
+                self._sequence = 0
+            return (self._last_ms << (NODE_BITS + SEQUENCE_BITS)) | (self.node_id << SEQUENCE_BITS) | self._sequence
+    
+    def next_id(self, prefix: str = "") -> str:
+        """Get the next ID as a string, e.g. next_id("TRK-") -> "TRK-0CQ8Z3JH1A2F4" """
+        return prefix + self.encode(self.next_int())
+    
+    @staticmethod
+    def encode(value: int) -> str:
+        """Write an ID integer as fixed-width base32"""
+        chars = []
+        for _ in range(ID_LENGTH):
+            chars.append(ALPHABET[value & 31])
+            value >>= 5
+        return "".join(reversed(chars))
+    
+    @staticmethod
+    def decode(id_string: str) -> int:
+        """
+        Read an ID string (a prefix such as "TRK-" is ignored) back to its integer
+        
+        Raises:
+            ValueError: If it is not an ID from this generator
+        """
+        body = id_string[-ID_LENGTH:].upper()
+        if len(body) != ID_LENGTH:
+            raise ValueError(f"Invalid ID: {id_string}")
+        value = 0
+        for char in body:
+            digit = ALPHABET.find(char)
+            if digit < 0:
+                raise ValueError(f"Invalid ID: {id_string}")
+            value = (value << 5) | digit
+        return value
+    
+    @staticmethod
+    def timestamp_of(id_string: str) -> datetime:
+        """Get the UTC time an ID was generated"""
+        ms = (IdGenerator.decode(id_string) >> (NODE_BITS + SEQUENCE_BITS)) + EPOCH_MS
+        return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+    
+    @staticmethod
+    def lower_bound(moment: datetime, prefix: str = "") -> str:
+        """
+        Get the smallest ID that could be generated at a moment
+        
+        IDs sort by time, so [lower_bound(start), lower_bound(end)) selects
+        the IDs generated in that range. Naive datetimes are taken as local time.
+        """
+        ms = max(int(moment.timestamp() * 1000) - EPOCH_MS, 0)
+        return prefix + IdGenerator.encode(ms << (NODE_BITS + SEQUENCE_BITS))
@@ -1,5 +1,8 @@
 import hashlib
+import io
 from typing import Tuple, Optional, Dict
+from PIL import Image, ImageOps
+from config import MAX_IMAGE_SIZE_MB, PERCEPTUAL_HASH_SIZE, VISION_IMAGE_MAX_LONG_SIDE, VISION_IMAGE_MAX_SHORT_SIDE, VISION_IMAGE_JPEG_QUALITY
 
 
 class ImageUtils:
@@ -18,4 +21,82 @@ class ImageUtils:
         
         extension = filename.split(".")[-1].lower()
         return extension in allowed_types
-
+    
+    @staticmethod
+    def validate_image_size(image_bytes: bytes, max_size_mb: float = MAX_IMAGE_SIZE_MB) -> bool:
+        """Check that an upload is within the size limit"""
+        return len(image_bytes) <= max_size_mb * 1024 * 1024
+    
+    @staticmethod
+    def prepare_for_vision(
+        image_bytes: bytes,
+        max_long_side: int = VISION_IMAGE_MAX_LONG_SIDE,
+        max_short_side: int = VISION_IMAGE_MAX_SHORT_SIDE,
+        quality: int = VISION_IMAGE_JPEG_QUALITY
+    ) -> bytes:
+        """
+        Normalize an upload before sending it to the vision model
+        
+        Applies the EXIF orientation, downscales to the resolution the model
+        works at (larger images are resized server-side anyway, so the extra
+        pixels only cost upload time) and re-encodes as JPEG.
+        
+        Raises:
+            ValueError: If the image is too large or cannot be decoded
+        """
+        if not ImageUtils.validate_image_size(image_bytes):
+            raise ValueError(f"Image is larger than {MAX_IMAGE_SIZE_MB} MB")
+        
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as image:
+                width, height = image.size
+                scale = min(1.0, max_long_side / max(width, height), max_short_side / min(width, height))
+                if scale < 1.0:
+                    # Let the JPEG decoder skip pixels we would throw away anyway
+                    image.draft("RGB", (round(width * scale), round(height * scale)))
+                
+                image = ImageOps.exif_transpose(image)
+                width, height = image.size
+                scale = min(1.0, max_long_side / max(width, height), max_short_side / min(width, height))
+                if scale < 1.0:
+                    new_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+                    image = image.resize(new_size, Image.LANCZOS)
+                
+                output = io.BytesIO()
+                image.convert("RGB").save(output, format="JPEG", quality=quality, optimize=True)
+        except (OSError, Image.DecompressionBombError) as e:
+            raise ValueError(f"Unreadable image: {e}")
+        
+        return output.getvalue()
+    
+    @staticmethod
+    def get_perceptual_hash(image_bytes: bytes, hash_size: int = PERCEPTUAL_HASH_SIZE) -> Optional[str]:
+        """
+        Generate a difference hash (dHash) of an image
+        
+        The image is reduced to a (hash_size + 1) x hash_size grayscale grid
+        and each bit records whether a pixel is brighter than its right
+        neighbour, so re-shot photos of the same label get hashes a few bits
+        apart. Returns None for undecodable or near-uniform images, which
+        carry too little detail to compare.
+        """
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as image:
+                image.draft("L", (hash_size * 8, hash_size * 8))
+                image = ImageOps.exif_transpose(image)
+                pixels = list(image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS).getdata())
+        except (OSError, Image.DecompressionBombError):
+            return None
+        
+        value = 0
+        for row in range(hash_size):
+            for col in range(hash_size):
+                left = pixels[row * (hash_size + 1) + col]
+                right = pixels[row * (hash_size + 1) + col + 1]
+                value = (value << 1) | (left > right)
+        
+        bits = hash_size * hash_size
+        ones = bin(value).count("1")
+        if ones < bits // 16 or ones > bits - bits // 16:
+            return None
+        return f"{value:0{bits // 4}x}"
@@ -0,0 +1,117 @@
+"""Process-wide registry of pooled OpenAI / LangChain clients"""
+import asyncio
+import os
+import threading
+from typing import Any, Awaitable, Dict, Optional, Tuple
+import httpx
+from openai import OpenAI
+from langchain_openai import ChatOpenAI
+from config import (
+    LLM_MODEL_DEFAULTS,
+    OPENAI_MAX_CONNECTIONS,
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS,
+    OPENAI_TIMEOUT_SECONDS
+)
+from app.utils.resilience import ResilientCaller
+
+
+class LLMClientRegistry:
+    """
+    Owns one keep-alive HTTP connection pool and the LLM clients built on it.
+    
+    OpenAIService and all agents get their clients from here, so concurrent
+    sessions reuse warm TLS connections instead of each client opening its own.
+    The clients do not retry on their own; calls go through `resilience`,
+    which shares one retry policy and circuit breaker across all of them.
+    """
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_connections: int = OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections: int = OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = OPENAI_KEEPALIVE_EXPIRY_SECONDS,
+        timeout: float = OPENAI_TIMEOUT_SECONDS
+    ):
+        """Create the shared connection pools and the raw OpenAI client"""
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("OpenAI API key is required")
+        
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http_client = httpx.Client(limits=limits, timeout=timeout)
+        self.async_http_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        self.client = OpenAI(api_key=self.api_key, http_client=self.http_client, max_retries=0)
+        self.resilience = ResilientCaller()
+        
+        self._chat_models: Dict[Tuple, ChatOpenAI] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    @staticmethod
+    def get_model_defaults(model: str) -> Dict:
+        """Get default request parameters for a model (temperature, max_tokens, ...)"""
+        return dict(LLM_MODEL_DEFAULTS.get(model, {}))
+    
+    def get_chat_model(self, model: str, **overrides) -> ChatOpenAI:
+        """
+        Get a LangChain chat model that shares the registry's connection pool
+        
+        Args:
+            model: Model name (e.g., "gpt-4o-mini")
+            **overrides: Parameters that replace the model defaults
+        
+        Returns:
+            A ChatOpenAI instance, reused for identical model/parameter pairs
+        """
+        params = self.get_model_defaults(model)
+        params.update(overrides)
+        key = (model, tuple(sorted(params.items())))
+        
+        with self._lock:
+            chat_model = self._chat_models.get(key)
+            if chat_model is None:
+                chat_model = ChatOpenAI(
+                    model=model,
+                    api_key=self.api_key,
+                    http_client=self.http_client,
+                    http_async_client=self.async_http_client,
+                    max_retries=0,
+                    **params
+                )
+                self._chat_models[key] = chat_model
+            return chat_model
+    
+    def run_async(self, coro: Awaitable[Any]) -> Any:
+        """
+        Run a coroutine on the registry's event loop and wait for its result
+        
+        The async connection pool is bound to one event loop, so all async LLM
+        calls run on a single background loop owned by the registry rather
+        than on a fresh loop per call.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop()).result()
+    
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Get the background event loop, starting it on first use"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name="llm-client-loop",
+                    daemon=True
+                ).start()
+            return self._loop
+    
+    def close(self):
+        """Close the underlying connection pools"""
+        self.http_client.close()
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self.async_http_client.aclose(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
@@ -0,0 +1,171 @@
+"""Extracts orderable part information from assistant messages"""
+import re
+from typing import Dict, List, Optional
+
+
+# Part blocks written by the troubleshooting prompt:
+# **Part Required:** ... / **Part Number:** ... / **Cost:** $...
+PART_BLOCK_SPLIT_PATTERN = re.compile(r'(?:\*\*)?Part Required(?:\*\*)?:', re.IGNORECASE)
+PART_NAME_PATTERN = re.compile(r'(?:\*\*)?Part Required(?:\*\*)?[:\s]+([^\n]+)', re.IGNORECASE)
+PART_NUMBER_PATTERN = re.compile(r'(?:\*\*)?Part Number(?:\*\*)?[:\s]+([^\n]+)', re.IGNORECASE)
+LENIENT_PART_NAME_PATTERN = re.compile(r'Part Required[:\s]+([^\n]+)', re.IGNORECASE)
+LENIENT_PART_NUMBER_PATTERN = re.compile(r'Part Number[:\s]+([^\n]+)', re.IGNORECASE)
+BOLD_PATTERN = re.compile(r'\*\*')
+DOLLAR_AMOUNT_PATTERN = re.compile(r'\$(\d+(?:\.\d{2})?)')
+
+# Cost patterns, most specific first
+SECTION_COST_PATTERNS = [
+    re.compile(r'\*\*Cost\*\*[:\s]+\$?\s*([\d.]+)', re.IGNORECASE),  # **Cost:** $150
+    re.compile(r'(?:\*\*)?Cost(?:\*\*)?[:\s]+\$?\s*([\d.]+)', re.IGNORECASE),  # Cost: $150 or Cost: 150
+    re.compile(r'Cost[:\s]+\$([\d.]+)', re.IGNORECASE),  # Cost: $150
+    re.compile(r'Cost[:\s]+([\d.]+)', re.IGNORECASE),  # Cost: 150
+    re.compile(r'\$\s*([\d.]+)', re.IGNORECASE)  # Just $150 (anywhere in section)
+]
+CONTENT_COST_PATTERNS = SECTION_COST_PATTERNS[1:4]
+LENIENT_COST_PATTERNS = [
+    re.compile(r'Cost[:\s]+\$?\s*([\d.]+)', re.IGNORECASE),
+    re.compile(r'Cost[:\s]+\$([\d.]+)', re.IGNORECASE),
+    re.compile(r'\$\s*([\d.]+)', re.IGNORECASE),
+    re.compile(r'Cost[:\s]+([\d.]+)', re.IGNORECASE)
+]
+
+# Text offering to order a part
+ORDER_TEXT_PATTERNS = [
+    re.compile(r'If you want to order the part', re.IGNORECASE | re.DOTALL),
+    re.compile(r'Would you like assistance.*?ordering.*?part', re.IGNORECASE | re.DOTALL),
+    re.compile(r'order the part.*?book.*?technician', re.IGNORECASE | re.DOTALL),
+    re.compile(r'order.*?technician.*?bring.*?install', re.IGNORECASE | re.DOTALL)
+]
+
+
+class PartExtractor:
+    """Parses part name, number and cost out of troubleshooting guidance"""
+    
+    @staticmethod
+    def extract(content: str) -> Dict:
+        """
+        Parse a message once, for storing on the message record
+        
+        Returns:
+            Dict with:
+            - parts: list of {"name", "part_number", "price", "order_price"};
+              order_price is the price to charge, re-searched in the whole
+              message when the part block had no cost
+            - has_order_text: whether the message offers to order a part
+            - fallback_part: best-effort part to order when has_order_text is
+              set but no complete part block was found
+        """
+        content = content or ""
+        parts = PartExtractor._extract_part_blocks(content) or PartExtractor._extract_single_part(content)
+        for part in parts:
+            part["order_price"] = part["price"] or PartExtractor._find_order_price(content, part["part_number"])
+        
+        has_order_text = any(pattern.search(content) for pattern in ORDER_TEXT_PATTERNS)
+        return {
+            "parts": parts,
+            "has_order_text": has_order_text,
+            "fallback_part": PartExtractor._extract_fallback_part(content) if has_order_text and not parts else None
+        }
+    
+    @staticmethod
+    def _extract_part_blocks(content: str) -> List[Dict]:
+        """Extract every "Part Required:" block"""
+        parts = []
+        sections = PART_BLOCK_SPLIT_PATTERN.split(content)
+        
+        # Skip the first section, it comes before any "Part Required:"
+        for section in sections[1:]:
+            lines = [line.strip() for line in section.split('\n') if line.strip()]
+            part_name = PartExtractor._clean(lines[0]) if lines else None
+            part_number = PartExtractor._search_clean(PART_NUMBER_PATTERN, section)
+            
+            part_cost = PartExtractor._first_cost(SECTION_COST_PATTERNS, section)
+            
+            # If not found in the section, look near the part number
+            if not part_cost and part_number:
+                nearby_text = PartExtractor._nearby_text(content, part_number, 150, 300)
+                if nearby_text:
+                    part_cost = (
+                        PartExtractor._first_cost(SECTION_COST_PATTERNS, nearby_text)
+                        or PartExtractor._first_dollar_amount(nearby_text)
+                    )
+            
+            if part_name and part_number:
+                parts.append({"name": part_name, "part_number": part_number, "price": part_cost or 0.0})
+        return parts
+    
+    @staticmethod
+    def _extract_single_part(content: str) -> List[Dict]:
+        """Extract one part from loosely formatted text"""
+        part_name = PartExtractor._search_clean(PART_NAME_PATTERN, content)
+        part_number = PartExtractor._search_clean(PART_NUMBER_PATTERN, content)
+        if not part_name or not part_number:
+            return []
+        
+        part_cost = PartExtractor._first_cost(CONTENT_COST_PATTERNS, content)
+        if not part_cost:
+            nearby_text = PartExtractor._nearby_text(content, part_number, 100, 200)
+            if nearby_text:
+                part_cost = PartExtractor._first_cost(CONTENT_COST_PATTERNS, nearby_text)
+        return [{"name": part_name, "part_number": part_number, "price": part_cost or 0.0}]
+    
+    @staticmethod
+    def _find_order_price(content: str, part_number: str) -> float:
+        """Search the whole message for a price for a part whose block had none"""
+        price = PartExtractor._first_cost(CONTENT_COST_PATTERNS, content)
+        if not price and part_number:
+            nearby_text = PartExtractor._nearby_text(content, part_number, 150, 300)
+            if nearby_text:
+                price = PartExtractor._first_dollar_amount(nearby_text)
+        return price or 0.0
+    
+    @staticmethod
+    def _extract_fallback_part(content: str) -> Dict:
+        """Lenient extraction used when the message offers a part without a full block"""
+        return {
+            "name": PartExtractor._search_clean(LENIENT_PART_NAME_PATTERN, content) or "Replacement Part",
+            "part_number": PartExtractor._search_clean(LENIENT_PART_NUMBER_PATTERN, content) or "TBD",
+            "price": PartExtractor._first_cost(LENIENT_COST_PATTERNS, content) or 0.0
+        }
+    
+    @staticmethod
+    def _clean(text: str) -> str:
+        """Remove markdown bold markers"""
+        return BOLD_PATTERN.sub('', text).strip()
+    
+    @staticmethod
+    def _search_clean(pattern: re.Pattern, text: str) -> Optional[str]:
+        """Get the first group of a match, without markdown"""
+        match = pattern.search(text)
+        return PartExtractor._clean(match.group(1)) if match else None
+    
+    @staticmethod
+    def _nearby_text(content: str, needle: str, before: int, after: int) -> Optional[str]:
+        """Get the text around the first occurrence of needle"""
+        position = content.find(needle)
+        if position == -1:
+            return None
+        return content[max(0, position - before):position + after]
+    
+    @staticmethod
+    def _first_cost(patterns: List[re.Pattern], text: str) -> Optional[float]:
+        """Get the first positive cost matched by any pattern, in pattern order"""
+        for pattern in patterns:
+            match = pattern.search(text)
+            if match:
+                try:
+                    cost = float(match.group(1).strip())
+                except ValueError:
+                    continue
+                if cost > 0:
+                    return cost
+        return None
+    
+    @staticmethod
+    def _first_dollar_amount(text: str) -> Optional[float]:
+        """Get the first dollar amount in a reasonable price range"""
+        for amount_str in DOLLAR_AMOUNT_PATTERN.findall(text):
+            amount = float(amount_str)
+            if 1 <= amount <= 10000:
+                return amount
+        return None
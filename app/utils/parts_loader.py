@@ -1,10 +1,72 @@
 """Utility to load parts from image folders based on issue names"""
+import os
 import re
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from PIL import Image
 
 
+# "Part Name - Price $XX.XX" or "Part Name - Price$XX.XX" (extension removed)
+PART_FILENAME_PATTERNS = [
+    re.compile(r'^(.+?)\s*-\s*Price\s*\$\s*([\d.]+)$'),
+    re.compile(r'^(.+?)\s*-\s*Price\$\s*([\d.]+)$')
+]
+
+
+class PartsManifest:
+    """
+    Parsed parts of each issue folder under one base directory.
+    
+    A folder is scanned once and served from memory until its mtime changes
+    (a part image was added, removed or renamed), so repeated lookups cost a
+    single stat() call.
+    """
+    
+    def __init__(self, base_dir: Path):
+        self.base_dir = Path(base_dir)
+        self._folders: Dict[str, Tuple[int, List[Dict]]] = {}
+        self._lock = threading.Lock()
+    
+    def get_parts(self, folder_name: str) -> List[Dict]:
+        """Get the parts in a folder, rescanning only if it changed"""
+        folder_path = self.base_dir / folder_name
+        try:
+            mtime = folder_path.stat().st_mtime_ns
+        except OSError:
+            return []
+        
+        with self._lock:
+            entry = self._folders.get(folder_name)
+            if entry is None or entry[0] != mtime:
+                entry = (mtime, self._scan(folder_path))
+                self._folders[folder_name] = entry
+        
+        # Copies, so callers can't modify the manifest
+        return [dict(part) for part in entry[1]]
+    
+    @staticmethod
+    def _scan(folder_path: Path) -> List[Dict]:
+        """Parse every part image in a folder"""
+        parts = []
+        try:
+            resolved_folder = folder_path.resolve()
+            with os.scandir(folder_path) as entries:
+                for entry in entries:
+                    if not entry.is_file() or Path(entry.name).suffix not in PartsLoader.IMAGE_EXTENSIONS:
+                        continue
+                    part_info = PartsLoader.parse_part_info_from_filename(entry.name)
+                    if part_info:
+                        part_info["image_path"] = str(resolved_folder / entry.name)
+                        parts.append(part_info)
+        except Exception as e:
+            print(f"Error loading parts from {folder_path}: {e}")
+        
+        parts.sort(key=lambda part: part["filename"])
+        return parts
+
+
 class PartsLoader:
     """Loads parts from image folders based on issue names"""
     
@@ -18,25 +80,16 @@ class PartsLoader:
     # Image extensions to look for
     IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG']
     
+    # Process-wide manifests, one per base directory
+    _manifests: Dict[str, PartsManifest] = {}
+    _manifests_lock = threading.Lock()
+    
     @staticmethod
     def get_folder_for_issue(issue_name: str) -> Optional[str]:
-        """Get folder name for a given issue"""
-        # Try exact match first
+        """Get folder name for a given issue (memoized)"""
         if issue_name in PartsLoader.ISSUE_TO_FOLDER:
             return PartsLoader.ISSUE_TO_FOLDER[issue_name]
-        
-        # Try case-insensitive match
-        issue_lower = issue_name.lower()
-        for key, folder in PartsLoader.ISSUE_TO_FOLDER.items():
-            if key.lower() == issue_lower:
-                return folder
-        
-        # Try partial match
-        for key, folder in PartsLoader.ISSUE_TO_FOLDER.items():
-            if key.lower() in issue_lower or issue_lower in key.lower():
-                return folder
-        
-        return None
+        return _match_folder(issue_name)
     
     @staticmethod
     def parse_part_info_from_filename(filename: str) -> Optional[Dict]:
@@ -47,15 +100,11 @@ class PartsLoader:
         # Remove extension
         name_without_ext = Path(filename).stem
         
-        # Pattern to match: "Part Name - Price $XX.XX" or "Part Name - Price$XX.XX"
-        # Handles both with and without space between Price and $
-        pattern = r'^(.+?)\s*-\s*Price\s*\$\s*([\d.]+)$'
-        match = re.match(pattern, name_without_ext)
-        
-        # If first pattern doesn't match, try without space between Price and $
-        if not match:
-            pattern = r'^(.+?)\s*-\s*Price\$\s*([\d.]+)$'
-            match = re.match(pattern, name_without_ext)
+        match = None
+        for pattern in PART_FILENAME_PATTERNS:
+            match = pattern.match(name_without_ext)
+            if match:
+                break
         
         if match:
             part_name = match.group(1).strip()
@@ -65,7 +114,7 @@ class PartsLoader:
                     "name": part_name,
                     "price": price,
                     "filename": filename
-            }
+                }
             except ValueError:
                 return None
         
@@ -83,33 +132,42 @@ class PartsLoader:
         Returns:
             List of part dictionaries with name, price, filename, and image_path
         """
-        if base_dir is None:
-            base_dir = Path.cwd()
-        
         folder_name = PartsLoader.get_folder_for_issue(issue_name)
         if not folder_name:
             return []
         
-        folder_path = base_dir / folder_name
-        if not folder_path.exists():
-            return []
-        
-        parts = []
-        
-        try:
-            for file_path in folder_path.iterdir():
-                if file_path.is_file() and file_path.suffix in PartsLoader.IMAGE_EXTENSIONS:
-                    part_info = PartsLoader.parse_part_info_from_filename(file_path.name)
-                    if part_info:
-                        part_info["image_path"] = str(file_path.resolve())
-                        parts.append(part_info)
-        except Exception as e:
-            print(f"Error loading parts from {folder_path}: {e}")
+        return PartsLoader.get_manifest(base_dir).get_parts(folder_name)
+    
+    @staticmethod
+    def get_manifest(base_dir: Optional[Path] = None) -> PartsManifest:
+        """Get the shared parts manifest for a base directory"""
+        if base_dir is None:
+            base_dir = Path.cwd()
         
-        return parts
+        key = str(base_dir)
+        with PartsLoader._manifests_lock:
+            manifest = PartsLoader._manifests.get(key)
+            if manifest is None:
+                manifest = PartsManifest(base_dir)
+                PartsLoader._manifests[key] = manifest
+            return manifest
     
     @staticmethod
     def is_special_issue(issue_name: str) -> bool:
         """Check if this is one of the special issues with part images"""
         return PartsLoader.get_folder_for_issue(issue_name) is not None
 
+
+@lru_cache(maxsize=1024)
+def _match_folder(issue_name: str) -> Optional[str]:
+    """Case-insensitive, then partial match of an issue name to a folder"""
+    issue_lower = issue_name.lower()
+    for key, folder in PartsLoader.ISSUE_TO_FOLDER.items():
+        if key.lower() == issue_lower:
+            return folder
+    
+    for key, folder in PartsLoader.ISSUE_TO_FOLDER.items():
+        if key.lower() in issue_lower or issue_lower in key.lower():
+            return folder
+    
+    return None
@@ -0,0 +1,224 @@
+"""Process-wide key/value cache with an in-memory LRU and an on-disk JSON tier"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+# Caches with unsaved changes are flushed at exit (weakly held, so a dropped
+# cache is not kept alive)
+_open_caches: "weakref.WeakSet[PersistentCache]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open_caches():
+    for cache in list(_open_caches):
+        cache.flush()
+
+
+class PersistentCache:
+    """
+    Thread-safe LRU cache that is mirrored to a JSON file.
+    
+    Entries expire after ttl_seconds. The file is loaded lazily on first
+    access. Changes are written back at most once per flush_seconds, from a
+    timer thread rather than the caller, and at exit; each write replaces
+    the file atomically (temp file + rename), so the cache survives
+    restarts as long as its directory is persisted. Values must be JSON
+    serializable.
+    """
+    
+    def __init__(
+        self,
+        file_path: Path,
+        max_entries: int = 1000,
+        ttl_seconds: Optional[float] = None,
+        flush_seconds: float = 5.0
+    ):
+        """
+        Initialize cache
+        
+        Args:
+            file_path: JSON file backing the cache (None keeps it in memory only)
+            max_entries: Maximum number of entries kept
+            ttl_seconds: Entry lifetime in seconds (None never expires)
+            flush_seconds: Delay before changes are written to disk
+        """
+        self.file_path = Path(file_path) if file_path else None
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.flush_seconds = flush_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._flush_timer: Optional[threading.Timer] = None
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None if missing or expired"""
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(key)
+            if entry is None or self._is_expired(entry):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["value"]
+    
+    def peek(self, key: str) -> Optional[Any]:
+        """Get a cached value without counting a hit or miss or refreshing its LRU position"""
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(key)
+            if entry is None or self._is_expired(entry):
+                return None
+            return entry["value"]
+    
+    def set(self, key: str, value: Any):
+        """Store a value (written to disk by the next flush)"""
+        with self._lock:
+            self._ensure_loaded()
+            self._entries[key] = {"value": value, "stored_at": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._schedule_flush()
+    
+    def delete(self, key: str):
+        """Remove a value if present"""
+        with self._lock:
+            self._ensure_loaded()
+            if self._entries.pop(key, None) is not None:
+                self._schedule_flush()
+    
+    def clear(self):
+        """Remove all values and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._loaded = True
+            self.hits = 0
+            self.misses = 0
+            self._schedule_flush()
+    
+    def flush(self):
+        """Write pending changes to disk now"""
+        # The write lock is taken first so snapshots reach the disk in order
+        with self._write_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                try:
+                    data = json.dumps(self._entries, separators=(",", ":"), ensure_ascii=False)
+                except (TypeError, ValueError) as e:
+                    print(f"Warning: could not serialize cache for {self.file_path}: {e}")
+                    return
+            
+            # Written outside the cache lock, so readers are not blocked by the disk
+            self._write(data)
+    
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Iterate over (key, value) pairs that have not expired"""
+        with self._lock:
+            self._ensure_loaded()
+            snapshot = [
+                (key, entry["value"])
+                for key, entry in self._entries.items()
+                if not self._is_expired(entry)
+            ]
+        return iter(snapshot)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and size"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries)
+            }
+    
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._entries)
+    
+    def _is_expired(self, entry: Dict[str, Any]) -> bool:
+        """Check whether an entry is past its TTL"""
+        if self.ttl_seconds is None:
+            return False
+        return time.time() - entry.get("stored_at", 0) > self.ttl_seconds
+    
+    def _ensure_loaded(self):
+        """Load entries from disk on first access (caller holds the lock)"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.file_path or not self.file_path.exists():
+            return
+        
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: ignoring unreadable cache file {self.file_path}: {e}")
+            return
+        
+        if not isinstance(data, dict):
+            return
+        
+        # Oldest first, so the LRU order matches the stored order
+        entries = [
+            (key, entry) for key, entry in data.items()
+            if isinstance(entry, dict) and "value" in entry and not self._is_expired(entry)
+        ]
+        entries.sort(key=lambda item: item[1].get("stored_at", 0))
+        for key, entry in entries[-self.max_entries:]:
+            self._entries[key] = entry
+    
+    def _schedule_flush(self):
+        """Mark the cache as changed and start the flush timer (caller holds the lock)"""
+        if not self.file_path:
+            return
+        self._dirty = True
+        _open_caches.add(self)
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_seconds, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def _write(self, data: str):
+        """Replace the cache file with data atomically (caller holds the write lock)"""
+        tmp_path = None
+        try:
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.file_path.parent, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.file_path)
+            tmp_path = None
+        except OSError as e:
+            print(f"Warning: could not persist cache to {self.file_path}: {e}")
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
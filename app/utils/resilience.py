@@ -0,0 +1,308 @@
+"""Deadline-aware retries, hedged requests and a circuit breaker for LLM calls"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, Optional
+import openai
+from config import (
+    LLM_FLOW_BUDGETS_SECONDS,
+    LLM_DEFAULT_BUDGET_SECONDS,
+    LLM_RETRY_MAX_ATTEMPTS,
+    LLM_RETRY_BASE_DELAY_SECONDS,
+    LLM_RETRY_MAX_DELAY_SECONDS,
+    LLM_HEDGING_ENABLED,
+    LLM_HEDGE_MIN_SAMPLES,
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_RESET_SECONDS
+)
+
+
+class LLMUnavailableError(Exception):
+    """Raised when an LLM call is refused by the breaker or misses its deadline"""
+    pass
+
+
+def is_retryable(error: Exception) -> bool:
+    """Check whether an error is worth retrying (429, 5xx, timeouts, connection errors)"""
+    if isinstance(error, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500
+    return False
+
+
+class CircuitBreaker:
+    """
+    Fails fast while the provider is unhealthy.
+    
+    Opens after failure_threshold consecutive failures. While open, calls are
+    refused until reset_seconds have passed; then one trial call is let
+    through and its outcome closes or re-opens the breaker.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        reset_seconds: float = CIRCUIT_BREAKER_RESET_SECONDS
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+    
+    def allow_request(self) -> bool:
+        """Check whether a call may be made now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+    
+    def record_success(self):
+        """Record a completed call"""
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        """Record a failed call"""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Rolling window of call durations per flow"""
+    
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+    
+    def record(self, flow: str, duration: float):
+        """Add a duration sample"""
+        with self._lock:
+            self._samples.setdefault(flow, deque(maxlen=self.window)).append(duration)
+    
+    def percentile(self, flow: str, pct: float, min_samples: int = 1) -> Optional[float]:
+        """Get a latency percentile, or None with fewer than min_samples samples"""
+        with self._lock:
+            samples = sorted(self._samples.get(flow, ()))
+        if len(samples) < max(min_samples, 1):
+            return None
+        index = min(int(len(samples) * pct / 100), len(samples) - 1)
+        return samples[index]
+
+
+class ResilientCaller:
+    """
+    Runs LLM calls under a per-flow latency budget.
+    
+    Each call is retried with jittered exponential backoff on retryable
+    errors, optionally hedged (a duplicate request is sent once the first
+    has been outstanding for longer than the flow's p95) and guarded by a
+    shared circuit breaker. When the budget runs out or the breaker is open,
+    LLMUnavailableError is raised so the caller can degrade to cached or
+    knowledge-base answers.
+    
+    A call is only too slow when it overruns its own flow's budget, which
+    counts as a breaker failure; long but normal completions (gpt-4o
+    troubleshooting or vision) within budget do not. Each request is given
+    the time left before the deadline as its HTTP timeout, so requests
+    abandoned at the deadline also stop and free their worker.
+    """
+    
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, float]] = None,
+        max_attempts: int = LLM_RETRY_MAX_ATTEMPTS,
+        base_delay: float = LLM_RETRY_BASE_DELAY_SECONDS,
+        max_delay: float = LLM_RETRY_MAX_DELAY_SECONDS,
+        hedging_enabled: bool = LLM_HEDGING_ENABLED,
+        hedge_min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.budgets = dict(LLM_FLOW_BUDGETS_SECONDS if budgets is None else budgets)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedging_enabled = hedging_enabled
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = LatencyTracker()
+        self._executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-call")
+    
+    def get_budget(self, flow: str) -> float:
+        """Get the latency budget in seconds for a flow"""
+        return self.budgets.get(flow, LLM_DEFAULT_BUDGET_SECONDS)
+    
+    def call(self, flow: str, fn: Callable[[float], Any], hedge: bool = True) -> Any:
+        """
+        Run fn(timeout) within the flow's budget
+        
+        Args:
+            flow: Flow name used for the budget and latency stats
+            fn: Function making one LLM request; it is passed the seconds left
+                before the deadline and must use them as the request timeout
+            hedge: Allow hedged duplicates (only for idempotent requests)
+        
+        Returns:
+            The result of fn()
+        """
+        deadline = time.monotonic() + self.get_budget(flow)
+        attempt = 0
+        while True:
+            attempt += 1
+            self._check_breaker(flow)
+            started = time.monotonic()
+            try:
+                result = self._call_with_deadline(flow, fn, deadline, hedge)
+            except Exception as e:
+                delay = self._backoff_delay(attempt, deadline)
+                if not self._should_retry(e, attempt, delay, deadline):
+                    raise
+                time.sleep(delay)
+                continue
+            self._record_success(flow, time.monotonic() - started)
+            return result
+    
+    async def acall(self, flow: str, coro_fn: Callable[[float], Awaitable[Any]], hedge: bool = True) -> Any:
+        """Async version of call(); coro_fn(timeout) returns a new coroutine per request"""
+        deadline = time.monotonic() + self.get_budget(flow)
+        attempt = 0
+        while True:
+            attempt += 1
+            self._check_breaker(flow)
+            started = time.monotonic()
+            try:
+                result = await self._acall_with_deadline(flow, coro_fn, deadline, hedge)
+            except Exception as e:
+                delay = self._backoff_delay(attempt, deadline)
+                if not self._should_retry(e, attempt, delay, deadline):
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self._record_success(flow, time.monotonic() - started)
+            return result
+    
+    def _call_with_deadline(self, flow: str, fn: Callable[[float], Any], deadline: float, hedge: bool) -> Any:
+        """Run one (possibly hedged) request in the worker pool, bounded by the deadline"""
+        futures = {self._executor.submit(self._run_with_timeout, fn, deadline)}
+        hedge_after = self._hedge_delay(flow) if hedge else None
+        
+        if hedge_after is not None and hedge_after < deadline - time.monotonic():
+            done, _ = wait(futures, timeout=hedge_after)
+            if not done:
+                futures.add(self._executor.submit(self._run_with_timeout, fn, deadline))
+        
+        while futures:
+            done, futures = wait(futures, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                self.breaker.record_failure()
+                raise LLMUnavailableError(f"{flow} call exceeded its {self.get_budget(flow):.0f}s budget")
+            
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+            if not futures:
+                raise done.pop().exception()
+    
+    async def _acall_with_deadline(
+        self,
+        flow: str,
+        coro_fn: Callable[[float], Awaitable[Any]],
+        deadline: float,
+        hedge: bool
+    ) -> Any:
+        """Async version of _call_with_deadline()"""
+        tasks = {asyncio.ensure_future(coro_fn(self._time_left(deadline)))}
+        hedge_after = self._hedge_delay(flow) if hedge else None
+        
+        try:
+            if hedge_after is not None and hedge_after < deadline - time.monotonic():
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                if not done:
+                    tasks.add(asyncio.ensure_future(coro_fn(self._time_left(deadline))))
+            
+            while tasks:
+                done, tasks = await asyncio.wait(
+                    tasks,
+                    timeout=max(deadline - time.monotonic(), 0),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    self.breaker.record_failure()
+                    raise LLMUnavailableError(f"{flow} call exceeded its {self.get_budget(flow):.0f}s budget")
+                
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                if not tasks:
+                    raise done.pop().exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    @staticmethod
+    def _time_left(deadline: float) -> float:
+        """Seconds until the deadline, as a request timeout (never zero, which httpx treats as no time at all)"""
+        return max(deadline - time.monotonic(), 0.1)
+    
+    def _run_with_timeout(self, fn: Callable[[float], Any], deadline: float) -> Any:
+        """Worker: make the request with the time left when it actually starts"""
+        if time.monotonic() >= deadline:
+            # Queued behind other calls until the caller gave up: do not send it
+            raise LLMUnavailableError("LLM call was abandoned before it started")
+        return fn(self._time_left(deadline))
+    
+    def _check_breaker(self, flow: str):
+        """Refuse the call while the breaker is open"""
+        if not self.breaker.allow_request():
+            raise LLMUnavailableError(f"LLM provider unavailable (circuit open), skipping {flow} call")
+    
+    def _should_retry(self, error: Exception, attempt: int, delay: float, deadline: float) -> bool:
+        """Record a failure and decide whether another attempt after sleeping delay fits the budget"""
+        if isinstance(error, LLMUnavailableError):
+            return False
+        if not is_retryable(error):
+            # The provider answered (e.g. a 400), so it is not unhealthy
+            self.breaker.record_success()
+            return False
+        
+        self.breaker.record_failure()
+        return attempt < self.max_attempts and delay < deadline - time.monotonic()
+    
+    def _backoff_delay(self, attempt: int, deadline: float) -> float:
+        """Full-jitter exponential backoff, capped by max_delay and the time left"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+        return min(delay, max(deadline - time.monotonic(), 0))
+    
+    def _hedge_delay(self, flow: str) -> Optional[float]:
+        """Get how long to wait before sending a hedged request, or None to not hedge"""
+        if not self.hedging_enabled:
+            return None
+        return self.latencies.percentile(flow, 95, self.hedge_min_samples)
+    
+    def _record_success(self, flow: str, duration: float):
+        """Update latency stats and the breaker after a successful call"""
+        self.latencies.record(flow, duration)
+        self.breaker.record_success()
@@ -1,7 +1,10 @@
 import streamlit as st
 from typing import Dict, Any, Optional
+from config import CHAT_WINDOW_SIZE, CHAT_WINDOW_PAGE_SIZE
 from app.models.appliance import Appliance
 from app.models.problem import Problem, Part
+from app.utils.conversation_memory import ConversationMemory
+from app.utils.part_extractor import PartExtractor
 
 
 class StateManager:
@@ -14,6 +17,9 @@ class StateManager:
     FLOW_BOOKING = "booking"
     FLOW_PART_ORDERING = "part_ordering"
     
+    # Text of the assistant message that offers DIY or booking a technician
+    PROCEED_PROMPT_TEXT = "How would you like to proceed"
+    
     @staticmethod
     def initialize():
         """Initialize all session state variables"""
@@ -29,8 +35,6 @@ class StateManager:
             st.session_state.suggested_parts = []
         if "booking_info" not in st.session_state:
             st.session_state.booking_info = {}
-        if "vision_cache" not in st.session_state:
-            st.session_state.vision_cache = {}
         if "troubleshooting_steps" not in st.session_state:
             st.session_state.troubleshooting_steps = []
         if "processed_images" not in st.session_state:
@@ -121,33 +125,58 @@ class StateManager:
         st.session_state.booking_info = info
     
     @staticmethod
-    def add_message(role: str, content: str, image: Optional[bytes] = None):
-        """Add message to chat history"""
+    def add_message(role: str, content: str, image_ref: Optional[str] = None):
+        """Add message to chat history (images are referenced by BlobStore key)"""
         message = {"role": role, "content": content}
-        if image:
-            message["image"] = image
+        if image_ref:
+            message["image_ref"] = image_ref
+        if role == "assistant":
+            message["order_parts"] = PartExtractor.extract(content)
+            if StateManager.PROCEED_PROMPT_TEXT in content:
+                st.session_state.has_proceed_prompt = True
         st.session_state.messages.append(message)
+        StateManager.get_conversation_memory().add_message(role, content)
     
     @staticmethod
-    def get_messages() -> list:
-        """Get all messages"""
-        return st.session_state.get("messages", [])
+    def has_proceed_prompt() -> bool:
+        """Check whether any assistant message offered DIY or booking (O(1))"""
+        return st.session_state.get("has_proceed_prompt", False)
     
     @staticmethod
-    def cache_vision_result(image_hash: str, text: str, info: Dict):
-        """Cache vision API result"""
-        if "vision_cache" not in st.session_state:
-            st.session_state.vision_cache = {}
-        st.session_state.vision_cache[image_hash] = {
-            "text": text,
-            "info": info
-        }
+    def get_chat_window_start() -> int:
+        """Get the index of the first message to render in the chat view"""
+        window_size = st.session_state.get("chat_window_size", CHAT_WINDOW_SIZE)
+        return max(0, len(StateManager.get_messages()) - window_size)
+    
+    @staticmethod
+    def load_earlier_messages():
+        """Grow the chat view by one page of earlier messages"""
+        window_size = st.session_state.get("chat_window_size", CHAT_WINDOW_SIZE)
+        st.session_state.chat_window_size = window_size + CHAT_WINDOW_PAGE_SIZE
+    
+    @staticmethod
+    def get_message_order_parts(message: Dict) -> Dict:
+        """Get the parts parsed from an assistant message (see PartExtractor.extract)"""
+        if "order_parts" not in message:
+            message["order_parts"] = PartExtractor.extract(message.get("content", ""))
+        return message["order_parts"]
+    
+    @staticmethod
+    def get_conversation_memory() -> ConversationMemory:
+        """Get the running conversation summary, creating it if needed"""
+        if "conversation_memory" not in st.session_state:
+            st.session_state.conversation_memory = ConversationMemory()
+        return st.session_state.conversation_memory
+    
+    @staticmethod
+    def get_conversation_summary() -> str:
+        """Get the compact conversation summary used in LLM prompts"""
+        return StateManager.get_conversation_memory().to_text()
     
     @staticmethod
-    def get_cached_vision_result(image_hash: str) -> Optional[Dict]:
-        """Get cached vision API result"""
-        cache = st.session_state.get("vision_cache", {})
-        return cache.get(image_hash)
+    def get_messages() -> list:
+        """Get all messages"""
+        return st.session_state.get("messages", [])
     
     @staticmethod
     def is_image_processed(image_hash: str) -> bool:
@@ -162,6 +191,11 @@ class StateManager:
             st.session_state.processed_images = set()
         st.session_state.processed_images.add(image_hash)
     
+    @staticmethod
+    def get_processed_images() -> set:
+        """Get content hashes of the images processed in this session"""
+        return set(st.session_state.get("processed_images", set()))
+    
     @staticmethod
     def get_common_issues() -> list:
         """Get common issues list"""
@@ -172,6 +206,27 @@ class StateManager:
         """Set common issues list"""
         st.session_state.common_issues = issues
     
+    @staticmethod
+    def get_prefetched_issues(appliance: Appliance) -> Optional[list]:
+        """Get agent issues prefetched during type detection for this appliance"""
+        prefetched = st.session_state.get("prefetched_issues")
+        if not prefetched or prefetched.get("key") != StateManager._appliance_key(appliance):
+            return None
+        return prefetched.get("issues")
+    
+    @staticmethod
+    def set_prefetched_issues(appliance: Appliance, issues: list):
+        """Store agent issues prefetched during type detection"""
+        st.session_state.prefetched_issues = {
+            "key": StateManager._appliance_key(appliance),
+            "issues": issues
+        }
+    
+    @staticmethod
+    def _appliance_key(appliance: Appliance) -> tuple:
+        """Identify an appliance by type, brand and model"""
+        return (appliance.appliance_type, appliance.brand, appliance.model)
+    
     @staticmethod
     def get_issue_summary() -> str:
         """Get issue summary"""
@@ -0,0 +1,134 @@
+"""Right-sized, cached thumbnails of the static part and nameplate images"""
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+from PIL import Image, ImageOps
+from app.utils.image_utils import ImageUtils
+
+
+class ThumbnailService:
+    """
+    Serves downscaled JPEG thumbnails of image files.
+    
+    Thumbnails are named after the source file's content hash and stored in
+    cache_dir, so they are generated once per image (and size) across
+    restarts. Encoded bytes are also kept in a memory LRU keyed by path,
+    mtime and size, which makes a warm lookup a single stat() call. On a cold
+    cache, get_many() decodes the missing images in parallel.
+    """
+    
+    def __init__(
+        self,
+        cache_dir: Optional[Path],
+        max_size: Tuple[int, int] = (480, 480),
+        max_memory_entries: int = 256,
+        max_workers: int = 4,
+        quality: int = 85
+    ):
+        """
+        Initialize service
+        
+        Args:
+            cache_dir: Directory for generated thumbnails (None keeps them in memory only)
+            max_size: Bounding box of the thumbnails
+            max_memory_entries: Maximum number of thumbnails kept in memory
+            max_workers: Threads used to generate thumbnails on a cold cache
+            quality: JPEG quality
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_size = max_size
+        self.max_memory_entries = max_memory_entries
+        self.quality = quality
+        self._memory: "OrderedDict[Tuple[str, int, int], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="thumbnail")
+    
+    def get(self, image_path: Union[str, Path]) -> Optional[bytes]:
+        """Get the thumbnail of an image file, or None if it cannot be read"""
+        key = self._memory_key(image_path)
+        if key is None:
+            return None
+        
+        with self._lock:
+            thumbnail = self._memory.get(key)
+            if thumbnail is not None:
+                self._memory.move_to_end(key)
+                return thumbnail
+        
+        thumbnail = self._load_or_create(Path(image_path))
+        if thumbnail is not None:
+            with self._lock:
+                self._memory[key] = thumbnail
+                while len(self._memory) > self.max_memory_entries:
+                    self._memory.popitem(last=False)
+        return thumbnail
+    
+    def get_many(self, image_paths: Sequence[Union[str, Path]]) -> List[Optional[bytes]]:
+        """Get thumbnails of several images, generating missing ones in parallel"""
+        return list(self._executor.map(self.get, image_paths))
+    
+    def _memory_key(self, image_path: Union[str, Path]) -> Optional[Tuple[str, int, int]]:
+        """Key a file by path, mtime and size, so edited files are picked up"""
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        return str(image_path), stat.st_mtime_ns, stat.st_size
+    
+    def _load_or_create(self, image_path: Path) -> Optional[bytes]:
+        """Read the thumbnail from disk, generating it if needed"""
+        try:
+            data = image_path.read_bytes()
+        except OSError as e:
+            print(f"Warning: could not read image {image_path}: {e}")
+            return None
+        
+        width, height = self.max_size
+        thumbnail_path = None
+        if self.cache_dir:
+            thumbnail_path = self.cache_dir / f"{ImageUtils.get_image_hash(data)}_{width}x{height}.jpg"
+            try:
+                return thumbnail_path.read_bytes()
+            except OSError:
+                pass
+        
+        thumbnail = self._make_thumbnail(data)
+        if thumbnail is not None and thumbnail_path is not None:
+            self._save(thumbnail_path, thumbnail)
+        return thumbnail
+    
+    def _make_thumbnail(self, data: bytes) -> Optional[bytes]:
+        """Downscale an image to a JPEG, flattening transparency onto white"""
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image.draft("RGB", self.max_size)
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail(self.max_size)
+                if image.mode in ("RGBA", "LA", "P"):
+                    image = image.convert("RGBA")
+                    background = Image.new("RGB", image.size, (255, 255, 255))
+                    background.paste(image, mask=image.getchannel("A"))
+                    image = background
+                
+                output = io.BytesIO()
+                image.convert("RGB").save(output, format="JPEG", quality=self.quality, optimize=True)
+                return output.getvalue()
+        except Exception as e:
+            print(f"Warning: could not create thumbnail: {e}")
+            return None
+    
+    def _save(self, thumbnail_path: Path, thumbnail: bytes):
+        """Write a thumbnail atomically"""
+        try:
+            thumbnail_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=thumbnail_path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(thumbnail)
+            os.replace(tmp_path, thumbnail_path)
+        except OSError as e:
+            print(f"Warning: could not save thumbnail {thumbnail_path}: {e}")
@@ -0,0 +1,109 @@
+"""
+Benchmark: booking save latency as the booking history grows
+
+Seeds a bookings.json snapshot with N records, then times
+BookingRepository.save() (append to the JSON-lines log) and compares it with
+the previous full-file rewrite (load every booking, append one, rewrite
+bookings.json with indent=2). The rewrite is timed on a smaller history,
+since at N records a single save takes seconds. Pass an fsync interval to
+time saves that do not wait for their own fsync.
+
+Run from the project root:
+    python benchmarks/bench_booking_log.py [records] [saves] [fsync_interval]
+"""
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.appliance import Appliance  # noqa: E402
+from app.models.booking import Booking, CostBreakdown, TimeSlot  # noqa: E402
+from app.repositories.booking_repository import BookingRepository  # noqa: E402
+
+LEGACY_RECORDS = 10000
+
+
+def make_booking(index: int) -> Booking:
+    """Build a realistic booking"""
+    slot_time = datetime(2026, 1, 1, 9, 0)
+    return Booking(
+        booking_id=f"BK{index:08d}",
+        timestamp=datetime.now(),
+        appliance=Appliance(brand="Samsung", model="RF28R7351SG", serial="0B7K4BBM", appliance_type="Refrigerator"),
+        problem="Water leaking from the bottom of the fridge onto the kitchen floor",
+        customer_name="Alex Doe",
+        customer_phone="555-0100",
+        customer_address="1 Main Street, Springfield",
+        time_slot=TimeSlot(date="2026-01-01", time="9:00 AM", datetime=slot_time),
+        cost=CostBreakdown(technician_fee=125.0, parts_total=41.95),
+        technician_id="T001",
+        technician_name="Jordan Smith"
+    )
+
+
+def seed_snapshot(file_path: Path, records: int):
+    """Write a snapshot of records bookings"""
+    template = make_booking(0).to_dict()
+    data = []
+    for index in range(records):
+        record = dict(template)
+        record["booking_id"] = f"BK{index:08d}"
+        data.append(record)
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def legacy_save(file_path: Path, booking: Booking):
+    """The previous BookingRepository.save(): rewrite the whole file"""
+    with open(file_path, "r", encoding="utf-8") as f:
+        bookings = [Booking.from_dict(b) for b in json.load(f)]
+    bookings.append(booking)
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump([b.to_dict() for b in bookings], f, indent=2)
+
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    saves = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    fsync_interval = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    
+    with tempfile.TemporaryDirectory() as data_dir:
+        snapshot = Path(data_dir) / "bookings.json"
+        seed_snapshot(snapshot, records)
+        repo = BookingRepository(str(snapshot), compact_threshold=saves + 1, fsync_interval=fsync_interval)
+        bookings = [make_booking(records + index) for index in range(saves)]
+        
+        latencies = []
+        for booking in bookings:
+            start = time.perf_counter()
+            repo.save(booking)
+            latencies.append(time.perf_counter() - start)
+        repo.flush()
+        latencies.sort()
+        
+        start = time.perf_counter()
+        repo.compact()
+        compact_s = time.perf_counter() - start
+        repo.close()
+        
+        legacy_snapshot = Path(data_dir) / "legacy.json"
+        seed_snapshot(legacy_snapshot, min(records, LEGACY_RECORDS))
+        start = time.perf_counter()
+        legacy_save(legacy_snapshot, bookings[0])
+        legacy_ms = (time.perf_counter() - start) * 1000
+        
+        print(f"Existing bookings:          {records}")
+        print(f"fsync interval:             {fsync_interval:10.3f} s")
+        print(f"Log save mean:              {sum(latencies) / saves * 1000:10.3f} ms")
+        print(f"Log save p50:               {latencies[saves // 2] * 1000:10.3f} ms")
+        print(f"Log save p99:               {latencies[int(saves * 0.99)] * 1000:10.3f} ms")
+        print(f"Background compaction:      {compact_s:10.2f} s")
+        print(f"Full rewrite at {min(records, LEGACY_RECORDS):>7}:     {legacy_ms:10.3f} ms per save")
+
+
+if __name__ == "__main__":
+    main()
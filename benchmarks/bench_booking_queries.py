@@ -0,0 +1,121 @@
+"""
+Benchmark: booking lookups by technician, day and customer phone
+
+Seeds a bookings.json snapshot with N records spread over technicians, days
+and customers, then times one page of each query through the indexes of
+BookingRepository and SqliteBookingRepository, against the previous approach
+of load_all() plus filtering in Python. Also checks that both stores return
+the same bookings.
+
+Run from the project root:
+    python benchmarks/bench_booking_queries.py [records]
+"""
+import json
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench_booking_log import make_booking  # noqa: E402
+from app.repositories.booking_repository import BookingRepository  # noqa: E402
+from app.repositories.sqlite_booking_repository import SqliteBookingRepository  # noqa: E402
+
+TECHNICIANS = 50
+CUSTOMERS = 20000
+DAYS = 180
+PAGE_SIZE = 20
+QUERIES = 200
+
+
+def seed_snapshot(file_path: Path, records: int):
+    """Write a snapshot of records bookings over technicians, days and customers"""
+    template = make_booking(0).to_dict()
+    first_day = datetime(2026, 1, 1, 8, 0)
+    data = []
+    for index in range(records):
+        slot = first_day + timedelta(days=index % DAYS, minutes=30 * (index % 20))
+        record = dict(template)
+        record["booking_id"] = f"BK{index:08d}"
+        record["technician_id"] = f"T{index % TECHNICIANS:03d}"
+        record["customer"] = dict(template["customer"], phone=f"(555) 01-{index % CUSTOMERS:05d}")
+        record["time_slot"] = dict(template["time_slot"], date=slot.date().isoformat(), datetime=slot.isoformat())
+        data.append(record)
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def time_queries(label: str, query, runs: int = QUERIES) -> float:
+    """Run query(i) runs times and print the median latency in ms"""
+    latencies = []
+    for i in range(runs):
+        start = time.perf_counter()
+        query(i)
+        latencies.append((time.perf_counter() - start) * 1000)
+    median = statistics.median(latencies)
+    print(f"  {label:<44} {median:9.3f} ms")
+    return median
+
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    start = datetime(2026, 2, 1)
+    end = datetime(2026, 3, 1)
+    
+    with tempfile.TemporaryDirectory() as data_dir:
+        snapshot = Path(data_dir) / "bookings.json"
+        seed_snapshot(snapshot, records)
+        
+        repo = BookingRepository(str(snapshot))
+        load_start = time.perf_counter()
+        repo.count()
+        print(f"{records} bookings, JSON store loaded and indexed in {time.perf_counter() - load_start:.2f} s")
+        
+        sqlite_repo = SqliteBookingRepository(str(Path(data_dir) / "bookings.db"), str(snapshot))
+        sqlite_repo.count()
+        
+        def technician(i):
+            return f"T{i % TECHNICIANS:03d}"
+        
+        def phone(i):
+            return f"555 01 {i % CUSTOMERS:05d}"
+        
+        def day(i):
+            return date(2026, 1, 1) + timedelta(days=i % DAYS)
+        
+        for i in range(5):
+            for store in (repo, sqlite_repo):
+                assert [b.booking_id for b in store.by_technician(technician(i), start, end, limit=PAGE_SIZE)] == \
+                    [b.booking_id for b in repo.by_technician(technician(i), start, end, limit=PAGE_SIZE)]
+                assert [b.booking_id for b in store.by_phone(phone(i))] == [b.booking_id for b in repo.by_phone(phone(i))]
+                assert [b.booking_id for b in store.by_day(day(i), offset=PAGE_SIZE, limit=PAGE_SIZE)] == \
+                    [b.booking_id for b in repo.by_day(day(i), offset=PAGE_SIZE, limit=PAGE_SIZE)]
+        print("JSON and SQLite stores return the same pages")
+        
+        print(f"\nOne page ({PAGE_SIZE} bookings), median of {QUERIES}:")
+        time_queries("JSON index: technician + date range", lambda i: repo.by_technician(technician(i), start, end, limit=PAGE_SIZE))
+        time_queries("JSON index: day", lambda i: repo.by_day(day(i), limit=PAGE_SIZE))
+        time_queries("JSON index: phone", lambda i: repo.by_phone(phone(i), limit=PAGE_SIZE))
+        time_queries("SQLite: technician + date range", lambda i: sqlite_repo.by_technician(technician(i), start, end, limit=PAGE_SIZE))
+        time_queries("SQLite: day", lambda i: sqlite_repo.by_day(day(i), limit=PAGE_SIZE))
+        time_queries("SQLite: phone", lambda i: sqlite_repo.by_phone(phone(i), limit=PAGE_SIZE))
+        
+        print("\nPrevious approach, load_all() + filter:")
+        time_queries(
+            "load_all: technician + date range",
+            lambda i: [
+                b for b in repo.load_all()
+                if b.technician_id == technician(i) and start <= b.time_slot.datetime < end
+            ][:PAGE_SIZE],
+            runs=3
+        )
+        
+        repo.close()
+        sqlite_repo.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: parts lookup per rerun
+
+Compares PartsLoader.load_parts_for_issue() (cached manifest, one stat() per
+call) with the previous per-call directory scan (iterdir, two regexes per
+filename and resolve() for every image), using the part folders in the
+project root and a fuzzy-matched issue name.
+
+Run from the project root:
+    python benchmarks/bench_parts_manifest.py [iterations]
+"""
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import BASE_DIR  # noqa: E402
+from app.utils.parts_loader import PartsLoader  # noqa: E402
+
+ISSUES = ["Lights Not Working Inside", "water leakage inside / outside", "Door not sealing"]
+
+
+def scan_per_call(issue_name: str, base_dir: Path) -> list:
+    """The directory scan load_parts_for_issue() used to run on every call"""
+    issue_lower = issue_name.lower()
+    folder_name = PartsLoader.ISSUE_TO_FOLDER.get(issue_name)
+    if not folder_name:
+        for key, folder in PartsLoader.ISSUE_TO_FOLDER.items():
+            if key.lower() == issue_lower:
+                folder_name = folder
+                break
+    if not folder_name:
+        for key, folder in PartsLoader.ISSUE_TO_FOLDER.items():
+            if key.lower() in issue_lower or issue_lower in key.lower():
+                folder_name = folder
+                break
+    if not folder_name:
+        return []
+    
+    folder_path = base_dir / folder_name
+    if not folder_path.exists():
+        return []
+    
+    parts = []
+    for file_path in folder_path.iterdir():
+        if file_path.is_file() and file_path.suffix in PartsLoader.IMAGE_EXTENSIONS:
+            name_without_ext = Path(file_path.name).stem
+            match = re.match(r'^(.+?)\s*-\s*Price\s*\$\s*([\d.]+)$', name_without_ext)
+            if not match:
+                match = re.match(r'^(.+?)\s*-\s*Price\$\s*([\d.]+)$', name_without_ext)
+            if match:
+                parts.append({
+                    "name": match.group(1).strip(),
+                    "price": float(match.group(2).strip()),
+                    "filename": file_path.name,
+                    "image_path": str(file_path.resolve())
+                })
+    return parts
+
+
+def time_per_call(fn, iterations: int) -> float:
+    """Average microseconds per call over all ISSUES"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for issue in ISSUES:
+            fn(issue, BASE_DIR)
+    return (time.perf_counter() - start) * 1e6 / (iterations * len(ISSUES))
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    
+    for issue in ISSUES:
+        old = sorted(scan_per_call(issue, BASE_DIR), key=lambda part: part["filename"])
+        assert old == PartsLoader.load_parts_for_issue(issue, BASE_DIR), issue
+    
+    scan_us = time_per_call(scan_per_call, iterations)
+    manifest_us = time_per_call(PartsLoader.load_parts_for_issue, iterations)
+    
+    print(f"Lookups:                    {iterations * len(ISSUES)}")
+    print(f"Per-call directory scan:    {scan_us:10.2f} us")
+    print(f"Cached manifest:            {manifest_us:10.2f} us")
+    print(f"Speedup:                    {scan_us / manifest_us:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
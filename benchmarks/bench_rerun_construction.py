@@ -0,0 +1,48 @@
+"""
+Benchmark: per-rerun object construction cost
+
+Compares building the full object graph on every rerun (the old behaviour of
+ApplianceTroubleshootApp.__init__) against fetching the process-scoped
+container from the Streamlit resource cache.
+
+Run from the project root:
+    python benchmarks/bench_rerun_construction.py [iterations]
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Client construction does not hit the network, so a placeholder key is enough
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark-placeholder")
+
+from app.container import AppContainer, get_container  # noqa: E402
+
+
+def _time_per_call(fn, iterations: int) -> float:
+    """Return the mean wall time of fn() in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    
+    before_ms = _time_per_call(AppContainer, iterations)
+    
+    get_container()  # warm the cache, as the first rerun of the process would
+    after_ms = _time_per_call(get_container, iterations)
+    
+    print(f"Iterations:                   {iterations}")
+    print(f"Before (build graph / rerun): {before_ms:8.3f} ms")
+    print(f"After  (cached container):    {after_ms:8.3f} ms")
+    if after_ms > 0:
+        print(f"Speedup:                      {before_ms / after_ms:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: nameplate vision payload before and after preprocessing
+
+Builds a synthetic 12 MP phone photo (PNG and JPEG), and for each reports the
+base64 payload sent to the vision model with and without
+ImageUtils.prepare_for_vision(), the preprocessing time, and the end-to-end
+time of OpenAIService.read_nameplate_image(). The API is replaced by a stub
+whose latency grows with the payload size (upload at UPLOAD_MBPS plus a fixed
+model time), so no API key or network access is needed.
+
+Run from the project root:
+    python benchmarks/bench_vision_payload.py [upload_mbps]
+"""
+import base64
+import io
+import os
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark-placeholder")
+
+from PIL import Image, ImageDraw  # noqa: E402
+from app.services.openai_service import OpenAIService  # noqa: E402
+from app.utils.image_utils import ImageUtils  # noqa: E402
+
+MODEL_SECONDS = 2.0  # typical gpt-4o vision time excluding upload
+RESPONSE = 'RAW_TEXT: SAMSUNG RF28R7351SG\nJSON: {"brand": "Samsung", "model": "RF28R7351SG", "serial": null, "age": null}'
+
+
+def make_photo(image_format: str) -> bytes:
+    """Draw a noisy 4032x3024 "nameplate" photo"""
+    # Low-frequency noise stands in for lighting and texture
+    image = Image.effect_noise((504, 378), 30).resize((4032, 3024), Image.BICUBIC).convert("RGB")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((800, 800, 3200, 2200), fill=(220, 220, 220))
+    for row in range(12):
+        draw.text((900, 850 + row * 110), f"MODEL RF28R7351SG/AA  SERIAL 0B7K4BBM{row:04d}", fill=(0, 0, 0))
+    output = io.BytesIO()
+    image.save(output, format=image_format, quality=95)
+    return output.getvalue()
+
+
+def main():
+    upload_mbps = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    payload_sizes = []
+    
+    def fake_create(**kwargs):
+        url = kwargs["messages"][0]["content"][1]["image_url"]["url"]
+        payload_sizes.append(len(url))
+        time.sleep(len(url) * 8 / (upload_mbps * 1e6) + MODEL_SECONDS)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=RESPONSE))])
+    
+    service = OpenAIService()
+    service.client.chat.completions.create = fake_create
+    original_prepare = ImageUtils.prepare_for_vision
+    
+    print(f"Simulated upload: {upload_mbps:.0f} Mbit/s, model time {MODEL_SECONDS:.1f}s\n")
+    for image_format in ("PNG", "JPEG"):
+        photo = make_photo(image_format)
+        
+        start = time.perf_counter()
+        prepared = ImageUtils.prepare_for_vision(photo)
+        prepare_ms = (time.perf_counter() - start) * 1000
+        
+        timings = {}
+        for label, prepare in (("before", lambda image_bytes: image_bytes), ("after", original_prepare)):
+            ImageUtils.prepare_for_vision = staticmethod(prepare)
+            start = time.perf_counter()
+            service.read_nameplate_image(photo, tiered=False)
+            timings[label] = (time.perf_counter() - start, payload_sizes[-1])
+        ImageUtils.prepare_for_vision = staticmethod(original_prepare)
+        
+        print(f"{image_format} upload:               {len(photo) / 1e6:8.2f} MB")
+        print(f"  Prepared JPEG:            {len(prepared) / 1e6:8.2f} MB ({prepare_ms:.0f} ms to prepare)")
+        print(f"  Payload before:           {timings['before'][1] / 1e6:8.2f} MB base64")
+        print(f"  Payload after:            {timings['after'][1] / 1e6:8.2f} MB base64")
+        print(f"  End-to-end before:        {timings['before'][0]:8.2f} s")
+        print(f"  End-to-end after:         {timings['after'][0]:8.2f} s\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Stress test: concurrent booking saves
+
+Saves bookings from many threads in several processes at once, all sharing
+one bookings.json store, with a low compaction threshold so log rotation and
+snapshot merges happen under contention. Then reopens the store and checks
+that every booking is there exactly once and that the snapshot is valid JSON.
+Exits with status 1 if any booking was lost.
+
+Run from the project root:
+    python benchmarks/stress_booking_writes.py [processes] [threads] [saves_per_thread]
+"""
+import json
+import multiprocessing
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.repositories.booking_repository import BookingRepository  # noqa: E402
+from bench_booking_log import make_booking  # noqa: E402
+
+COMPACT_THRESHOLD = 500
+
+
+def run_process(file_path: str, process_index: int, threads: int, saves_per_thread: int):
+    """Save bookings from several threads sharing one repository"""
+    repo = BookingRepository(file_path, compact_threshold=COMPACT_THRESHOLD)
+    
+    def worker(thread_index: int):
+        for index in range(saves_per_thread):
+            booking = make_booking(0)
+            booking.booking_id = f"P{process_index:02d}-T{thread_index:03d}-{index:05d}"
+            repo.save(booking)
+    
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    repo.compact()
+    repo.close()
+
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    saves_per_thread = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    expected = processes * threads * saves_per_thread
+    
+    with tempfile.TemporaryDirectory() as data_dir:
+        file_path = str(Path(data_dir) / "bookings.json")
+        
+        start = time.perf_counter()
+        workers = [
+            multiprocessing.Process(target=run_process, args=(file_path, index, threads, saves_per_thread))
+            for index in range(processes)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        elapsed = time.perf_counter() - start
+        
+        repo = BookingRepository(file_path)
+        stored = {booking.booking_id for booking in repo.iter_all()}
+        repo.close()
+        with open(file_path, "r", encoding="utf-8") as f:
+            snapshot_records = len(json.load(f))
+        
+        missing = expected - len(stored)
+        print(f"Concurrent writers:         {processes} processes x {threads} threads")
+        print(f"Saves:                      {expected}")
+        print(f"Elapsed:                    {elapsed:10.2f} s ({expected / elapsed:.0f} saves/s)")
+        print(f"Stored bookings:            {len(stored)}")
+        print(f"In snapshot:                {snapshot_records}")
+        print(f"Lost:                       {missing}")
+        if missing or any(process.exitcode for process in workers):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,26 @@ import os
 from typing import Optional, Dict
 
 
+# Brand to subcategory mapping for the label location dropdowns
+BRAND_SUBCATEGORIES = {
+    "GE": ["Compact Refrigerator", "Full-Size Refrigerator", "Mini Fridge", "Top-Freezer Refrigerator", "Bottom-Freezer Refrigerator", "Side-by-Side Refrigerator", "French Door Refrigerator", "Built-in Refrigerator"],
+    "Samsung": ["French Door Refrigerator", "Side-by-Side Refrigerator", "Top-Freezer Refrigerator", "Bottom-Freezer Refrigerator", "Compact Refrigerator", "Beverage Center", "Wine Cooler"],
+    "LG": ["French Door Refrigerator", "Side-by-Side Refrigerator", "Bottom-Freezer Refrigerator", "Top-Freezer Refrigerator", "Compact Refrigerator"],
+    "Whirlpool": ["Top-Freezer Refrigerator", "Bottom-Freezer Refrigerator", "Side-by-Side Refrigerator", "French Door Refrigerator", "Compact Refrigerator"],
+    "Maytag": ["Top-Freezer Refrigerator", "Bottom-Freezer Refrigerator", "Side-by-Side Refrigerator", "French Door Refrigerator"],
+    "KitchenAid": ["Built-in Refrigerator", "French Door Refrigerator", "Side-by-Side Refrigerator", "Bottom-Freezer Refrigerator"],
+    "Frigidaire": ["Top-Freezer Refrigerator", "Bottom-Freezer Refrigerator", "Side-by-Side Refrigerator", "French Door Refrigerator", "Compact Refrigerator"],
+    "Bosch": ["Built-in Refrigerator", "French Door Refrigerator", "Bottom-Freezer Refrigerator", "Side-by-Side Refrigerator"],
+    "Kenmore": ["Top-Freezer Refrigerator", "Bottom-Freezer Refrigerator", "Side-by-Side Refrigerator", "French Door Refrigerator"],
+    "Haier": ["Compact Refrigerator", "Top-Freezer Refrigerator", "Bottom-Freezer Refrigerator", "Side-by-Side Refrigerator"],
+    "Amana": ["Top-Freezer Refrigerator", "Bottom-Freezer Refrigerator", "Compact Refrigerator"],
+    "Electrolux": ["French Door Refrigerator", "Side-by-Side Refrigerator", "Bottom-Freezer Refrigerator"],
+    "Miele": ["Built-in Refrigerator", "French Door Refrigerator", "Bottom-Freezer Refrigerator"],
+    "Sub-Zero": ["Built-in Refrigerator", "Integrated Refrigerator", "Wine Storage"],
+    "Viking": ["Built-in Refrigerator", "French Door Refrigerator", "Side-by-Side Refrigerator"]
+}
+
+
 def render_landing_page() -> Optional[str]:
     """
     Render the landing page with options to upload photo or type manually.
@@ -274,26 +294,7 @@ def render_landing_page() -> Optional[str]:
         st.markdown("### To Locate Your Product Label")
         st.markdown("Please select your appliance brand and model from the options below to receive personalized guidance on locating the product label on your appliance.")
         
-        # Brand to subcategory mapping
-        brand_subcategories = {
-            "GE": ["Compact Refrigerator", "Full-Size Refrigerator", "Mini Fridge", "Top-Freezer Refrigerator", "Bottom-Freezer Refrigerator", "Side-by-Side Refrigerator", "French Door Refrigerator", "Built-in Refrigerator"],
-            "Samsung": ["French Door Refrigerator", "Side-by-Side Refrigerator", "Top-Freezer Refrigerator", "Bottom-Freezer Refrigerator", "Compact Refrigerator", "Beverage Center", "Wine Cooler"],
-            "LG": ["French Door Refrigerator", "Side-by-Side Refrigerator", "Bottom-Freezer Refrigerator", "Top-Freezer Refrigerator", "Compact Refrigerator"],
-            "Whirlpool": ["Top-Freezer Refrigerator", "Bottom-Freezer Refrigerator", "Side-by-Side Refrigerator", "French Door Refrigerator", "Compact Refrigerator"],
-            "Maytag": ["Top-Freezer Refrigerator", "Bottom-Freezer Refrigerator", "Side-by-Side Refrigerator", "French Door Refrigerator"],
-            "KitchenAid": ["Built-in Refrigerator", "French Door Refrigerator", "Side-by-Side Refrigerator", "Bottom-Freezer Refrigerator"],
-            "Frigidaire": ["Top-Freezer Refrigerator", "Bottom-Freezer Refrigerator", "Side-by-Side Refrigerator", "French Door Refrigerator", "Compact Refrigerator"],
-            "Bosch": ["Built-in Refrigerator", "French Door Refrigerator", "Bottom-Freezer Refrigerator", "Side-by-Side Refrigerator"],
-            "Kenmore": ["Top-Freezer Refrigerator", "Bottom-Freezer Refrigerator", "Side-by-Side Refrigerator", "French Door Refrigerator"],
-            "Haier": ["Compact Refrigerator", "Top-Freezer Refrigerator", "Bottom-Freezer Refrigerator", "Side-by-Side Refrigerator"],
-            "Amana": ["Top-Freezer Refrigerator", "Bottom-Freezer Refrigerator", "Compact Refrigerator"],
-            "Electrolux": ["French Door Refrigerator", "Side-by-Side Refrigerator", "Bottom-Freezer Refrigerator"],
-            "Miele": ["Built-in Refrigerator", "French Door Refrigerator", "Bottom-Freezer Refrigerator"],
-            "Sub-Zero": ["Built-in Refrigerator", "Integrated Refrigerator", "Wine Storage"],
-            "Viking": ["Built-in Refrigerator", "French Door Refrigerator", "Side-by-Side Refrigerator"]
-        }
-        
-        brands = list(brand_subcategories.keys())
+        brands = list(BRAND_SUBCATEGORIES.keys())
         
         # Brand selection dropdown
         selected_brand = st.selectbox(
@@ -306,7 +307,7 @@ def render_landing_page() -> Optional[str]:
         # Subcategory selection (only show if brand is selected)
         selected_subcategory = None
         if selected_brand:
-            subcategories = brand_subcategories.get(selected_brand, [])
+            subcategories = BRAND_SUBCATEGORIES.get(selected_brand, [])
             if subcategories:
                 selected_subcategory = st.selectbox(
                     "Select Sub Category *",
@@ -334,10 +335,12 @@ def render_landing_page() -> Optional[str]:
         if selected_subcategory and st.session_state.get("landing_subcategory") == selected_subcategory:
             # Check if we need to fetch guidance
             if st.session_state.get("show_landing_guidance", False) and not st.session_state.get("landing_guidance_shown", False):
-                from app.services.openai_service import OpenAIService
+                from app.container import get_container
                 
                 try:
-                    openai_service = OpenAIService()
+                    openai_service = get_container().openai_service
+                    if openai_service is None:
+                        raise ValueError("OpenAI API key not found. Set OPENAI_API_KEY environment variable.")
                     brand = st.session_state.get("landing_brand", selected_brand)
                     subcategory = st.session_state.get("landing_subcategory", selected_subcategory)
                     category = st.session_state.get("landing_category", st.session_state.get("selected_category", "Refrigerator"))
@@ -370,7 +373,6 @@ def render_landing_page() -> Optional[str]:
                 
                 # Directly load and display images from nameplates folder
                 import os
-                from PIL import Image
                 
                 base_dir = Path(os.getcwd()).resolve()
                 nameplates_dir = base_dir / "nameplates"
@@ -384,17 +386,19 @@ def render_landing_page() -> Optional[str]:
                     image_files = sorted(list(nameplates_dir.glob("*.png"))) + sorted(list(nameplates_dir.glob("*.PNG")))
                     
                     if image_files:
+                        from app.container import get_container
+                        
+                        thumbnails = get_container().thumbnail_service.get_many(image_files[:4])
+                        
                         # Display in 2x2 grid
                         cols = st.columns(2)
                         for idx, img_path in enumerate(image_files[:4]):
                             col_idx = idx % 2
                             with cols[col_idx]:
-                                try:
-                                    # Open with PIL and display
-                                    img = Image.open(str(img_path))
-                                    st.image(img, caption=f"Example {idx + 1}", use_container_width=True)
-                                except Exception as e:
-                                    st.error(f"Error loading {img_path.name}: {str(e)}")
+                                if thumbnails[idx]:
+                                    st.image(thumbnails[idx], caption=f"Example {idx + 1}", use_container_width=True)
+                                else:
+                                    st.error(f"Error loading {img_path.name}")
                     else:
                         st.warning(f"No PNG files found in {nameplates_dir}")
                 else:
@@ -560,7 +564,6 @@ def render_product_label_help():
 def _display_nameplate_examples():
     """Display example nameplate images from the nameplates folder - directly below the text answer"""
     import os
-    from PIL import Image
     
     # Get the base directory - use current working directory as it's more reliable with Streamlit
     base_dir = Path(os.getcwd()).resolve()
@@ -597,23 +600,19 @@ def _display_nameplate_examples():
         st.markdown("**📸 Example Nameplates:**")
         st.markdown("*Here are some examples of what nameplates look like:*")
         
+        from app.container import get_container
+        
+        thumbnails = get_container().thumbnail_service.get_many(existing_images[:4])
+        
         # Display in a 2x2 grid (limit to 4 images)
         cols = st.columns(2)
         for idx, img_path in enumerate(existing_images[:4]):
             col_idx = idx % 2
             with cols[col_idx]:
-                try:
-                    # Open image with PIL and display
-                    img = Image.open(str(img_path))
-                    st.image(img, caption=f"Example {idx + 1}", use_container_width=True)
-                except Exception as e:
-                    # Fallback: try reading as bytes
-                    try:
-                        with open(img_path, 'rb') as f:
-                            img_bytes = f.read()
-                        st.image(img_bytes, caption=f"Example {idx + 1}", use_container_width=True)
-                    except Exception as e2:
-                        st.warning(f"Could not display {img_path.name}: {str(e2)}")
+                if thumbnails[idx]:
+                    st.image(thumbnails[idx], caption=f"Example {idx + 1}", use_container_width=True)
+                else:
+                    st.warning(f"Could not display {img_path.name}")
     else:
         # Debug info if images not found
         st.markdown("")  # Add spacing
@@ -19,10 +19,120 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL_TEXT = "gpt-4o-mini"
 OPENAI_MODEL_VISION = "gpt-4o"
 
+# Shared HTTP connection pool for all OpenAI / LangChain clients
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "50"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_EXPIRY_SECONDS = 60.0
+OPENAI_TIMEOUT_SECONDS = 60.0
+
+# Resilience layer for LLM calls (see app/utils/resilience.py). Retries are
+# done there, so the OpenAI clients themselves do not retry.
+LLM_FLOW_BUDGETS_SECONDS = {
+    "identification": 10.0,
+    "issue_listing": 10.0,
+    "troubleshooting": 25.0,
+    "summarization": 10.0,
+    "vision": 30.0,
+    "nameplate_guidance": 30.0
+}
+LLM_DEFAULT_BUDGET_SECONDS = 20.0
+LLM_RETRY_MAX_ATTEMPTS = 3
+LLM_RETRY_BASE_DELAY_SECONDS = 0.5
+LLM_RETRY_MAX_DELAY_SECONDS = 4.0
+LLM_HEDGING_ENABLED = os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true"
+LLM_HEDGE_MIN_SAMPLES = 20
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+CIRCUIT_BREAKER_RESET_SECONDS = 30.0
+
+# Default request parameters per model (agents may override per call site)
+LLM_MODEL_DEFAULTS = {
+    "gpt-4o-mini": {"temperature": 0.3},
+    "gpt-4o": {"temperature": 0.7, "max_tokens": 2000}
+}
+
+# Appliance type cache (survives restarts when data/ is a mounted volume)
+CACHE_DIR = BASE_DIR / "data" / "cache"
+APPLIANCE_TYPE_CACHE_PATH = CACHE_DIR / "appliance_types.json"
+APPLIANCE_TYPE_CACHE_MAX_ENTRIES = 5000
+APPLIANCE_TYPE_CACHE_TTL_SECONDS = 30 * 24 * 3600
+
+# Nameplate vision results, keyed by image content hash and shared by all sessions
+VISION_CACHE_PATH = CACHE_DIR / "vision_results.json"
+VISION_CACHE_MAX_ENTRIES = 2000
+VISION_CACHE_TTL_SECONDS = 90 * 24 * 3600
+
+# Re-shot photos of the same label within one session are matched by
+# perceptual hash (dHash of PERCEPTUAL_HASH_SIZE^2 bits); hashes at most this
+# many bits apart are the same image
+PERCEPTUAL_HASH_SIZE = 16
+VISION_CACHE_MAX_HASH_DISTANCE = 12
+
+# Uploaded images: content-addressed blobs kept in memory up to a cap, then
+# spilled to disk; chat messages only hold the blob key
+BLOB_STORE_DIR = CACHE_DIR / "blobs"
+BLOB_STORE_MAX_MEMORY_MB = 64
+BLOB_STORE_MAX_DISK_MB = 1024
+IMAGE_THUMBNAIL_SIZE = (300, 300)
+
+# Part and example nameplate images are shown as cached thumbnails
+THUMBNAIL_CACHE_DIR = CACHE_DIR / "thumbnails"
+STATIC_THUMBNAIL_SIZE = (480, 480)
+
+# Precomputed common issues (see scripts/warm_issue_cache.py); entries older
+# than this are served as-is and refreshed in the background
+PRECOMPUTED_ISSUES_MAX_AGE_SECONDS = 7 * 24 * 3600
+# Upper bound on stored issue lists; live results for brands typed by users
+# would otherwise grow the file without limit (the oldest are dropped)
+PRECOMPUTED_ISSUES_MAX_ENTRIES = 500
+
+# Knowledge base routing: SIMPLE problems matched with at least this score
+# are answered from curated steps, rephrased by the cheaper text model. The
+# same score is required before KB steps are shown when the LLM is unavailable
+KB_ROUTING_MIN_SCORE = 0.6
+
+# Chat view: messages rendered per rerun, and how many more "load earlier" adds
+CHAT_WINDOW_SIZE = 20
+CHAT_WINDOW_PAGE_SIZE = 20
+
+# Booking storage backend: "jsonl" (append-only log + bookings.json snapshot)
+# or "sqlite" (data/bookings.db, migrated from the JSON store on first use)
+BOOKING_STORE = os.getenv("BOOKING_STORE", "jsonl")
+
+# Node ID (0-4095) baked into booking, tracking and dispatch IDs; give each
+# process that shares the booking store its own (unset: random per process)
+ID_NODE_ID = int(os.environ["ID_NODE_ID"]) if os.getenv("ID_NODE_ID") else None
+
+# Booking log: saves append to data/bookings.log.jsonl through one writer
+# thread that group-commits up to BOOKING_LOG_MAX_BATCH saves per fsync; the
+# log is merged into bookings.json once it holds BOOKING_LOG_COMPACT_THRESHOLD records
+BOOKING_LOG_MAX_BATCH = 256
+BOOKING_LOG_COMPACT_THRESHOLD = 10000
+# Seconds between booking log fsyncs. 0 fsyncs every group commit, so a
+# returned save is on disk; a positive interval returns once the OS has the
+# record, and a power loss can drop up to that many seconds of saves.
+# benchmarks/bench_booking_log.py (100k bookings, sequential saves, ext4 on a
+# virtio disk): 0.18 ms mean / 0.38 ms p99 with 0, 0.10 / 0.14 ms with 1.0.
+# fsync cost depends on the device: disks that honour cache flushes take
+# milliseconds, which concurrent saves share through the group commit.
+BOOKING_LOG_FSYNC_INTERVAL_SECONDS = float(os.getenv("BOOKING_LOG_FSYNC_INTERVAL_SECONDS", "0"))
+
 # App settings
 TECHNICIAN_FEE = 125.0
 MAX_IMAGE_SIZE_MB = 10
 
+# Nameplate photos are downscaled to what the vision model actually uses
+# (gpt-4o high detail fits images in 2048px, then 768px on the short side)
+VISION_IMAGE_MAX_LONG_SIDE = 2048
+VISION_IMAGE_MAX_SHORT_SIDE = 768
+VISION_IMAGE_JPEG_QUALITY = 85
+
+# Two-pass nameplate reading: a low-detail pass (one 512px tile) first, and the
+# full-detail pass only when required fields are missing or fail local checks
+VISION_TIERED_ENABLED = True
+VISION_LOW_DETAIL_SIZE = 512
+VISION_LOW_DETAIL_MAX_TOKENS = 300
+VISION_REQUIRED_FIELDS = ("brand", "model")
+
 # Streamlit settings
 PAGE_TITLE = "Appliance Troubleshoot Assistant"
 PAGE_ICON = "🔧"
@@ -0,0 +1,77 @@
+"""
+Precompute common-issue lists for every appliance type and brand
+
+Crosses the appliance types in data/common_issues.json with the brands in
+components/landing_page.py (plus one brand-independent entry per type), asks
+the issue listing agent for each pair and stores the results through
+CommonIssuesRepository in data/precomputed_issues.json. Entries that are
+still fresh are skipped unless --force is given.
+
+Run from the project root:
+    python scripts/warm_issue_cache.py [--force] [--concurrency N]
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import PRECOMPUTED_ISSUES_MAX_AGE_SECONDS  # noqa: E402
+from app.agents.issue_listing_agent import IssueListingAgent  # noqa: E402
+from app.repositories.common_issues_repository import CommonIssuesRepository  # noqa: E402
+from app.utils.llm_client_registry import LLMClientRegistry  # noqa: E402
+from components.landing_page import BRAND_SUBCATEGORIES  # noqa: E402
+
+
+async def warm(repo: CommonIssuesRepository, agent: IssueListingAgent, pairs, concurrency: int) -> int:
+    """Generate and store issues for each (type, brand) pair; returns the number stored"""
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def warm_pair(appliance_type, brand):
+        async with semaphore:
+            issues = await agent.alist_common_issues(appliance_type=appliance_type, brand=brand)
+        if not issues:
+            print(f"  ! {appliance_type} / {brand or '(any brand)'}: no issues returned")
+            return 0
+        repo.save_precomputed_issues(appliance_type, brand, issues)
+        print(f"  {appliance_type} / {brand or '(any brand)'}: {len(issues)} issues")
+        return 1
+    
+    results = await asyncio.gather(*(warm_pair(t, b) for t, b in pairs))
+    return sum(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--force", action="store_true", help="Regenerate entries that are still fresh")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel LLM requests")
+    args = parser.parse_args()
+    
+    repo = CommonIssuesRepository()
+    brands = [None] + list(BRAND_SUBCATEGORIES.keys())
+    pairs = [
+        (appliance_type, brand)
+        for appliance_type in repo.load().keys()
+        for brand in brands
+        if args.force or repo.is_precomputed_stale(appliance_type, brand, PRECOMPUTED_ISSUES_MAX_AGE_SECONDS)
+    ]
+    if not pairs:
+        print("All precomputed issue lists are fresh.")
+        return
+    
+    try:
+        client_registry = LLMClientRegistry()
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    
+    agent = IssueListingAgent(client_registry=client_registry)
+    print(f"Warming {len(pairs)} issue lists...")
+    stored = client_registry.run_async(warm(repo, agent, pairs, args.concurrency))
+    client_registry.close()
+    print(f"Stored {stored}/{len(pairs)} issue lists in {repo.precomputed_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Shared fixtures for the test suite"""
+from datetime import datetime
+
+import pytest
+
+from app.models.appliance import Appliance
+from app.models.booking import Booking, CostBreakdown, TimeSlot
+
+
+@pytest.fixture
+def make_booking():
+    """Factory for bookings with a given ID, slot, technician and phone"""
+    def make(
+        booking_id: str,
+        slot: datetime = datetime(2026, 5, 4, 9, 0),
+        technician_id: str = "tech-1",
+        phone: str = "555-0100"
+    ) -> Booking:
+        return Booking(
+            booking_id=booking_id,
+            timestamp=datetime(2026, 5, 1, 12, 0),
+            appliance=Appliance(brand="LG", model="WM3900", appliance_type="Washing Machine"),
+            problem="Not spinning",
+            customer_name="Sam Lee",
+            customer_phone=phone,
+            customer_address="1 Main St",
+            time_slot=TimeSlot(date=slot.strftime("%Y-%m-%d"), time=slot.strftime("%H:%M"), datetime=slot),
+            cost=CostBreakdown(technician_fee=125.0, parts_total=0.0),
+            technician_id=technician_id,
+            technician_name="Alex"
+        )
+    return make
+
+
+@pytest.fixture
+def open_repo():
+    """Factory opening booking repositories that are all closed after the test"""
+    repos = []
+    
+    def open_(repo_class, *args, **kwargs):
+        repo = repo_class(*args, **kwargs)
+        repos.append(repo)
+        return repo
+    
+    yield open_
+    for repo in repos:
+        repo.close()
@@ -0,0 +1,79 @@
+"""Tests for ApplianceService nameplate result reuse"""
+import io
+import random
+
+import pytest
+from PIL import Image, ImageDraw
+
+from app.services.appliance_service import ApplianceService
+from app.utils.image_utils import ImageUtils
+from app.utils.persistent_cache import PersistentCache
+
+
+READING = {"brand": "Samsung", "model": "WF45R6100AW", "serial": "0A1B2C3D4E5F", "age": 3, "appliance_type": "Washing Machine"}
+
+
+class FakeOpenAIService:
+    """Returns a fixed nameplate reading and counts vision calls"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def read_nameplate_image(self, image_bytes):
+        self.calls += 1
+        return "RAW", dict(READING)
+
+
+def make_label(seed: int, quality: int = 90) -> bytes:
+    """Draw a random nameplate-like image and encode it as JPEG"""
+    rng = random.Random(seed)
+    image = Image.new("L", (320, 200), 200)
+    draw = ImageDraw.Draw(image)
+    for _ in range(40):
+        x, y = rng.randrange(300), rng.randrange(180)
+        draw.rectangle((x, y, x + rng.randrange(5, 40), y + rng.randrange(3, 20)), fill=rng.randrange(0, 120))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def service(tmp_path):
+    cache = PersistentCache(tmp_path / "vision_results.json", max_entries=100, ttl_seconds=3600)
+    return ApplianceService(FakeOpenAIService(), vision_cache=cache)
+
+
+def test_retake_in_the_same_session_reuses_brand_and_model_only(service):
+    first, retake = make_label(1), make_label(1, quality=60)
+    assert first != retake
+    service.identify_from_image(first)
+    
+    _, info = service.identify_from_image(retake, {ImageUtils.get_image_hash(first)})
+    assert service.openai_service.calls == 1
+    assert info == {"brand": "Samsung", "model": "WF45R6100AW"}
+
+
+def test_look_alike_photo_from_another_session_is_read_again(service):
+    first, retake = make_label(1), make_label(1, quality=60)
+    service.identify_from_image(first)
+    
+    _, info = service.identify_from_image(retake, set())
+    assert service.openai_service.calls == 2
+    assert info["serial"] == READING["serial"]
+
+
+def test_same_photo_is_served_from_the_cache(service):
+    image = make_label(2)
+    service.identify_from_image(image)
+    _, info = service.identify_from_image(image)
+    assert service.openai_service.calls == 1
+    assert info == READING
+
+
+def test_different_labels_are_not_near_duplicates():
+    first = ImageUtils.get_perceptual_hash(make_label(1))
+    other = ImageUtils.get_perceptual_hash(make_label(3))
+    retake = ImageUtils.get_perceptual_hash(make_label(1, quality=60))
+    assert len(first) == 64
+    assert bin(int(first, 16) ^ int(retake, 16)).count("1") <= 12
+    assert bin(int(first, 16) ^ int(other, 16)).count("1") > 12
@@ -0,0 +1,24 @@
+"""Tests for ApplianceTypeAgent cache keys"""
+import pytest
+
+from app.agents.appliance_type_agent import ApplianceTypeAgent
+
+
+@pytest.mark.parametrize("brand, model, key", [
+    ("Samsung", "RF28R7351SR/AA", "samsung:RF28"),
+    ("Bosch", "SHX878WD5N", "bosch:SHX878"),
+    ("LG ", "lrmvs-3006s", "lg:LRMVS3006"),
+    ("Fisher & Paykel", "DD60DCHX9", "fisherpaykel:DD60"),
+    ("Whirlpool", "12345", "whirlpool:12345"),
+])
+def test_key_is_brand_and_model_family(brand, model, key):
+    assert ApplianceTypeAgent.get_cache_key(brand, model) == key
+
+
+def test_variants_of_one_family_share_a_key():
+    assert ApplianceTypeAgent.get_cache_key("SAMSUNG", "RF28R7351SB") == ApplianceTypeAgent.get_cache_key("Samsung", "RF28R7351SG/AA")
+
+
+@pytest.mark.parametrize("brand, model", [(None, "X1"), ("GE", ""), ("", "RF28")])
+def test_incomplete_details_have_no_key(brand, model):
+    assert ApplianceTypeAgent.get_cache_key(brand, model) is None
@@ -0,0 +1,50 @@
+"""Tests for BlobStore"""
+import io
+
+import pytest
+from PIL import Image
+
+from app.utils.blob_store import BlobStore
+
+
+def make_image(color, size=(640, 480)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(tmp_path / "blobs")
+
+
+def test_put_and_get_round_trip(store):
+    data = make_image("red")
+    key = store.put(data)
+    assert store.get(key) == data
+    assert store.get("missing") is None
+
+
+def test_same_content_is_stored_once(store):
+    first = store.put(make_image("red"))
+    second = store.put(make_image("red"))
+    other = store.put(make_image("blue"))
+    assert first == second != other
+    assert store.stats()["memory_blobs"] == 2
+
+
+def test_evicted_blobs_are_read_back_from_disk(tmp_path):
+    red, blue = make_image("red"), make_image("blue")
+    store = BlobStore(tmp_path / "blobs", max_memory_bytes=len(red) + 1)
+    red_key = store.put(red)
+    store.put(blue)
+    
+    assert store.stats()["memory_blobs"] == 1
+    assert store.get(red_key) == red
+
+
+def test_thumbnail_fits_the_bounding_box(store):
+    key = store.put(make_image("red"))
+    with Image.open(io.BytesIO(store.get_thumbnail(key))) as thumbnail:
+        assert thumbnail.format == "JPEG"
+        assert max(thumbnail.size) == 300
@@ -0,0 +1,50 @@
+"""Tests for BookingIndex lookups and paging"""
+from datetime import date, datetime
+
+import pytest
+
+from app.repositories.booking_index import BookingIndex
+
+
+@pytest.fixture
+def index(make_booking):
+    index = BookingIndex()
+    # Added out of slot order: B0 09:00, B1 10:00, ... on 4 May, B5 on 5 May
+    for i in (3, 0, 4, 1, 2):
+        index.add(make_booking(f"B{i}", slot=datetime(2026, 5, 4, 9 + i)).to_dict())
+    index.add(make_booking("B5", slot=datetime(2026, 5, 5, 9), technician_id="tech-2", phone="(555) 0199").to_dict())
+    return index
+
+
+def test_technician_bookings_are_ordered_by_slot(index):
+    assert index.technician_ids("tech-1") == ["B0", "B1", "B2", "B3", "B4"]
+    assert index.technician_ids("tech-2") == ["B5"]
+    assert index.technician_ids("nobody") == []
+
+
+def test_technician_range_is_half_open(index):
+    ids = index.technician_ids("tech-1", start=datetime(2026, 5, 4, 10), end=datetime(2026, 5, 4, 12))
+    assert ids == ["B1", "B2"]
+
+
+def test_pages_cover_the_range_without_overlap(index):
+    pages = [index.technician_ids("tech-1", offset=offset, limit=2) for offset in (0, 2, 4, 6)]
+    assert pages == [["B0", "B1"], ["B2", "B3"], ["B4"], []]
+    assert index.technician_ids("tech-1", start=datetime(2026, 5, 4, 10), offset=1, limit=2) == ["B2", "B3"]
+
+
+def test_phone_formatting_is_ignored(index):
+    assert index.phone_ids("555 0199") == ["B5"]
+    assert index.phone_ids("5550100", offset=3) == ["B3", "B4"]
+
+
+def test_day_lookup(index):
+    assert index.day_ids(date(2026, 5, 4), limit=3) == ["B0", "B1", "B2"]
+    assert index.day_ids(date(2026, 5, 5)) == ["B5"]
+
+
+def test_readding_a_booking_replaces_its_entries(index, make_booking):
+    index.add(make_booking("B0", slot=datetime(2026, 5, 5, 8), technician_id="tech-2").to_dict())
+    assert index.technician_ids("tech-1") == ["B1", "B2", "B3", "B4"]
+    assert index.technician_ids("tech-2") == ["B0", "B5"]
+    assert index.day_ids(date(2026, 5, 4)) == ["B1", "B2", "B3", "B4"]
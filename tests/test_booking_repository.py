@@ -0,0 +1,165 @@
+"""Tests for BookingRepository: the booking log and its snapshot"""
+import gc
+import json
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.repositories.booking_repository import BookingRepository
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    return str(tmp_path / "bookings.json")
+
+
+def test_saves_survive_reopen_and_compaction(open_repo, snapshot_path, make_booking, tmp_path):
+    repo = open_repo(BookingRepository, snapshot_path)
+    for i in range(3):
+        repo.save(make_booking(f"B{i}"))
+    updated = make_booking("B1")
+    updated.payment_status = "paid"
+    repo.save(updated)
+    repo.close()
+    
+    reopened = open_repo(BookingRepository, snapshot_path)
+    assert [b.booking_id for b in reopened.load_all()] == ["B0", "B1", "B2"]
+    assert reopened.get_by_id("B1").payment_status == "paid"
+    
+    reopened.compact()
+    assert not (tmp_path / "bookings.log.jsonl").exists()
+    assert len(json.loads((tmp_path / "bookings.json").read_text(encoding="utf-8"))) == 3
+    reopened.save(make_booking("B3"))
+    reopened.close()
+    
+    final = open_repo(BookingRepository, snapshot_path)
+    assert final.count() == 4
+    assert final.get_by_id("B1").payment_status == "paid"
+    assert final.get_by_id("B3").to_dict() == make_booking("B3").to_dict()
+
+
+def test_torn_last_line_is_skipped_and_the_next_save_starts_a_new_line(open_repo, snapshot_path, make_booking, tmp_path):
+    repo = open_repo(BookingRepository, snapshot_path)
+    repo.save(make_booking("B0"))
+    repo.close()
+    log_path = tmp_path / "bookings.log.jsonl"
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write('{"booking_id": "B-torn", "times')
+    
+    repo = open_repo(BookingRepository, snapshot_path)
+    assert repo.count() == 1
+    repo.save(make_booking("B1"))
+    repo.close()
+    
+    lines = log_path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 3
+    assert json.loads(lines[-1])["booking_id"] == "B1"
+    assert sorted(b.booking_id for b in open_repo(BookingRepository, snapshot_path).load_all()) == ["B0", "B1"]
+
+
+def test_invalid_snapshot_is_not_overwritten(open_repo, snapshot_path, make_booking, tmp_path):
+    (tmp_path / "bookings.json").write_text("[{broken", encoding="utf-8")
+    repo = open_repo(BookingRepository, snapshot_path)
+    repo.save(make_booking("B0"))
+    repo.compact()
+    assert (tmp_path / "bookings.json").read_text(encoding="utf-8") == "[{broken"
+    assert (tmp_path / "bookings.log.compacting.jsonl").exists()
+
+
+def test_concurrent_saves_are_all_committed(open_repo, snapshot_path, make_booking):
+    repo = open_repo(BookingRepository, snapshot_path, max_batch=8)
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(lambda i: repo.save(make_booking(f"B{i:03d}")), range(200)))
+    repo.close()
+    
+    assert open_repo(BookingRepository, snapshot_path).count() == 200
+
+
+def test_reaching_the_threshold_compacts_in_the_background(open_repo, snapshot_path, make_booking, tmp_path):
+    repo = open_repo(BookingRepository, snapshot_path, compact_threshold=5)
+    for i in range(5):
+        repo.save(make_booking(f"B{i}"))
+    repo.close()
+    
+    assert not (tmp_path / "bookings.log.jsonl").exists()
+    assert len(json.loads((tmp_path / "bookings.json").read_text(encoding="utf-8"))) == 5
+    assert open_repo(BookingRepository, snapshot_path).count() == 5
+
+
+def test_save_after_close_fails(open_repo, snapshot_path, make_booking):
+    repo = open_repo(BookingRepository, snapshot_path)
+    repo.close()
+    with pytest.raises(RuntimeError):
+        repo.save(make_booking("B0"))
+
+
+def test_write_only_process_counts_the_existing_log(open_repo, snapshot_path, make_booking, tmp_path):
+    repo = open_repo(BookingRepository, snapshot_path, compact_threshold=5)
+    for i in range(3):
+        repo.save(make_booking(f"B{i}"))
+    repo.close()
+    
+    # Saves only, no reads: the three records already in the log count towards the threshold
+    repo = open_repo(BookingRepository, snapshot_path, compact_threshold=5)
+    for i in range(3, 5):
+        repo.save(make_booking(f"B{i}"))
+    repo.close()
+    
+    assert not (tmp_path / "bookings.log.jsonl").exists()
+    assert len(json.loads((tmp_path / "bookings.json").read_text(encoding="utf-8"))) == 5
+
+
+def test_log_records_without_an_id_are_skipped(open_repo, snapshot_path, make_booking, tmp_path):
+    repo = open_repo(BookingRepository, snapshot_path)
+    repo.save(make_booking("B0"))
+    repo.close()
+    with open(tmp_path / "bookings.log.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"payment_status": "paid"}\n[1, 2]\n')
+    
+    assert [b.booking_id for b in open_repo(BookingRepository, snapshot_path).load_all()] == ["B0"]
+
+
+def test_closed_repository_can_be_freed(snapshot_path, make_booking):
+    repo = BookingRepository(snapshot_path)
+    repo.save(make_booking("B0"))
+    repo.close()
+    ref = weakref.ref(repo)
+    del repo
+    gc.collect()
+    assert ref() is None
+
+
+def test_reads_see_saves_and_compactions_of_another_process(open_repo, snapshot_path, make_booking):
+    reader = open_repo(BookingRepository, snapshot_path)
+    writer = open_repo(BookingRepository, snapshot_path, compact_threshold=3)
+    assert reader.count() == 0
+    
+    writer.save(make_booking("B0"))
+    assert reader.get_by_id("B0") is not None
+    
+    # The third save rotates the log and replaces the snapshot
+    writer.save(make_booking("B1", technician_id="tech-2"))
+    writer.save(make_booking("B2"))
+    writer.close()
+    writer = open_repo(BookingRepository, snapshot_path)
+    writer.save(make_booking("B3"))
+    
+    assert sorted(b.booking_id for b in reader.load_all()) == ["B0", "B1", "B2", "B3"]
+    assert [b.booking_id for b in reader.by_technician("tech-2")] == ["B1"]
+    reader.save(make_booking("B4"))
+    assert writer.count() == 5
+
+
+def test_fsync_interval_defers_fsync_to_the_flush(open_repo, snapshot_path, make_booking, monkeypatch):
+    fsyncs = []
+    monkeypatch.setattr("app.repositories.booking_repository.os.fsync", fsyncs.append)
+    repo = open_repo(BookingRepository, snapshot_path, fsync_interval=60)
+    for i in range(3):
+        repo.save(make_booking(f"B{i}"))
+    assert fsyncs == []
+    
+    repo.flush()
+    assert len(fsyncs) == 1
+    repo.close()
+    assert len(fsyncs) == 1
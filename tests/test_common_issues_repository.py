@@ -0,0 +1,56 @@
+"""Tests for CommonIssuesRepository precomputed issue lists"""
+import pytest
+
+from app.repositories.common_issues_repository import CommonIssuesRepository
+
+
+@pytest.fixture
+def repo(tmp_path):
+    return CommonIssuesRepository(
+        str(tmp_path / "common_issues.json"),
+        precomputed_path=str(tmp_path / "precomputed_issues.json")
+    )
+
+
+def test_serving_falls_back_to_the_brand_independent_entry(repo):
+    repo.save_precomputed_issues("Dryer", None, ["No heat"])
+    entry = repo.get_precomputed_entry("Dryer", "LG")
+    assert entry["issues"] == ["No heat"]
+    assert entry["brand"] == ""
+
+
+def test_brand_entry_never_computed_is_stale(repo):
+    # After a partial warm run only the brand-independent entry exists
+    repo.save_precomputed_issues("Dryer", None, ["No heat"])
+    assert not repo.is_precomputed_stale("Dryer", None, max_age_seconds=3600)
+    assert repo.is_precomputed_stale("Dryer", "LG", max_age_seconds=3600)
+    assert repo.get_precomputed_entry("Dryer", "LG", fallback=False) is None
+
+
+def test_brand_entry_is_fresh_once_computed(repo):
+    repo.save_precomputed_issues("Dryer", "LG", ["Drum not spinning"])
+    assert not repo.is_precomputed_stale("dryer", " lg ", max_age_seconds=3600)
+    assert repo.is_precomputed_stale("Dryer", "LG", max_age_seconds=-1)
+
+
+def test_precomputed_entries_survive_a_reload(repo, tmp_path):
+    repo.save_precomputed_issues("Dryer", "LG", ["Drum not spinning"])
+    reloaded = CommonIssuesRepository(
+        str(tmp_path / "common_issues.json"),
+        precomputed_path=str(tmp_path / "precomputed_issues.json")
+    )
+    assert reloaded.get_precomputed_issues("Dryer", "LG") == ["Drum not spinning"]
+
+
+def test_oldest_entries_are_dropped_past_the_limit(tmp_path):
+    repo = CommonIssuesRepository(
+        str(tmp_path / "common_issues.json"),
+        precomputed_path=str(tmp_path / "precomputed_issues.json"),
+        max_precomputed_entries=2
+    )
+    for brand in ("LG", "Acme", "Zed"):
+        repo.save_precomputed_issues("Dryer", brand, [f"{brand} issue"])
+    
+    assert repo.get_precomputed_entry("Dryer", "LG", fallback=False) is None
+    assert repo.get_precomputed_issues("Dryer", "Zed") == ["Zed issue"]
+    assert repo.get_precomputed_issues("Dryer", "Acme") == ["Acme issue"]
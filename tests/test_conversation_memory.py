@@ -0,0 +1,63 @@
+"""Tests for ConversationMemory folding and compression"""
+from app.utils.conversation_memory import ConversationMemory
+
+
+def test_recent_turns_are_kept_verbatim():
+    memory = ConversationMemory(max_recent_turns=2)
+    memory.add_message("user", "My dryer won't heat.")
+    memory.add_message("assistant", "Let's check the vent.")
+    assert memory.to_text() == "User: My dryer won't heat.\nAssistant: Let's check the vent."
+
+
+def test_old_turns_fold_to_their_first_sentence():
+    memory = ConversationMemory(max_recent_turns=1)
+    memory.add_message("user", "My dryer won't heat. It is five years old.")
+    memory.add_message("assistant", "Let's check the vent.")
+    assert memory.summary_points == ["User: My dryer won't heat."]
+    assert memory.to_text() == (
+        "Earlier in the conversation:\n"
+        "- User: My dryer won't heat.\n"
+        "\n"
+        "Most recent messages:\n"
+        "Assistant: Let's check the vent."
+    )
+
+
+def test_summary_keeps_the_opening_points_when_full():
+    memory = ConversationMemory(max_recent_turns=1, max_summary_points=3)
+    for i in range(6):
+        memory.add_message("user", f"Message {i}.")
+    assert memory.summary_points == ["User: Message 0.", "User: Message 1.", "User: Message 4."]
+    assert list(memory.recent) == [("user", "Message 5.")]
+
+
+def test_rendered_size_stays_bounded():
+    memory = ConversationMemory()
+    for i in range(200):
+        memory.add_message("assistant", f"Step {i}: " + "word " * 200)
+    assert len(memory.summary_points) == memory.max_summary_points
+    assert len(memory.to_text()) < 5000
+
+
+def test_compress_strips_markdown_and_shortens_steps():
+    content = (
+        "**Try these steps** from the [manual](https://example.com):\n\n"
+        "1. Unplug the dryer and wait for a full minute before touching anything inside\n"
+        "2. Check the `thermal fuse`\n"
+    )
+    assert ConversationMemory.compress(content, 400) == (
+        "Try these steps from the manual: Steps: "
+        "Unplug the dryer and wait for a full minute before touching…; Check the thermal fuse"
+    )
+
+
+def test_compress_truncates_long_messages():
+    text = ConversationMemory.compress("a" * 50, 10)
+    assert text == "a" * 9 + "…"
+
+
+def test_empty_messages_are_ignored():
+    memory = ConversationMemory()
+    memory.add_message("user", "**  **")
+    memory.add_message("user", "")
+    assert memory.to_text() == ""
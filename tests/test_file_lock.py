@@ -0,0 +1,46 @@
+"""Tests for FileLock"""
+import subprocess
+import sys
+import threading
+
+from app.utils import file_lock
+from app.utils.file_lock import FileLock
+
+
+def test_lock_is_reentrant_within_a_thread(tmp_path):
+    lock = FileLock(tmp_path / "test.lock")
+    with lock:
+        with lock:
+            pass
+        assert lock._fd is not None
+    assert lock._fd is None
+
+
+def test_lock_excludes_other_threads(tmp_path):
+    lock = FileLock(tmp_path / "test.lock")
+    results = []
+    with lock:
+        thread = threading.Thread(target=lambda: results.append(lock.acquire(blocking=False)))
+        thread.start()
+        thread.join()
+    assert results == [False]
+    assert lock.acquire(blocking=False)
+    lock.release()
+
+
+def test_lock_excludes_other_processes(tmp_path):
+    path = tmp_path / "test.lock"
+    # Load the module by path so the child does not import the whole app package
+    script = (
+        "import importlib.util, sys; "
+        "spec = importlib.util.spec_from_file_location('file_lock', sys.argv[1]); "
+        "module = importlib.util.module_from_spec(spec); spec.loader.exec_module(module); "
+        "sys.exit(0 if module.FileLock(sys.argv[2]).acquire(blocking=False) else 1)"
+    )
+    
+    def try_in_other_process():
+        return subprocess.run([sys.executable, "-c", script, file_lock.__file__, str(path)]).returncode == 0
+    
+    with FileLock(path):
+        assert not try_in_other_process()
+    assert try_in_other_process()
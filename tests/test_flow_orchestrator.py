@@ -0,0 +1,96 @@
+"""Tests for FlowOrchestrator type detection and issue listing"""
+import asyncio
+
+import pytest
+
+from app.models.appliance import Appliance
+from app.repositories.common_issues_repository import CommonIssuesRepository
+from app.services.flow_orchestrator import FlowOrchestrator
+
+
+class FakeTypeAgent:
+    """Returns a fixed detection result"""
+    
+    def __init__(self, detected_type):
+        self.detected_type = detected_type
+    
+    async def adetect_type(self, brand, model, serial=None):
+        return self.detected_type
+
+
+class FakeIssueAgent:
+    """Lists one issue naming the type it was asked about; slow types never answer"""
+    
+    def __init__(self, slow_types=()):
+        self.requested_types = []
+        self.slow_types = slow_types
+        self.cancelled_types = []
+    
+    async def alist_common_issues(self, appliance_type, brand=None, model=None):
+        self.requested_types.append(appliance_type)
+        if appliance_type in self.slow_types:
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                self.cancelled_types.append(appliance_type)
+                raise
+        return [f"{appliance_type} issue"]
+
+
+@pytest.fixture
+def orchestrator(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    common_issues_repo = CommonIssuesRepository(
+        "data/common_issues.json",
+        precomputed_path=str(tmp_path / "precomputed_issues.json")
+    )
+    orchestrator = FlowOrchestrator(common_issues_repo=common_issues_repo)
+    orchestrator.issue_listing_agent = FakeIssueAgent()
+    return orchestrator
+
+
+def detect(orchestrator, detected_type, category):
+    orchestrator.appliance_type_agent = FakeTypeAgent(detected_type)
+    appliance = Appliance(brand="Samsung", model="WF45")
+    return asyncio.run(orchestrator.adetect_type_and_list_issues(appliance, category))
+
+
+def test_unknown_detection_keeps_the_category_guess(orchestrator):
+    appliance_type, issues = detect(orchestrator, "Unknown", "Washer")
+    assert appliance_type == "Washing Machine"
+    assert issues == ["Washing Machine issue"]
+    assert orchestrator.issue_listing_agent.requested_types == ["Washing Machine"]
+
+
+def test_unknown_detection_without_a_guess_lists_nothing(orchestrator):
+    appliance_type, issues = detect(orchestrator, "Unknown", None)
+    assert appliance_type == "Unknown"
+    assert issues == []
+    assert orchestrator.issue_listing_agent.requested_types == []
+
+
+def test_detected_type_overrides_a_wrong_guess(orchestrator):
+    appliance_type, issues = detect(orchestrator, "Dryer", "Washer")
+    assert appliance_type == "Dryer"
+    assert issues == ["Dryer issue"]
+
+
+def test_wrong_guess_is_cancelled_before_returning(orchestrator):
+    orchestrator.issue_listing_agent = FakeIssueAgent(slow_types=("Washing Machine",))
+    orchestrator.appliance_type_agent = FakeTypeAgent("Dryer")
+    appliance = Appliance(brand="Samsung", model="DV45")
+    
+    async def detect_and_check():
+        result = await orchestrator.adetect_type_and_list_issues(appliance, "Washer")
+        # The speculative request has already finished, not just been asked to stop
+        return result, list(orchestrator.issue_listing_agent.cancelled_types)
+    
+    (appliance_type, issues), cancelled = asyncio.run(detect_and_check())
+    assert (appliance_type, issues) == ("Dryer", ["Dryer issue"])
+    assert cancelled == ["Washing Machine"]
+
+
+def test_listed_issues_are_stored_in_the_background(orchestrator):
+    detect(orchestrator, "Dryer", None)
+    orchestrator._refresh_executor.shutdown(wait=True)
+    assert orchestrator.common_issues_repo.get_precomputed_issues("Dryer", "Samsung") == ["Dryer issue"]
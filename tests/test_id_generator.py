@@ -0,0 +1,90 @@
+"""Tests for IdGenerator"""
+import itertools
+import threading
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils.id_generator import EPOCH_MS, MAX_SEQUENCE, IdGenerator
+
+
+class SteppingClock:
+    """time.time() replacement that advances, then steps back, in a cycle"""
+    
+    def __init__(self, start_ms: int, steps_ms):
+        self._lock = threading.Lock()
+        self._times = itertools.accumulate(itertools.cycle(steps_ms), initial=start_ms)
+    
+    def time(self) -> float:
+        with self._lock:
+            return next(self._times) / 1000
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    def install(start_ms: int, steps_ms):
+        monkeypatch.setattr("app.utils.id_generator.time", SimpleNamespace(time=SteppingClock(start_ms, steps_ms).time))
+    return install
+
+
+def test_ids_stay_unique_and_ordered_when_the_clock_steps_back(clock):
+    # Two milliseconds forward, then five back, repeatedly
+    clock(EPOCH_MS + 10_000, [1, 1, -5])
+    generator = IdGenerator(node_id=7)
+    results = {}
+    
+    def take(name):
+        results[name] = [generator.next_int() for _ in range(3000)]
+    
+    threads = [threading.Thread(target=take, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    for ids in results.values():
+        assert all(earlier < later for earlier, later in zip(ids, ids[1:]))
+    assert len(set(results["a"]) | set(results["b"])) == 6000
+
+
+def test_sequence_overflow_borrows_the_next_millisecond(clock):
+    clock(EPOCH_MS + 10_000, [0])
+    generator = IdGenerator(node_id=1)
+    ids = [generator.next_id() for _ in range(MAX_SEQUENCE + 2)]
+    assert ids == sorted(set(ids))
+    assert (IdGenerator.timestamp_of(ids[-1]) - IdGenerator.timestamp_of(ids[0])).total_seconds() == 0.001
+
+
+def test_string_ids_sort_like_their_integers():
+    generator = IdGenerator(node_id=3)
+    values = [generator.next_int() for _ in range(500)]
+    strings = [IdGenerator.encode(value) for value in values]
+    assert strings == sorted(strings)
+    assert [IdGenerator.decode(f"TRK-{s}") for s in strings] == values
+
+
+def test_distinct_nodes_never_collide(clock):
+    clock(EPOCH_MS + 10_000, [0])
+    first, second = IdGenerator(node_id=1), IdGenerator(node_id=2)
+    ids = {first.next_int() for _ in range(100)} | {second.next_int() for _ in range(100)}
+    assert len(ids) == 200
+
+
+def test_lower_bound_selects_ids_by_time(clock):
+    clock(EPOCH_MS + 10_000, [0])
+    booking_id = IdGenerator(node_id=4095).next_id("BK-")
+    moment = datetime.fromtimestamp((EPOCH_MS + 10_000) / 1000, tz=timezone.utc)
+    assert IdGenerator.timestamp_of(booking_id) == moment
+    assert IdGenerator.lower_bound(moment, "BK-") <= booking_id < IdGenerator.lower_bound(moment.replace(microsecond=1000), "BK-")
+
+
+@pytest.mark.parametrize("id_string", ["", "SHORT", "0CQ8Z3JH1A2FU", "0CQ8Z3JH1A2F!"])
+def test_decode_rejects_invalid_ids(id_string):
+    with pytest.raises(ValueError):
+        IdGenerator.decode(id_string)
+
+
+def test_node_id_is_range_checked():
+    with pytest.raises(ValueError):
+        IdGenerator(node_id=4096)
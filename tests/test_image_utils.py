@@ -0,0 +1,50 @@
+"""Tests for ImageUtils.prepare_for_vision"""
+import io
+
+import pytest
+from PIL import Image
+
+from app.utils.image_utils import ImageUtils
+
+
+ORIENTATION_TAG = 0x0112
+
+
+def encode(image: Image.Image, format: str = "PNG", **params) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **params)
+    return buffer.getvalue()
+
+
+def decode(data: bytes) -> Image.Image:
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+
+def test_large_photo_is_downscaled_to_the_vision_bounds():
+    prepared = decode(ImageUtils.prepare_for_vision(encode(Image.new("RGB", (4000, 3000), "white"), "JPEG")))
+    assert prepared.format == "JPEG"
+    assert prepared.size == (1024, 768)
+
+
+def test_small_image_keeps_its_size_and_is_reencoded_as_jpeg():
+    prepared = decode(ImageUtils.prepare_for_vision(encode(Image.new("RGBA", (300, 200), "white"))))
+    assert prepared.format == "JPEG"
+    assert prepared.mode == "RGB"
+    assert prepared.size == (300, 200)
+
+
+def test_exif_orientation_is_applied():
+    exif = Image.Exif()
+    exif[ORIENTATION_TAG] = 6  # rotated 90 degrees clockwise
+    photo = encode(Image.new("RGB", (400, 200), "white"), "JPEG", exif=exif)
+    
+    prepared = decode(ImageUtils.prepare_for_vision(photo))
+    assert prepared.size == (200, 400)
+    assert prepared.getexif().get(ORIENTATION_TAG) in (None, 1)
+
+
+def test_undecodable_bytes_are_rejected():
+    with pytest.raises(ValueError):
+        ImageUtils.prepare_for_vision(b"not an image")
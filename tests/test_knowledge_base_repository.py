@@ -0,0 +1,35 @@
+"""Tests for KnowledgeBaseRepository problem matching"""
+import pytest
+
+from app.repositories.knowledge_base_repository import KnowledgeBaseRepository
+
+
+@pytest.fixture
+def repo():
+    return KnowledgeBaseRepository("data/knowledge_base.json")
+
+
+def test_every_problem_has_an_appliance_type(repo):
+    assert all(problem.appliance_type for problem in repo.get_problems())
+
+
+@pytest.mark.parametrize("issue, appliance_type", [
+    ("Washing Machine | Not draining", "Washing Machine"),
+    ("Oven light bulb is out", "Oven"),
+    ("Microwave light not working", "Microwave"),
+])
+def test_problems_for_other_appliances_are_not_matched(repo, issue, appliance_type):
+    problem, score = repo.find_best_match(issue, appliance_type)
+    assert problem is None or problem.appliance_type == appliance_type
+    assert score < 0.6
+
+
+def test_matching_problem_for_the_same_appliance(repo):
+    problem, score = repo.find_best_match("The fridge light bulb is out and it's dark inside", "Refrigerator")
+    assert problem.id == "fridge_light_out"
+    assert score == 1.0
+
+
+def test_keywords_match_whole_words_only(repo):
+    problem, _ = repo.find_best_match("Lightly spinning drum, darker clothes", "Refrigerator")
+    assert problem is None
@@ -0,0 +1,49 @@
+"""Tests for PartExtractor"""
+from app.utils.part_extractor import PartExtractor
+
+
+TWO_PARTS = """1. Check the pump.
+
+**Part Required:** Drain pump
+**Part Number:** DP-1234
+**Cost:** $45.99
+
+**Part Required:** Door seal
+**Part Number:** DS-77
+**Cost:** $30
+
+If you want to order the part, click below."""
+
+
+def test_every_part_block_is_extracted():
+    result = PartExtractor.extract(TWO_PARTS)
+    assert result["parts"] == [
+        {"name": "Drain pump", "part_number": "DP-1234", "price": 45.99, "order_price": 45.99},
+        {"name": "Door seal", "part_number": "DS-77", "price": 30.0, "order_price": 30.0}
+    ]
+    assert result["has_order_text"]
+    assert result["fallback_part"] is None
+
+
+def test_cost_near_the_part_number_is_used():
+    content = "**Part Required:** Thermal fuse\n**Part Number:** TF-100\n\nThe part usually costs $12.50 at most stores."
+    assert PartExtractor.extract(content)["parts"][0]["price"] == 12.5
+
+
+def test_order_price_is_searched_in_the_whole_message():
+    content = "Labour Cost: $20 per hour.\n" + "x" * 400 + "\n**Part Required:** Belt\n**Part Number:** B-1\n"
+    part = PartExtractor.extract(content)["parts"][0]
+    assert part["price"] == 0.0
+    assert part["order_price"] == 20.0
+
+
+def test_order_offer_without_a_part_block_gets_a_fallback_part():
+    result = PartExtractor.extract("You can order the part and book a technician to install it. Part Required: belt")
+    assert result["parts"] == []
+    assert result["has_order_text"]
+    assert result["fallback_part"] == {"name": "belt", "part_number": "TBD", "price": 0.0}
+
+
+def test_message_without_parts():
+    for content in ("1. Clean the filter.", "", None):
+        assert PartExtractor.extract(content) == {"parts": [], "has_order_text": False, "fallback_part": None}
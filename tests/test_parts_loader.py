@@ -0,0 +1,46 @@
+"""Tests for PartsManifest"""
+import os
+
+import pytest
+
+from app.utils.parts_loader import PartsManifest
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path / "Water Leakage"
+    folder.mkdir()
+    (folder / "Drain Hose - Price $12.50.jpg").write_bytes(b"")
+    (folder / "notes.txt").write_bytes(b"")
+    return folder
+
+
+def set_mtime(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_folder_is_scanned_once_while_unchanged(folder, monkeypatch):
+    manifest = PartsManifest(folder.parent)
+    scans = []
+    original_scan = PartsManifest._scan
+    monkeypatch.setattr(PartsManifest, "_scan", staticmethod(lambda path: scans.append(path) or original_scan(path)))
+    
+    first = manifest.get_parts("Water Leakage")
+    first[0]["price"] = 0
+    second = manifest.get_parts("Water Leakage")
+    assert [(part["name"], part["price"]) for part in second] == [("Drain Hose", 12.5)]
+    assert len(scans) == 1
+
+
+def test_changed_folder_is_rescanned(folder):
+    manifest = PartsManifest(folder.parent)
+    set_mtime(folder, 1_000_000_000_000_000_000)
+    assert len(manifest.get_parts("Water Leakage")) == 1
+    
+    (folder / "Door Gasket - Price $30.00.png").write_bytes(b"")
+    set_mtime(folder, 1_000_000_001_000_000_000)
+    assert [part["name"] for part in manifest.get_parts("Water Leakage")] == ["Door Gasket", "Drain Hose"]
+
+
+def test_missing_folder_has_no_parts(tmp_path):
+    assert PartsManifest(tmp_path).get_parts("Nope") == []
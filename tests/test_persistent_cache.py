@@ -0,0 +1,66 @@
+"""Tests for PersistentCache"""
+import json
+import os
+
+import pytest
+
+from app.utils.persistent_cache import PersistentCache
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return tmp_path / "cache.json"
+
+
+def test_least_recently_used_entry_is_evicted(cache_path):
+    cache = PersistentCache(cache_path, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    
+    assert cache.get("b") is None
+    assert dict(cache.items()) == {"a": 1, "c": 3}
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_entries_round_trip_through_the_file(cache_path):
+    cache = PersistentCache(cache_path, max_entries=3)
+    for i, key in enumerate("abcd"):
+        cache.set(key, {"n": i})
+    assert not cache_path.exists()
+    cache.flush()
+    
+    assert "\n" not in cache_path.read_text(encoding="utf-8")
+    reopened = PersistentCache(cache_path, max_entries=3)
+    assert list(reopened.items()) == [("b", {"n": 1}), ("c", {"n": 2}), ("d", {"n": 3})]
+
+
+def test_expired_entries_are_not_loaded(cache_path):
+    cache = PersistentCache(cache_path)
+    cache.set("old", 1)
+    cache.flush()
+    data = json.loads(cache_path.read_text(encoding="utf-8"))
+    data["old"]["stored_at"] -= 120
+    cache_path.write_text(json.dumps(data), encoding="utf-8")
+    
+    assert PersistentCache(cache_path, ttl_seconds=60).get("old") is None
+
+
+def test_changes_are_flushed_after_the_delay(cache_path):
+    cache = PersistentCache(cache_path, flush_seconds=0.01)
+    cache.set("a", 1)
+    cache._flush_timer.join()
+    assert json.loads(cache_path.read_text(encoding="utf-8"))["a"]["value"] == 1
+
+
+def test_failed_write_leaves_no_temp_file(cache_path, monkeypatch):
+    cache = PersistentCache(cache_path)
+    cache.set("a", 1)
+    
+    def fail_replace(src, dst):
+        raise OSError("disk full")
+    
+    monkeypatch.setattr(os, "replace", fail_replace)
+    cache.flush()
+    assert os.listdir(cache_path.parent) == []
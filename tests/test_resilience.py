@@ -0,0 +1,165 @@
+"""Tests for the LLM resilience layer"""
+import threading
+import time
+
+import httpx
+import openai
+import pytest
+
+from app.utils.resilience import CircuitBreaker, LLMUnavailableError, ResilientCaller
+
+
+class FakeClock:
+    """Replaces time.monotonic() in the resilience module"""
+    
+    def __init__(self, monkeypatch):
+        self.now = 1000.0
+        monkeypatch.setattr("app.utils.resilience.time.monotonic", lambda: self.now)
+
+
+def make_timeout_error():
+    return openai.APITimeoutError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_breaker_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_half_open_trial_closes_it(monkeypatch):
+    clock = FakeClock(monkeypatch)
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    assert not breaker.allow_request()
+    
+    clock.now += 30
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one trial call at a time
+    assert not breaker.allow_request()
+    
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_breaker_failed_trial_reopens_it(monkeypatch):
+    clock = FakeClock(monkeypatch)
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow_request()
+    
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    clock.now += 30
+    assert breaker.allow_request()
+
+
+def test_call_passes_the_time_left_as_request_timeout():
+    caller = ResilientCaller(budgets={"flow": 5.0}, hedging_enabled=False)
+    timeouts = []
+    assert caller.call("flow", lambda timeout: timeouts.append(timeout) or "ok") == "ok"
+    assert 4.0 < timeouts[0] <= 5.0
+
+
+def test_call_retries_retryable_errors():
+    caller = ResilientCaller(budgets={"flow": 5.0}, base_delay=0.01, max_delay=0.01, hedging_enabled=False)
+    attempts = []
+    
+    def flaky(timeout):
+        attempts.append(timeout)
+        if len(attempts) < 3:
+            raise make_timeout_error()
+        return "ok"
+    
+    assert caller.call("flow", flaky) == "ok"
+    assert len(attempts) == 3
+    assert caller.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retry_sleeps_for_the_delay_it_was_checked_against(monkeypatch):
+    # The first draw fits the budget, a second one would not
+    draws = iter([0.1, 10.0])
+    monkeypatch.setattr("app.utils.resilience.random.uniform", lambda low, high: next(draws))
+    sleeps = []
+    monkeypatch.setattr("app.utils.resilience.time.sleep", sleeps.append)
+    caller = ResilientCaller(budgets={"flow": 5.0}, max_delay=20.0, hedging_enabled=False)
+    attempts = []
+    
+    def flaky(timeout):
+        attempts.append(timeout)
+        if len(attempts) < 2:
+            raise make_timeout_error()
+        return "ok"
+    
+    assert caller.call("flow", flaky) == "ok"
+    assert sleeps == [0.1]
+
+
+def test_call_does_not_retry_client_errors():
+    caller = ResilientCaller(budgets={"flow": 5.0}, hedging_enabled=False)
+    attempts = []
+    
+    def bad_request(timeout):
+        attempts.append(timeout)
+        raise ValueError("bad request")
+    
+    with pytest.raises(ValueError):
+        caller.call("flow", bad_request)
+    assert len(attempts) == 1
+
+
+def test_call_over_budget_counts_as_breaker_failure():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    caller = ResilientCaller(budgets={"flow": 0.2}, hedging_enabled=False, breaker=breaker)
+    release = threading.Event()
+    
+    with pytest.raises(LLMUnavailableError):
+        caller.call("flow", lambda timeout: release.wait(2))
+    release.set()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(LLMUnavailableError):
+        caller.call("flow", lambda timeout: "ok")
+
+
+def test_slow_call_within_budget_does_not_trip_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    caller = ResilientCaller(budgets={"flow": 2.0}, hedging_enabled=False, breaker=breaker)
+    assert caller.call("flow", lambda timeout: time.sleep(0.3) or "ok") == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_queued_call_past_its_deadline_is_not_sent():
+    caller = ResilientCaller(budgets={"flow": 1.0}, hedging_enabled=False)
+    sent = []
+    with pytest.raises(LLMUnavailableError):
+        caller._run_with_timeout(sent.append, deadline=time.monotonic() - 1)
+    assert sent == []
+
+
+def test_acall_passes_the_time_left_as_request_timeout():
+    caller = ResilientCaller(budgets={"flow": 5.0}, hedging_enabled=False)
+    timeouts = []
+    
+    async def request(timeout):
+        timeouts.append(timeout)
+        return "ok"
+    
+    import asyncio
+    assert asyncio.run(caller.acall("flow", request)) == "ok"
+    assert 4.0 < timeouts[0] <= 5.0
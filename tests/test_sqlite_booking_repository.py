@@ -0,0 +1,58 @@
+"""Tests for SqliteBookingRepository"""
+from datetime import date, datetime
+
+import pytest
+
+from app.repositories.booking_repository import BookingRepository
+from app.repositories.sqlite_booking_repository import SqliteBookingRepository
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "bookings.db")
+
+
+def test_saves_survive_reopen(open_repo, db_path, make_booking):
+    repo = open_repo(SqliteBookingRepository, db_path, legacy_path=None)
+    repo.save(make_booking("B0"))
+    repo.save(make_booking("B1"))
+    updated = make_booking("B0")
+    updated.payment_status = "paid"
+    repo.save(updated)
+    repo.close()
+    
+    reopened = open_repo(SqliteBookingRepository, db_path, legacy_path=None)
+    assert reopened.count() == 2
+    assert reopened.get_by_id("B0").payment_status == "paid"
+    assert reopened.get_by_id("B1").to_dict() == make_booking("B1").to_dict()
+    assert reopened.get_by_id("missing") is None
+
+
+def test_json_store_is_migrated_once(open_repo, db_path, make_booking, tmp_path):
+    legacy_path = tmp_path / "bookings.json"
+    legacy_repo = BookingRepository(str(legacy_path))
+    legacy_repo.save(make_booking("B0"))
+    legacy_repo.save(make_booking("B1"))
+    legacy_repo.close()
+    
+    repo = open_repo(SqliteBookingRepository, db_path, legacy_path=str(legacy_path))
+    assert [b.booking_id for b in repo.load_all()] == ["B0", "B1"]
+    repo.close()
+    
+    # Bookings added to the JSON store later are not copied again
+    legacy_repo = BookingRepository(str(legacy_path))
+    legacy_repo.save(make_booking("B2"))
+    legacy_repo.close()
+    assert open_repo(SqliteBookingRepository, db_path, legacy_path=str(legacy_path)).count() == 2
+
+
+def test_lookups_are_paged_by_slot_time(open_repo, db_path, make_booking):
+    repo = open_repo(SqliteBookingRepository, db_path, legacy_path=None)
+    for i in (2, 0, 1):
+        repo.save(make_booking(f"B{i}", slot=datetime(2026, 5, 4, 9 + i)))
+    repo.save(make_booking("B3", slot=datetime(2026, 5, 5, 9), technician_id="tech-2"))
+    
+    assert [b.booking_id for b in repo.by_technician("tech-1", offset=1, limit=1)] == ["B1"]
+    assert [b.booking_id for b in repo.by_technician("tech-1", start=datetime(2026, 5, 4, 10))] == ["B1", "B2"]
+    assert [b.booking_id for b in repo.by_day(date(2026, 5, 4), limit=2)] == ["B0", "B1"]
+    assert [b.booking_id for b in repo.iter_by_phone("555 0100", offset=3)] == ["B3"]
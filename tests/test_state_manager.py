@@ -0,0 +1,41 @@
+"""Tests for StateManager chat history and window (Streamlit bare mode)"""
+import pytest
+
+from app.utils.state_manager import StateManager
+from config import CHAT_WINDOW_SIZE, CHAT_WINDOW_PAGE_SIZE
+
+
+@pytest.fixture(autouse=True)
+def session():
+    StateManager.reset()
+    yield
+    StateManager.reset()
+
+
+def add_messages(count: int):
+    for i in range(count):
+        StateManager.add_message("user" if i % 2 == 0 else "assistant", f"Message {i}.")
+
+
+def test_short_chat_is_rendered_from_the_start():
+    add_messages(CHAT_WINDOW_SIZE - 1)
+    assert StateManager.get_chat_window_start() == 0
+
+
+def test_long_chat_renders_only_the_latest_window():
+    add_messages(CHAT_WINDOW_SIZE + 15)
+    assert StateManager.get_chat_window_start() == 15
+
+
+def test_load_earlier_messages_grows_the_window_by_a_page():
+    add_messages(CHAT_WINDOW_SIZE + CHAT_WINDOW_PAGE_SIZE + 5)
+    StateManager.load_earlier_messages()
+    assert StateManager.get_chat_window_start() == 5
+    StateManager.load_earlier_messages()
+    assert StateManager.get_chat_window_start() == 0
+
+
+def test_proceed_prompt_is_tracked():
+    assert not StateManager.has_proceed_prompt()
+    StateManager.add_message("assistant", f"{StateManager.PROCEED_PROMPT_TEXT}?")
+    assert StateManager.has_proceed_prompt()
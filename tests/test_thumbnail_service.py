@@ -0,0 +1,59 @@
+"""Tests for ThumbnailService"""
+import io
+
+import pytest
+from PIL import Image
+
+from app.utils.thumbnail_service import ThumbnailService
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / "Drain Hose - Price $12.50.png"
+    Image.new("RGBA", (1200, 600), (255, 0, 0, 128)).save(path)
+    return path
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return tmp_path / "thumbnails"
+
+
+def count_generated(service, monkeypatch):
+    generated = []
+    original = service._make_thumbnail
+    monkeypatch.setattr(service, "_make_thumbnail", lambda data: generated.append(data) or original(data))
+    return generated
+
+
+def test_thumbnail_is_a_bounded_jpeg(image_path, cache_dir):
+    thumbnail = ThumbnailService(cache_dir).get(image_path)
+    with Image.open(io.BytesIO(thumbnail)) as image:
+        assert image.format == "JPEG"
+        assert image.size == (480, 240)
+
+
+def test_repeat_lookup_is_served_from_memory(image_path, cache_dir, monkeypatch):
+    service = ThumbnailService(cache_dir)
+    generated = count_generated(service, monkeypatch)
+    assert service.get(image_path) == service.get(image_path)
+    assert len(generated) == 1
+
+
+def test_new_service_reads_the_thumbnail_from_disk(image_path, cache_dir, monkeypatch):
+    thumbnail = ThumbnailService(cache_dir).get(image_path)
+    service = ThumbnailService(cache_dir)
+    generated = count_generated(service, monkeypatch)
+    assert service.get(image_path) == thumbnail
+    assert generated == []
+
+
+def test_edited_image_gets_a_new_thumbnail(image_path, cache_dir):
+    service = ThumbnailService(cache_dir)
+    before = service.get(image_path)
+    Image.new("RGB", (300, 600), "blue").save(image_path)
+    assert service.get(image_path) != before
+
+
+def test_missing_image_has_no_thumbnail(tmp_path, cache_dir):
+    assert ThumbnailService(cache_dir).get_many([tmp_path / "missing.png"]) == [None]
@@ -0,0 +1,80 @@
+"""Tests for TroubleshootingAgent part-information scrubbing and fallback guidance"""
+import random
+
+import pytest
+
+from app.agents.troubleshooting_agent import TroubleshootingAgent
+
+
+SAMPLES = [
+    "1. Unplug the dryer.\n\n2. Check the belt.\n\nDid this resolve the issue?",
+    "1. Check the pump.\n\n**Part Required**: Drain pump\n**Cost**: $45\n\n2. Run a cycle.",
+    "If you want to order the part, click below.\n\nOtherwise, keep going.",
+    # The order pattern spans paragraphs
+    "You can order it.\n\nThe part is in stock.\n\nA technician can bring it.\n\nThey will install it.\n\nThanks!",
+    "In order to reach the filter, remove the panel.\n\n\n\n3. Clean the filter.\n\n",
+    "  Leading space.\n\n\n\nTrailing space.  \n\n",
+    ""
+]
+
+
+def split_randomly(text: str, rng: random.Random):
+    """Split text into chunks at random positions"""
+    cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 10))))
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_stream_filter_matches_scrub(text):
+    rng = random.Random(text)
+    for _ in range(50):
+        chunks = split_randomly(text, rng)
+        streamed = "".join(TroubleshootingAgent._filter_part_info_stream(chunks))
+        assert streamed == TroubleshootingAgent._scrub_part_info(text)
+
+
+def test_stream_filter_matches_scrub_on_generated_text():
+    rng = random.Random(0)
+    words = [
+        "order", "part", "technician", "bring", "install", "border", "step",
+        "**Cost**: $5", "**Part Number**: X1", "If you want to order the part",
+        " ", "\n", "\n\n", "\n\n\n"
+    ]
+    for _ in range(2000):
+        text = "".join(rng.choice(words) + rng.choice(["", " ", "\n"]) for _ in range(rng.randint(0, 30)))
+        streamed = "".join(TroubleshootingAgent._filter_part_info_stream(split_randomly(text, rng)))
+        assert streamed == TroubleshootingAgent._scrub_part_info(text)
+
+
+def test_stream_filter_releases_paragraphs_before_the_end():
+    text = "1. Unplug it.\n\n2. Check the valve.\n\n3. Test it."
+    pieces = list(TroubleshootingAgent._filter_part_info_stream(list(text)))
+    assert pieces == ["1. Unplug it.", "\n\n2. Check the valve.", "\n\n3. Test it."]
+
+
+def test_stream_filter_holds_back_a_possible_order_match():
+    chunks = ["Please order it.\n\n", "Next step.\n\n", "The part arrives; a technician will bring and install it.\n\n", "Done."]
+    pieces = list(TroubleshootingAgent._filter_part_info_stream(chunks))
+    # Nothing is released until the match completes in the third chunk
+    assert pieces == ["Please", " \n\nDone."]
+
+
+@pytest.fixture
+def agent():
+    return TroubleshootingAgent(api_key="sk-test")
+
+
+def test_fallback_uses_steps_for_the_same_appliance(agent):
+    guidance = agent._get_fallback_guidance("The fridge light bulb is out and it's dark", "Refrigerator")
+    assert "**refrigerator light not working**" in guidance
+
+
+@pytest.mark.parametrize("issue, appliance_type", [
+    ("Oven light bulb is out", "Oven"),
+    ("Washing Machine | Not draining", "Washing Machine"),
+    # A single keyword is not a confident match
+    ("Strange light", "Refrigerator"),
+])
+def test_fallback_apologizes_without_a_confident_match(agent, issue, appliance_type):
+    guidance = agent._get_fallback_guidance(issue, appliance_type)
+    assert guidance.startswith("I apologize")